@@ -0,0 +1 @@
+# Make benchmarks directory a Python package
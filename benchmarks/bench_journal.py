@@ -0,0 +1,75 @@
+"""Measure the cost of each journal durability mode and of cold-start recovery.
+
+Usage:
+    python -m benchmarks.bench_journal [--orders N] [--batch N]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.bench_price_ladder import generate_flow
+from src.engine.journal import DURABILITY_MODES, Journal, replay_journal
+from src.engine.orderbook import OrderBook
+from src.engine.snapshot import load_snapshot, write_snapshot
+
+
+def run(durability: str, events, batch: int, directory: str) -> float:
+    """Apply and journal events, committing every ``batch`` events; returns events per second"""
+    book = OrderBook("BTC-USDT")
+    journal = Journal(os.path.join(directory, f"{durability}.wal"), durability)
+    start = time.perf_counter()
+    for i, (action, payload) in enumerate(events, 1):
+        if action == "new":
+            book.add_order(payload)
+            journal.append_new(book.symbol, payload)
+        elif book.cancel_order(payload):
+            journal.append_cancel(book.symbol, payload)
+        if i % batch == 0:
+            journal.commit()
+    journal.close()
+    elapsed = time.perf_counter() - start
+    return len(events) / elapsed
+
+
+def run_recovery(events, directory: str):
+    """Time rebuilding a book from its full journal and from a snapshot; returns (replay, snapshot) seconds"""
+    book = OrderBook("BTC-USDT")
+    journal = Journal(os.path.join(directory, "recovery.wal"), "none")
+    for action, payload in events:
+        if action == "new":
+            book.add_order(payload)
+            journal.append_new(book.symbol, payload)
+        elif book.cancel_order(payload):
+            journal.append_cancel(book.symbol, payload)
+    journal.close()
+    snapshot = os.path.join(directory, "recovery.snap")
+    write_snapshot(book, snapshot, journal.sequence)
+
+    start = time.perf_counter()
+    replay_journal(journal.path, {"BTC-USDT": OrderBook("BTC-USDT")})
+    replay = time.perf_counter() - start
+    start = time.perf_counter()
+    load_snapshot(snapshot, OrderBook("BTC-USDT"))
+    return replay, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--orders", type=int, default=20_000)
+    parser.add_argument("--batch", type=int, default=64, help="Commands per group commit")
+    args = parser.parse_args()
+
+    baseline = None
+    with tempfile.TemporaryDirectory() as directory:
+        for durability in DURABILITY_MODES:
+            # Orders are mutated by the book, so each mode gets a fresh flow
+            rate = run(durability, generate_flow(args.orders, 200), args.batch, directory)
+            baseline = baseline or rate
+            print(f"{durability:>6}: {rate:,.0f} events/sec ({rate / baseline:.2f}x of none)")
+        replay, snapshot = run_recovery(generate_flow(args.orders, 200), directory)
+        print(f"recovery: journal replay {replay * 1000:,.1f} ms, snapshot load {snapshot * 1000:,.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
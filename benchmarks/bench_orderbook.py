@@ -0,0 +1,315 @@
+"""Order book benchmark suite with latency percentiles and stored baselines.
+
+Usage:
+    python -m benchmarks.bench_orderbook [--quick] [--only NAME]
+        [--backend float|sorted|ladder] [--save-baseline] [--tolerance 0.25]
+
+Every case uses seeded synthetic flow, so runs are reproducible. Results
+are compared against ``benchmarks/baselines.json`` (p50 latency) and the
+process exits non-zero if any case regressed by more than the tolerance.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from decimal import Decimal
+from functools import partial
+from typing import Callable, Dict, List, Optional
+
+from benchmarks.harness import load_baselines, regressions, save_baselines, summarize, time_each
+from src.engine.instrument import Instrument
+from src.engine.order import Order, OrderSide, OrderType
+from src.engine.orderbook import OrderBook
+
+BASELINES = os.path.join(os.path.dirname(__file__), "baselines.json")
+MID = 50000.0
+TICK = 0.01
+INSTRUMENT = Instrument(symbol="BTC-USDT", tick_size=Decimal("0.01"), lot_size=Decimal("0.001"))
+
+_ids = iter(range(1, sys.maxsize))
+
+
+def make_order(
+    side: OrderSide,
+    quantity: float,
+    price: Optional[float] = None,
+    order_type=OrderType.LIMIT,
+    stop_price: Optional[float] = None,
+) -> Order:
+    return Order(
+        order_id=f"o{next(_ids)}",
+        symbol="BTC-USDT",
+        order_type=order_type,
+        side=side,
+        quantity=quantity,
+        price=price,
+        stop_price=stop_price,
+        remaining_quantity=quantity
+    )
+
+
+def level_price(side: OrderSide, level: int) -> float:
+    """Price of the level-th passive level (0 = best) on a side"""
+    offset = (level + 1) * TICK
+    return round(MID - offset if side == OrderSide.BUY else MID + offset, 2)
+
+
+def new_book(backend: str) -> OrderBook:
+    if backend == "float":
+        return OrderBook("BTC-USDT")
+    return OrderBook("BTC-USDT", INSTRUMENT, backend)
+
+
+def resting_book(backend: str, levels: int, per_level: int, quantity: float = 1.0, sides=tuple(OrderSide)) -> OrderBook:
+    """A book with ``levels`` passive levels of ``per_level`` orders on each side"""
+    book = new_book(backend)
+    for side in sides:
+        for level in range(levels):
+            for _ in range(per_level):
+                book.add_order(make_order(side, quantity, level_price(side, level)))
+    return book
+
+
+def bench_add_order(backend: str, order_type: OrderType, count: int, rng: random.Random) -> List[int]:
+    """Latency of add_order for one order type against a deep two-sided book"""
+    book = resting_book(backend, levels=200, per_level=10)
+    orders = []
+    for _ in range(count):
+        side = rng.choice(tuple(OrderSide))
+        quantity = rng.randint(1, 100) / 1000
+        if order_type == OrderType.LIMIT:
+            # Passive, so the book keeps its shape
+            price = level_price(side, rng.randint(0, 199))
+        elif order_type == OrderType.MARKET:
+            price = None
+        else:
+            price = level_price(OrderSide.SELL if side == OrderSide.BUY else OrderSide.BUY, 5)
+        orders.append(make_order(side, quantity, price, order_type))
+    return time_each([partial(book.add_order, order) for order in orders])
+
+
+def bench_cancel(backend: str, depth: int, count: int, rng: random.Random) -> List[int]:
+    """Latency of cancelling a random order from a single level holding ``depth`` orders"""
+    book = new_book(backend)
+    price = level_price(OrderSide.BUY, 0)
+    resting = []
+    for _ in range(depth):
+        order = make_order(OrderSide.BUY, 0.01, price)
+        book.add_order(order)
+        resting.append(order.order_id)
+
+    clock = time.perf_counter_ns
+    samples = []
+    for _ in range(count):
+        position = rng.randrange(len(resting))
+        order_id = resting[position]
+        start = clock()
+        book.cancel_order(order_id)
+        samples.append(clock() - start)
+        # Refill untimed so the queue depth stays constant
+        order = make_order(OrderSide.BUY, 0.01, price)
+        book.add_order(order)
+        resting[position] = order.order_id
+    return samples
+
+
+def bench_mass_cancel(backend: str, orders: int, count: int, rng: random.Random) -> List[int]:
+    """Latency of pulling one owner's ``orders`` orders, interleaved with another owner's across 100 levels"""
+    samples = []
+    clock = time.perf_counter_ns
+    for _ in range(count):
+        book = new_book(backend)
+        for i in range(orders * 2):
+            order = make_order(OrderSide.BUY, 0.01, level_price(OrderSide.BUY, rng.randrange(100)))
+            order.owner = "pulled" if i % 2 else "kept"
+            book.add_order(order)
+        start = clock()
+        book.mass_cancel("pulled")
+        samples.append(clock() - start)
+    return samples
+
+
+def bench_stop_cascade(backend: str, stops: int, count: int, rng: random.Random) -> List[int]:
+    """Latency of one market sell that sets off a chain of ``stops`` sell stops, one per bid level"""
+    samples = []
+    clock = time.perf_counter_ns
+    for _ in range(count):
+        book = resting_book(backend, levels=stops + 1, per_level=1, sides=(OrderSide.BUY,))
+        for level in range(stops):
+            book.add_order(make_order(
+                OrderSide.SELL, 1.0, order_type=OrderType.STOP, stop_price=level_price(OrderSide.BUY, level)
+            ))
+        flash = make_order(OrderSide.SELL, 1.0, order_type=OrderType.MARKET)
+        start = clock()
+        book.add_order(flash)
+        samples.append(clock() - start)
+    return samples
+
+
+def bench_trade_with_stops(backend: str, stops: int, count: int, rng: random.Random) -> List[int]:
+    """Latency of small crossing orders while ``stops`` untriggered stops wait on both sides"""
+    book = resting_book(backend, levels=200, per_level=10)
+    for level in range(stops // 2):
+        far = 1_000 + level
+        book.add_order(make_order(OrderSide.BUY, 0.01, order_type=OrderType.STOP, stop_price=level_price(OrderSide.SELL, far)))
+        book.add_order(make_order(OrderSide.SELL, 0.01, order_type=OrderType.STOP, stop_price=level_price(OrderSide.BUY, far)))
+    orders = [make_order(rng.choice(tuple(OrderSide)), 0.001, order_type=OrderType.MARKET) for _ in range(count)]
+    return time_each([partial(book.add_order, order) for order in orders])
+
+
+def bench_iceberg_fills(backend: str, slices: int, count: int, rng: random.Random) -> List[int]:
+    """Latency of one market order taking ``slices`` slices of an iceberg, each reloaded behind 10 other orders"""
+    samples = []
+    clock = time.perf_counter_ns
+    price = level_price(OrderSide.SELL, 0)
+    for _ in range(count):
+        book = new_book(backend)
+        iceberg = make_order(OrderSide.SELL, float(slices), price)
+        iceberg.display_quantity = 1.0
+        book.add_order(iceberg)
+        for _ in range(10):
+            book.add_order(make_order(OrderSide.SELL, 0.001, price))
+        taker = make_order(OrderSide.BUY, float(slices), order_type=OrderType.MARKET)
+        start = clock()
+        book.add_order(taker)
+        samples.append(clock() - start)
+    return samples
+
+
+def bench_sweep(backend: str, levels: int, count: int, rng: random.Random) -> List[int]:
+    """Latency of one market order sweeping ``levels`` ask levels"""
+    samples = []
+    clock = time.perf_counter_ns
+    for _ in range(count):
+        book = resting_book(backend, levels=levels, per_level=1, sides=(OrderSide.SELL,))
+        sweep = make_order(OrderSide.BUY, float(levels), order_type=OrderType.MARKET)
+        start = clock()
+        book.add_order(sweep)
+        samples.append(clock() - start)
+    return samples
+
+
+def bench_snapshot(backend: str, levels: int, count: int, rng: random.Random) -> List[int]:
+    """Latency of a depth-10 snapshot of a book with ``levels`` levels per side"""
+    book = resting_book(backend, levels=levels, per_level=1)
+    return time_each([partial(book.get_order_book_snapshot, 10)] * count)
+
+
+def bench_api_orders(backend: str, count: int, rng: random.Random) -> List[int]:
+    """End-to-end latency of POST /api/v1/orders through the in-process ASGI app"""
+    from fastapi.testclient import TestClient
+    from src.api.main import app
+
+    client = TestClient(app)
+    payloads = []
+    for _ in range(count):
+        side = rng.choice(tuple(OrderSide))
+        payloads.append({
+            "symbol": "BTC-USDT",
+            "side": side.value,
+            "order_type": "limit",
+            "quantity": rng.randint(1, 100) / 1000,
+            "price": level_price(side, rng.randint(0, 199))
+        })
+    return time_each([partial(client.post, "/api/v1/orders", json=payload) for payload in payloads])
+
+
+def bench_ws_orders(backend: str, count: int, rng: random.Random) -> List[int]:
+    """Round-trip latency of one order and its ack over an order-entry WebSocket session"""
+    from fastapi.testclient import TestClient
+    from src.api.main import app
+
+    client = TestClient(app)
+    clock = time.perf_counter_ns
+    samples = []
+    with client.websocket_connect("/ws/orders") as websocket:
+        for i in range(count):
+            side = rng.choice(tuple(OrderSide))
+            request = {
+                "type": "new",
+                "client_order_id": f"w{i}",
+                "symbol": "BTC-USDT",
+                "side": side.value,
+                "order_type": "limit",
+                "quantity": rng.randint(1, 100) / 1000,
+                "price": level_price(side, rng.randint(0, 199))
+            }
+            start = clock()
+            websocket.send_json(request)
+            websocket.receive_text()
+            samples.append(clock() - start)
+    return samples
+
+
+def bench_encode_snapshot(backend: str, binary: bool, count: int, rng: random.Random) -> List[int]:
+    """Latency of encoding a depth-50 snapshot for the market data feed, JSON or binary"""
+    from src.api.publisher import encode_book
+
+    snapshot = resting_book(backend, levels=50, per_level=1).get_order_book_snapshot(50)
+    return time_each([partial(encode_book, snapshot, binary)] * count)
+
+
+def suite(scale: float) -> Dict[str, Callable[[str, random.Random], List[int]]]:
+    """Benchmark cases by name; ``scale`` shrinks operation counts for quick runs"""
+    n = lambda count: max(1, int(count * scale))
+    cases = {}
+    for order_type in (OrderType.LIMIT, OrderType.MARKET, OrderType.IOC, OrderType.FOK):
+        cases[f"add_order.{order_type.value}"] = partial(bench_add_order, order_type=order_type, count=n(20_000))
+    for depth in (1, 100, 10_000):
+        cases[f"cancel_order.depth_{depth}"] = partial(bench_cancel, depth=depth, count=n(20_000))
+    cases["mass_cancel.orders_1000"] = partial(bench_mass_cancel, orders=1_000, count=n(100))
+    cases["stop_cascade.stops_1000"] = partial(bench_stop_cascade, stops=1_000, count=n(50))
+    cases["stop_check.stops_10000"] = partial(bench_trade_with_stops, stops=10_000, count=n(20_000))
+    cases["iceberg_fill.slices_1000"] = partial(bench_iceberg_fills, slices=1_000, count=n(50))
+    for levels in (10, 1_000):
+        cases[f"market_sweep.levels_{levels}"] = partial(bench_sweep, levels=levels, count=n(200 if levels > 100 else 2_000))
+    for levels in (100, 10_000):
+        cases[f"snapshot.levels_{levels}"] = partial(bench_snapshot, levels=levels, count=n(2_000))
+    for encoding in ("json", "binary"):
+        cases[f"encode_snapshot.{encoding}"] = partial(bench_encode_snapshot, binary=encoding == "binary", count=n(5_000))
+    cases["api.post_order"] = partial(bench_api_orders, count=n(2_000))
+    cases["api.ws_order"] = partial(bench_ws_orders, count=n(2_000))
+    return cases
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--quick", action="store_true", help="Run a tenth of the operations")
+    parser.add_argument("--only", help="Run cases whose name contains this text")
+    parser.add_argument("--backend", choices=("float", "sorted", "ladder"), default="sorted")
+    parser.add_argument("--baseline", default=BASELINES, help="Baseline JSON file")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run's results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed p50 slowdown before failing")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    results = {}
+    print(f"{'case':<28} {'p50 us':>9} {'p90 us':>9} {'p99 us':>9} {'p99.9 us':>9} {'ops/sec':>12}")
+    for name, case in suite(0.1 if args.quick else 1.0).items():
+        if args.only and args.only not in name:
+            continue
+        summary = summarize(case(args.backend, rng=random.Random(args.seed)))
+        key = f"{args.backend}.{name}"
+        results[key] = summary
+        print(
+            f"{name:<28} {summary['p50_us']:>9.2f} {summary['p90_us']:>9.2f} {summary['p99_us']:>9.2f} "
+            f"{summary['p99.9_us']:>9.2f} {summary['ops_per_sec']:>12,.0f}"
+        )
+
+    if args.save_baseline:
+        baselines = load_baselines(args.baseline)
+        baselines.update(results)
+        save_baselines(args.baseline, baselines)
+        print(f"Saved {len(results)} baselines to {args.baseline}")
+        return
+
+    found = regressions(results, load_baselines(args.baseline), args.tolerance)
+    for line in found:
+        print(f"REGRESSION {line}")
+    if found:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
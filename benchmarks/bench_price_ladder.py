@@ -0,0 +1,99 @@
+"""Compare the SortedDict and PriceLadder order book backends.
+
+Usage:
+    python -m benchmarks.bench_price_ladder [--orders N] [--band TICKS]
+"""
+import argparse
+import random
+import time
+from decimal import Decimal
+
+from src.engine.instrument import Instrument
+from src.engine.order import Order, OrderSide, OrderType
+from src.engine.orderbook import OrderBook
+from src.engine.price_ladder import PriceLadder
+from sortedcontainers import SortedDict
+
+
+def generate_flow(count: int, band: int, seed: int = 42):
+    """Build a list of (action, payload) events drifting around a mid price"""
+    rng = random.Random(seed)
+    mid = 5_000_000  # In ticks of 0.01
+    events = []
+    resting = []
+    for i in range(count):
+        mid += rng.choice([-1, 0, 1])
+        roll = rng.random()
+        if roll < 0.25 and resting:
+            events.append(("cancel", resting.pop(rng.randrange(len(resting)))))
+            continue
+        side = OrderSide.BUY if rng.random() < 0.5 else OrderSide.SELL
+        if roll < 0.30:
+            order_type, price = OrderType.MARKET, None
+        else:
+            offset = rng.randint(0, band)
+            tick = mid - offset if side == OrderSide.BUY else mid + offset
+            order_type, price = OrderType.LIMIT, tick / 100
+            resting.append(f"o{i}")
+        quantity = rng.randint(1, 50) / 1000
+        events.append(("new", Order(
+            order_id=f"o{i}",
+            symbol="BTC-USDT",
+            order_type=order_type,
+            side=side,
+            quantity=quantity,
+            price=price,
+            remaining_quantity=quantity
+        )))
+    return events
+
+
+def run(backend: str, events) -> float:
+    """Replay events against a fresh book and return events per second"""
+    instrument = Instrument(symbol="BTC-USDT", tick_size=Decimal("0.01"), lot_size=Decimal("0.001"))
+    book = OrderBook("BTC-USDT", instrument, backend)
+    start = time.perf_counter()
+    for action, payload in events:
+        if action == "new":
+            book.add_order(payload)
+        else:
+            book.cancel_order(payload)
+    elapsed = time.perf_counter() - start
+    return len(events) / elapsed
+
+
+def run_levels(backend: str, count: int, band: int, seed: int = 42) -> float:
+    """Exercise only the price level index: insert, best lookup, delete best"""
+    rng = random.Random(seed)
+    levels = PriceLadder() if backend == "ladder" else SortedDict()
+    mid = 5_000_000
+    start = time.perf_counter()
+    for _ in range(count):
+        mid += rng.choice([-1, 0, 1])
+        tick = mid + rng.randint(0, band)
+        levels[tick] = levels.get(tick, 0) + 1
+        best = levels.peekitem(0)[0]
+        if rng.random() < 0.3:
+            del levels[best]
+    elapsed = time.perf_counter() - start
+    return count / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--orders", type=int, default=100_000)
+    parser.add_argument("--band", type=int, default=200, help="Max distance from mid in ticks")
+    args = parser.parse_args()
+
+    for backend in ("sorted", "ladder"):
+        # Orders are mutated by the book, so each backend gets a fresh flow
+        events = generate_flow(args.orders, args.band)
+        rate = run(backend, events)
+        print(f"{backend:>8} book:   {rate:,.0f} events/sec")
+    for backend in ("sorted", "ladder"):
+        rate = run_levels(backend, args.orders, args.band)
+        print(f"{backend:>8} levels: {rate:,.0f} ops/sec")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Shared helpers for the benchmark suite: timing, percentiles and baselines."""
+import json
+import os
+import time
+from typing import Callable, Dict, List, Optional
+
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+def percentile(sorted_samples: List[int], pct: float) -> float:
+    """Nearest-rank percentile of already sorted samples"""
+    if not sorted_samples:
+        return 0.0
+    rank = max(0, min(len(sorted_samples) - 1, int(round(pct / 100 * len(sorted_samples))) - 1))
+    return sorted_samples[rank]
+
+
+def summarize(samples_ns: List[int]) -> Dict[str, float]:
+    """Latency percentiles in microseconds plus throughput for a list of per-op timings"""
+    ordered = sorted(samples_ns)
+    total = sum(ordered)
+    summary = {f"p{pct:g}_us": percentile(ordered, pct) / 1000 for pct in PERCENTILES}
+    summary["max_us"] = ordered[-1] / 1000 if ordered else 0.0
+    summary["ops"] = len(ordered)
+    summary["ops_per_sec"] = len(ordered) / (total / 1e9) if total else 0.0
+    return summary
+
+
+def time_each(operations: List[Callable[[], object]]) -> List[int]:
+    """Run each operation once and return its latency in nanoseconds"""
+    clock = time.perf_counter_ns
+    samples = []
+    for operation in operations:
+        start = clock()
+        operation()
+        samples.append(clock() - start)
+    return samples
+
+
+def load_baselines(path: str) -> Dict[str, Dict[str, float]]:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as handle:
+        return json.load(handle)
+
+
+def save_baselines(path: str, results: Dict[str, Dict[str, float]]) -> None:
+    with open(path, "w") as handle:
+        json.dump(results, handle, indent=2, sort_keys=True)
+        handle.write("\n")
+
+
+def regressions(
+    results: Dict[str, Dict[str, float]],
+    baselines: Dict[str, Dict[str, float]],
+    tolerance: float,
+    metric: str = "p50_us",
+) -> List[str]:
+    """Describe every case whose ``metric`` is more than ``tolerance`` slower than its baseline"""
+    found = []
+    for case, summary in results.items():
+        baseline: Optional[Dict[str, float]] = baselines.get(case)
+        if not baseline or not baseline.get(metric):
+            continue
+        ratio = summary[metric] / baseline[metric]
+        if ratio > 1 + tolerance:
+            found.append(f"{case}: {metric} {summary[metric]:.2f} vs baseline {baseline[metric]:.2f} ({ratio:.2f}x)")
+    return found
@@ -38,6 +38,27 @@ document.addEventListener('DOMContentLoaded', () => {
         });
     }
 
+    // Local copy of the book, built from a snapshot and kept current with l2update deltas
+    const book = { sequence: 0, bids: new Map(), asks: new Map() };
+
+    function applyLevels(levels, changes) {
+        changes.forEach(([price, quantity]) => {
+            if (quantity === 0) {
+                levels.delete(price);
+            } else {
+                levels.set(price, quantity);
+            }
+        });
+    }
+
+    function renderBook() {
+        const depth = 10;
+        const bids = [...book.bids.entries()].sort((a, b) => b[0] - a[0]).slice(0, depth);
+        const asks = [...book.asks.entries()].sort((a, b) => a[0] - b[0]).slice(0, depth);
+        renderOrders(buyList, bids);
+        renderOrders(sellList, asks);
+    }
+
     // WebSocket connection for market data and trades
     const symbol = "BTC-USDT";
     const ws = new WebSocket(`ws://localhost:8000/ws/orderbook/${symbol}`);
@@ -50,10 +71,19 @@ document.addEventListener('DOMContentLoaded', () => {
         const data = JSON.parse(event.data);
         console.log("WebSocket message received:", data);
 
-        if (data.bids && data.asks) {
-            // This is an order book update
-            renderOrders(buyList, data.bids);
-            renderOrders(sellList, data.asks);
+        if (data.type === 'snapshot') {
+            book.sequence = data.sequence;
+            book.bids = new Map(data.bids);
+            book.asks = new Map(data.asks);
+            renderBook();
+        } else if (data.type === 'l2update') {
+            if (data.sequence <= book.sequence) {
+                return; // Already included in the snapshot
+            }
+            applyLevels(book.bids, data.bids);
+            applyLevels(book.asks, data.asks);
+            book.sequence = data.sequence;
+            renderBook();
         } else if (data.trades) {
             // This is a trade execution update
             renderTrades(data.trades);
@@ -9,4 +9,7 @@ setup(
         "pydantic",         # Required for data validation
         "loguru",          # Required for logging
     ],
+    extras_require={
+        "columns": ["numpy"],  # Trade tape column export as NumPy arrays
+    },
 )
\ No newline at end of file
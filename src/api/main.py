@@ -1,15 +1,29 @@
-from fastapi import FastAPI, WebSocket, HTTPException, WebSocketDisconnect, Body
+from fastapi import FastAPI, WebSocket, HTTPException, WebSocketDisconnect, Body, Query
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List, Optional
-import json
+from typing import List, Literal, Optional
+import os
 import asyncio
-from datetime import datetime
+from decimal import Decimal
 import uuid
+from concurrent.futures import Future
+from contextlib import asynccontextmanager
+from functools import partial
 from pydantic import BaseModel
-from loguru import logger
 
-from ..engine.order import Order, OrderType, OrderSide
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+from ..engine.instrument import Instrument
+from ..engine.journal import open_book_journal
+from ..engine.order import Order, OrderAmend, OrderCancel, OrderType, OrderSide
 from ..engine.orderbook import OrderBook
+from ..engine.sequencer import BookSequencer
+from ..engine.sharding import ShardRouter
+from .publisher import SymbolPublisher
+from .session import OrderEntrySession
+from . import wire
 
 
 class OrderCreate(BaseModel):
@@ -18,9 +32,43 @@ class OrderCreate(BaseModel):
     order_type: OrderType
     quantity: float
     price: Optional[float] = None
+    stop_price: Optional[float] = None  # Trigger price, for stop and stop_limit orders
+    display_quantity: Optional[float] = None  # Visible size, for iceberg limit orders
+    owner: Optional[str] = None  # Account tag, for mass cancels
+
+
+class OrderAmendRequest(BaseModel):
+    quantity: Optional[float] = None  # New total quantity
+    price: Optional[float] = None
+
+
+class BatchOrderAction(BaseModel):
+    action: Literal["new", "cancel", "amend"] = "new"
+    side: Optional[OrderSide] = None
+    order_type: Optional[OrderType] = None
+    quantity: Optional[float] = None
+    price: Optional[float] = None
+    stop_price: Optional[float] = None
+    display_quantity: Optional[float] = None
+    order_id: Optional[str] = None  # Order to cancel or amend
+
+
+class BatchOrderCreate(BaseModel):
+    symbol: str
+    actions: List[BatchOrderAction]
+    owner: Optional[str] = None  # Account tag for every new order in the batch
 
 
-app = FastAPI(title="Crypto Matching Engine API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Drain queued commands and close journals (taking a final snapshot if enabled)
+    for sequencer in sequencers.values():
+        sequencer.stop(timeout=5)
+    if shard_router is not None:
+        shard_router.close(timeout=5)
+
+app = FastAPI(title="Crypto Matching Engine API", lifespan=lifespan)
 
 # Enable CORS
 app.add_middleware(
@@ -31,14 +79,96 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize order books for different trading pairs
-order_books = {
-    "BTC-USDT": OrderBook("BTC-USDT"),
-    "ETH-USDT": OrderBook("ETH-USDT"),
+# Tick and lot sizes for the listed trading pairs
+instruments = {
+    "BTC-USDT": Instrument(symbol="BTC-USDT", tick_size=Decimal("0.01"), lot_size=Decimal("0.00001")),
+    "ETH-USDT": Instrument(symbol="ETH-USDT", tick_size=Decimal("0.01"), lot_size=Decimal("0.0001")),
+}
+
+# Price level backend per trading pair; liquid pairs that trade in a tight band use the tick ladder
+book_backends = {
+    "BTC-USDT": "ladder",
+    "ETH-USDT": "sorted",
+}
+
+# Number of worker processes to shard the order books across; 0 keeps every book in this process
+shard_count = int(os.environ.get("MATCHING_ENGINE_SHARDS", "0"))
+
+# Write-ahead journal directory (unset disables journaling) and its durability: none, batch or sync
+journal_dir = os.environ.get("MATCHING_ENGINE_JOURNAL_DIR")
+journal_durability = os.environ.get("MATCHING_ENGINE_DURABILITY", "batch")
+# Journaled commands between book snapshots (0 disables snapshots)
+snapshot_interval = int(os.environ.get("MATCHING_ENGINE_SNAPSHOT_INTERVAL", "0")) if journal_dir else 0
+
+# Hot-path counters and latency histograms, exposed on /metrics (off unless set to 1)
+metrics_enabled = os.environ.get("MATCHING_ENGINE_METRICS", "0") == "1"
+
+# CPU pinning for the sequencer threads of heavy symbols, e.g. {"BTC-USDT": {2}}
+sequencer_affinity = {}
+
+def submit_to_book(symbol: str, method: str, *args) -> Future:
+    """Queue an OrderBook operation on the symbol's single writer"""
+    if shard_router is not None:
+        return shard_router.submit(symbol, method, *args)
+    return sequencers[symbol].submit(method, *args)
+
+async def run_on_book(symbol: str, method: str, *args):
+    """Run an OrderBook operation on the symbol's single writer and await the result"""
+    return await asyncio.wrap_future(submit_to_book(symbol, method, *args))
+
+def _publish_book_changes(symbol: str, book: OrderBook):
+    # Runs on the sequencer thread after each batch of commands
+    publishers[symbol].publish_book_threadsafe(book.drain_level_changes())
+
+# Market data publisher per symbol, fanning out deltas and trades to WebSocket subscribers
+publishers = {
+    # Full depth, since the l2update deltas that follow a snapshot cover every level
+    symbol: SymbolPublisher(symbol, partial(run_on_book, symbol, "get_order_book_snapshot", None))
+    for symbol in instruments
 }
 
-# WebSocket connections per symbol
-websocket_connections = {}
+if shard_count > 0:
+    # Sharded mode: books live in worker processes and their deltas are merged back here
+    order_books = {}
+    sequencers = {}
+    shard_router = ShardRouter(
+        [(symbol, instrument, book_backends[symbol]) for symbol, instrument in instruments.items()],
+        shard_count,
+        on_book_update=lambda symbol, update: publishers[symbol].publish_book_threadsafe(update),
+        journal_dir=journal_dir,
+        durability=journal_durability,
+        snapshot_interval=snapshot_interval,
+    )
+else:
+    shard_router = None
+
+    # Initialize order books for different trading pairs, matching in fixed-point ticks and lots
+    order_books = {
+        symbol: OrderBook(symbol, instrument, book_backends[symbol])
+        for symbol, instrument in instruments.items()
+    }
+
+    # Single writer per order book: all book operations are queued to its sequencer thread,
+    # after the book has been recovered from its journal
+    sequencers = {
+        symbol: BookSequencer(
+            book,
+            on_batch=partial(_publish_book_changes, symbol),
+            cpu_affinity=sequencer_affinity.get(symbol),
+            journal=open_book_journal(journal_dir, book, journal_durability) if journal_dir else None,
+            snapshot_interval=snapshot_interval,
+        ).start()
+        for symbol, book in order_books.items()
+    }
+
+if metrics_enabled:
+    for symbol in instruments:
+        publishers[symbol].enable_metrics()
+        # Queued ahead of any order, on whichever thread or process owns the book
+        if shard_router is not None:
+            shard_router.submit(symbol, "enable_metrics")
+        else:
+            sequencers[symbol].submit("enable_metrics")
 
 class ConnectionManager:
     def __init__(self):
@@ -60,28 +190,6 @@ class ConnectionManager:
 
 manager = ConnectionManager()
 
-async def broadcast_orderbook_updates(symbol: str):
-    """Broadcast order book updates to all connected clients"""
-    if symbol not in websocket_connections or not websocket_connections[symbol]:
-        return
-    
-    orderbook = order_books[symbol]
-    snapshot = orderbook.get_order_book_snapshot()
-    
-    logger.info(f"Sending snapshot: {snapshot}")
-    
-    # Create a copy of the list to avoid modification during iteration
-    connections = websocket_connections[symbol].copy()
-    for websocket in connections:
-        try:
-            await websocket.send_json(snapshot)
-        except Exception as e:
-            try:
-                websocket_connections[symbol].remove(websocket)
-                await websocket.close()
-            except:
-                pass  # Connection might already be closed
-
 @app.post("/api/v1/orders")
 async def create_order(
     order_data: OrderCreate = Body(...)
@@ -93,11 +201,13 @@ async def create_order(
     quantity = order_data.quantity
     price = order_data.price
 
-    if symbol not in order_books:
+    if symbol not in instruments:
         raise HTTPException(status_code=404, detail="Trading pair not found")
     
-    if order_type == OrderType.LIMIT and price is None:
+    if order_type in (OrderType.LIMIT, OrderType.STOP_LIMIT) and price is None:
         raise HTTPException(status_code=400, detail="Price is required for limit orders")
+    if (order_type in (OrderType.STOP, OrderType.STOP_LIMIT)) != (order_data.stop_price is not None):
+        raise HTTPException(status_code=400, detail="Stop price is required for stop orders, and only for them")
     
     order = Order(
         order_id=str(uuid.uuid4()),
@@ -106,77 +216,251 @@ async def create_order(
         order_type=order_type,
         quantity=quantity,
         price=price,
-        remaining_quantity=quantity
+        stop_price=order_data.stop_price,
+        display_quantity=order_data.display_quantity,
+        remaining_quantity=quantity,
+        owner=order_data.owner
     )
     
-    trades = order_books[symbol].add_order(order)
+    try:
+        # add_orders returns the updated order, which also works across shard processes
+        result = (await run_on_book(symbol, "add_orders", [order]))[0]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    order, trades = result["order"], result["trades"]
     
-    # Broadcast order book updates
-    await broadcast_orderbook_updates(symbol)
-
-    # Broadcast trade updates
-    if trades:
-        # Create a copy of the list to avoid modification during iteration
-        connections = websocket_connections[symbol].copy()
-        for websocket in connections:
-            try:
-                await websocket.send_json({"trades": trades})
-            except Exception as e:
-                try:
-                    websocket_connections[symbol].remove(websocket)
-                    await websocket.close()
-                except:
-                    pass  # Connection might already be closed
+    # Book deltas are published by the sequencer; trades are handed over here
+    publishers[symbol].publish_trades(trades)
 
     return {
         "order": order,
         "trades": trades
     }
 
+@app.post("/api/v1/orders/batch")
+async def create_orders_batch(
+    batch: BatchOrderCreate = Body(...)
+):
+    """Submit many new orders, cancels and amends for one symbol in a single round trip"""
+    symbol = batch.symbol
+    if symbol not in instruments:
+        raise HTTPException(status_code=404, detail="Trading pair not found")
+
+    requests = []
+    for index, action in enumerate(batch.actions):
+        if action.action == "cancel":
+            if action.order_id is None:
+                raise HTTPException(status_code=400, detail=f"Action {index}: order_id is required for cancels")
+            requests.append(OrderCancel(order_id=action.order_id))
+            continue
+        if action.action == "amend":
+            if action.order_id is None:
+                raise HTTPException(status_code=400, detail=f"Action {index}: order_id is required for amends")
+            requests.append(OrderAmend(order_id=action.order_id, quantity=action.quantity, price=action.price))
+            continue
+
+        if action.side is None or action.order_type is None or action.quantity is None:
+            raise HTTPException(status_code=400, detail=f"Action {index}: side, order_type and quantity are required")
+        if action.order_type in (OrderType.LIMIT, OrderType.STOP_LIMIT) and action.price is None:
+            raise HTTPException(status_code=400, detail=f"Action {index}: price is required for limit orders")
+        try:
+            requests.append(Order(
+                order_id=str(uuid.uuid4()),
+                symbol=symbol,
+                side=action.side,
+                order_type=action.order_type,
+                quantity=action.quantity,
+                price=action.price,
+                stop_price=action.stop_price,
+                display_quantity=action.display_quantity,
+                remaining_quantity=action.quantity,
+                owner=batch.owner
+            ))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Action {index}: {e}")
+
+    try:
+        results = await run_on_book(symbol, "add_orders", requests)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # One trade message for the whole batch; the sequencer coalesces the book update
+    publishers[symbol].publish_trades([trade for result in results for trade in result.get("trades", [])])
+
+    return {"results": results}
+
+@app.get("/api/v1/orders/{symbol}/{order_id}")
+async def get_order_status(symbol: str, order_id: str):
+    """Look up a resting or recently completed order"""
+    if symbol not in instruments:
+        raise HTTPException(status_code=404, detail="Trading pair not found")
+    order = await run_on_book(symbol, "get_order", order_id)
+    if order is None:
+        raise HTTPException(status_code=404, detail="Order not found")
+    return order
+
+@app.patch("/api/v1/orders/{symbol}/{order_id}")
+async def amend_order(symbol: str, order_id: str, amend: OrderAmendRequest = Body(...)):
+    """Change a resting order's price and/or total quantity.
+
+    A size decrease at the same price keeps the order's queue priority.
+    """
+    if symbol not in instruments:
+        raise HTTPException(status_code=404, detail="Trading pair not found")
+    try:
+        result = await run_on_book(symbol, "amend_order", order_id, amend.quantity, amend.price)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not result["amended"]:
+        raise HTTPException(status_code=404 if result["reason"] == "Order is not resting" else 400, detail=result["reason"])
+
+    publishers[symbol].publish_trades(result["trades"])
+    return result
+
+@app.delete("/api/v1/orders/{symbol}")
+async def mass_cancel(
+    symbol: str,
+    owner: Optional[str] = None,
+    side: Optional[OrderSide] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    cancel_all: bool = Query(False, alias="all")
+):
+    """Cancel every resting order of an owner, a side and/or a price range in one command.
+
+    Omitted filters match everything; at least one filter is required, or
+    ``all=true`` to clear the whole book.
+    """
+    if symbol not in instruments:
+        raise HTTPException(status_code=404, detail="Trading pair not found")
+    if not cancel_all and owner is None and side is None and min_price is None and max_price is None:
+        raise HTTPException(status_code=400, detail="Give at least one filter, or all=true to cancel every order")
+    try:
+        cancelled = await run_on_book(symbol, "mass_cancel", owner, side, min_price, max_price)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"symbol": symbol, "cancelled": len(cancelled), "order_ids": cancelled}
+
+@app.get("/api/v1/trades/{symbol}")
+async def get_trades(symbol: str, since: int = 0, limit: int = 100):
+    """Recent trades from the book's trade tape with an id greater than ``since``"""
+    if symbol not in instruments:
+        raise HTTPException(status_code=404, detail="Trading pair not found")
+    if not 0 < limit <= 1000:
+        raise HTTPException(status_code=400, detail="Limit must be between 1 and 1000")
+    return {"symbol": symbol, "trades": await run_on_book(symbol, "get_trades", since, limit)}
+
+@app.get("/api/v1/l3/{symbol}")
+async def get_l3_orders(
+    symbol: str,
+    side: OrderSide,
+    cursor: Optional[str] = None,
+    limit: int = 1000,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None
+):
+    """One page of individual resting orders on a side, in priority order.
+
+    Each page is a separate short command on the book's writer, so paging
+    through a very large book interleaves with matching instead of stalling it.
+    """
+    if symbol not in instruments:
+        raise HTTPException(status_code=404, detail="Trading pair not found")
+    if not 0 < limit <= 5000:
+        raise HTTPException(status_code=400, detail="Limit must be between 1 and 5000")
+    try:
+        return await run_on_book(symbol, "get_orders", side, cursor, limit, min_price, max_price)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/api/v1/quote/{symbol}")
+async def quote_sweep(symbol: str, side: OrderSide, quantity: float, price: Optional[float] = None):
+    """Estimate the fill and cost of a taker order without executing it"""
+    if symbol not in instruments:
+        raise HTTPException(status_code=404, detail="Trading pair not found")
+    try:
+        return await run_on_book(symbol, "quote_sweep", side, quantity, price)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/api/v1/memory")
+async def get_memory_stats():
+    """Order storage footprint per book, plus the process peak RSS where available"""
+    books = [await run_on_book(symbol, "memory_stats") for symbol in instruments]
+    stats = {"books": books}
+    if resource is not None:
+        stats["max_rss_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return stats
+
+@app.get("/metrics")
+async def get_metrics():
+    """Per-book counters, latency histograms and queue depths, plus publisher fan-out stats"""
+    books = {}
+    for symbol in instruments:
+        stats = await run_on_book(symbol, "get_metrics") or {}
+        if symbol in sequencers:
+            stats["sequencer_queue_depth"] = sequencers[symbol].queue_depth
+            stats["sequencer_commands"] = sequencers[symbol].commands_processed
+        books[symbol] = stats
+    return {
+        "enabled": metrics_enabled,
+        "books": books,
+        "publishers": {symbol: publisher.stats() for symbol, publisher in publishers.items()}
+    }
+
 @app.websocket("/ws/orderbook/{symbol}")
 async def orderbook_feed(websocket: WebSocket, symbol: str):
-    """WebSocket endpoint for order book updates"""
-    if symbol not in order_books:
+    """WebSocket endpoint for order book updates
+
+    Sends one full-depth snapshot on subscribe followed by sequenced ``l2update``
+    deltas carrying only the price levels that changed. Clients offering
+    the ``wire.BINARY_SUBPROTOCOL`` subprotocol get binary frames instead
+    of JSON text.
+    """
+    if symbol not in instruments:
         await websocket.close(code=1000, reason="Invalid trading pair")
         return
     
-    await websocket.accept()
-    
-    # Initialize the connection list for this symbol if it doesn't exist
-    if symbol not in websocket_connections:
-        websocket_connections[symbol] = []
-    websocket_connections[symbol].append(websocket)
-    
+    binary = wire.BINARY_SUBPROTOCOL in websocket.scope.get("subprotocols", ())
+    await websocket.accept(subprotocol=wire.BINARY_SUBPROTOCOL if binary else None)
+    subscriber = await publishers[symbol].subscribe(websocket, binary)
+
     try:
-        # Send initial snapshot
-        snapshot = order_books[symbol].get_order_book_snapshot()
-        await websocket.send_json(snapshot)
-        
-        # Wait for client disconnect
-        while True:
-            try:
-                # Use a small timeout to allow checking for client disconnect
-                data = await asyncio.wait_for(websocket.receive_text(), timeout=1.0)
-            except asyncio.TimeoutError:
-                # This is expected - continue waiting
-                pass
-            except Exception:
-                # Client disconnected or other error
+        # The publisher writes to the socket; here we only wait for the client to go away
+        while not subscriber.closed:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
                 break
-            await asyncio.sleep(1)  # Update frequency
-    except:
-        websocket_connections.remove(websocket)
-        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        publishers[symbol].unsubscribe(subscriber)
+
+@app.websocket("/ws/orders")
+async def order_entry(websocket: WebSocket):
+    """Order-entry session: pipelined new, cancel and replace requests by client order id.
+
+    Speaks JSON, or the binary ``wire`` messages when the client offers
+    ``wire.BINARY_SUBPROTOCOL``.
+    """
+    binary = wire.BINARY_SUBPROTOCOL in websocket.scope.get("subprotocols", ())
+    await websocket.accept(subprotocol=wire.BINARY_SUBPROTOCOL if binary else None)
+    session = OrderEntrySession(
+        websocket,
+        submit_to_book,
+        lambda symbol, trades: publishers[symbol].publish_trades(trades),
+        instruments,
+        binary,
+    )
+    await session.run()
 
 @app.get("/order_book/{symbol}")
 async def get_order_book(symbol: str):
-    if symbol not in order_books:
+    """Every price level of the book with its aggregate quantity"""
+    if symbol not in instruments:
         raise HTTPException(status_code=404, detail="Order book not found for this symbol")
-    order_book = order_books[symbol]
-    return {
-        "buy_orders": order_book.buy_orders.get_all_orders(),
-        "sell_orders": order_book.sell_orders.get_all_orders()
-    }
+    # One book call, so bids and asks come from the same book state
+    return {"symbol": symbol, **await run_on_book(symbol, "get_all_levels")}
 
 @app.get("/")
 def root():
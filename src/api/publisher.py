@@ -0,0 +1,297 @@
+import asyncio
+import json
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple, Union
+from fastapi import WebSocket
+from loguru import logger
+from ..engine.metrics import LatencyHistogram
+from . import wire
+
+
+def _json_default(value):
+    """Serialize values the json module does not handle natively"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if hasattr(value, "to_dict"):  # Engine records such as Trade
+        return value.to_dict()
+    if hasattr(value, "model_dump"):  # Pydantic models such as Order
+        return value.model_dump()
+    if hasattr(value, "value"):  # Enums
+        return value.value
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def encode_message(message: dict) -> str:
+    """Encode a market data message to JSON text"""
+    return json.dumps(message, default=_json_default)
+
+
+def encode_book(message: dict, binary: bool) -> Union[str, bytes]:
+    """Encode a snapshot or l2update in a subscriber's negotiated protocol"""
+    return wire.encode_book(message) if binary else encode_message(message)
+
+
+class Subscriber:
+    """A WebSocket client with a bounded queue of encoded messages"""
+
+    def __init__(self, websocket: WebSocket, max_queue: int, binary: bool = False):
+        self.websocket = websocket
+        self.binary = binary  # Negotiated wire.BINARY_SUBPROTOCOL instead of JSON
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.sequence: Optional[int] = None  # Book sequence already reflected in what was queued, once snapshotted
+        self.backlog: List[Tuple[Optional[int], Union[str, bytes]]] = []  # Published while the snapshot was taken
+        self.sender: Optional[asyncio.Task] = None
+        self.closed = False
+
+    async def send_loop(self) -> None:
+        """Forward queued messages to the socket until it fails or is cancelled"""
+        send = self.websocket.send_bytes if self.binary else self.websocket.send_text
+        try:
+            while True:
+                await send(await self.queue.get())
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.closed = True
+
+
+class SymbolPublisher:
+    """Fans out book deltas and trades for one symbol to its subscribers.
+
+    Order handlers only hand updates to the publisher and return; a single
+    publisher task encodes each message once per protocol in use (JSON text
+    or ``wire`` binary) and pushes it onto every subscriber's bounded queue,
+    while a per-subscriber task writes to the socket. Book updates that arrive before the publisher runs are conflated
+    to the latest quantity per price level. A subscriber whose queue is full
+    is handled by ``overflow_policy``: ``"resync"`` discards its backlog and
+    queues a fresh snapshot, ``"disconnect"`` closes it.
+    """
+
+    def __init__(
+        self,
+        symbol: str,
+        snapshot: Callable[[], Awaitable[dict]],
+        max_queue: int = 256,
+        overflow_policy: str = "resync",
+    ):
+        if overflow_policy not in ("resync", "disconnect"):
+            raise ValueError(f"Unknown overflow policy: {overflow_policy}")
+        self.symbol = symbol
+        self.max_queue = max_queue
+        self.overflow_policy = overflow_policy
+        self._snapshot = snapshot
+        self.subscribers: List[Subscriber] = []
+
+        # Pending state, conflated until the publisher task runs
+        self._bids: Dict[float, float] = {}
+        self._asks: Dict[float, float] = {}
+        self._start_sequence: Optional[int] = None
+        self._sequence = 0
+        self._trades: List[dict] = []
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+        self.messages_published = 0
+        self.resyncs = 0
+        self.disconnects = 0
+        self.fanout_latency: Optional[LatencyHistogram] = None  # Set by enable_metrics()
+
+    def publish_book(self, update: Optional[dict]) -> None:
+        """Queue an l2update, merging it with any not yet published"""
+        if update is None or not self.subscribers:
+            return
+        if self._start_sequence is None:
+            self._start_sequence = update["start_sequence"]
+        self._sequence = update["sequence"]
+        for price, quantity in update["bids"]:
+            self._bids[price] = quantity
+        for price, quantity in update["asks"]:
+            self._asks[price] = quantity
+        self._wake()
+
+    def publish_book_threadsafe(self, update: Optional[dict]) -> None:
+        """Hand over an l2update from another thread, such as a book sequencer"""
+        loop = self._loop
+        if update is None or loop is None:
+            return
+        try:
+            loop.call_soon_threadsafe(self.publish_book, update)
+        except RuntimeError:
+            pass  # The publisher's event loop has already shut down
+
+    def publish_trades(self, trades: List[dict]) -> None:
+        """Queue executed trades for broadcast"""
+        if not trades or not self.subscribers:
+            return
+        self._trades.extend(trades)
+        self._wake()
+
+    async def subscribe(self, websocket: WebSocket, binary: bool = False) -> Subscriber:
+        """Register an accepted socket and queue its initial snapshot.
+
+        The subscriber is registered before the snapshot is requested, so
+        deltas sequenced while it is taken are held back and queued after
+        it instead of being lost.
+        """
+        self._ensure_task()
+        subscriber = Subscriber(websocket, self.max_queue, binary)
+        self.subscribers.append(subscriber)
+        try:
+            snapshot = await self._snapshot()
+        except BaseException:
+            self.unsubscribe(subscriber)
+            raise
+        subscriber.sequence = snapshot["sequence"]
+        subscriber.queue.put_nowait(encode_book(snapshot, binary))
+        for sequence, message in subscriber.backlog:
+            if sequence is None:  # Trades
+                subscriber.queue.put_nowait(message)
+            elif sequence > subscriber.sequence:
+                subscriber.queue.put_nowait(message)
+                subscriber.sequence = sequence
+        subscriber.backlog = []
+        subscriber.sender = asyncio.create_task(subscriber.send_loop())
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        """Remove a subscriber and stop its sender"""
+        if subscriber in self.subscribers:
+            self.subscribers.remove(subscriber)
+        if subscriber.sender is not None:
+            subscriber.sender.cancel()
+
+    def _wake(self) -> None:
+        """Wake the publisher task, from its own loop or any other thread"""
+        if self._wakeup is None:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._wakeup.set()
+        else:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def _ensure_task(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._task is not None and not self._task.done() and self._loop is loop:
+            return
+        self._loop = loop
+        self._wakeup = asyncio.Event()
+        self._task = loop.create_task(self._run())
+
+    async def _run(self) -> None:
+        """Publisher loop: drain pending state, encode once, fan out"""
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            try:
+                await self._publish_pending()
+            except Exception as e:
+                logger.error(f"Publisher for {self.symbol} failed to publish: {e}")
+
+    def enable_metrics(self) -> None:
+        """Start timing each encode-and-enqueue pass over the subscribers"""
+        if self.fanout_latency is None:
+            self.fanout_latency = LatencyHistogram()
+
+    def stats(self) -> dict:
+        """Counters, subscriber queue depths and fan-out latency if enabled"""
+        depths = [subscriber.queue.qsize() for subscriber in self.subscribers]
+        return {
+            "subscribers": len(self.subscribers),
+            "messages_published": self.messages_published,
+            "resyncs": self.resyncs,
+            "disconnects": self.disconnects,
+            "max_queue_depth": max(depths, default=0),
+            "queued_messages": sum(depths),
+            "fanout_latency": None if self.fanout_latency is None else self.fanout_latency.summary()
+        }
+
+    async def _publish_pending(self) -> None:
+        histogram = self.fanout_latency
+        start = time.perf_counter_ns() if histogram is not None else 0
+        # Encode each message once for every protocol some subscriber speaks
+        encodings = {subscriber.binary for subscriber in self.subscribers}
+        book_text = book_bytes = None
+        sequence = self._sequence
+        has_book, has_trades = self._start_sequence is not None, bool(self._trades)
+        if has_book:
+            update = {
+                "type": "l2update",
+                "symbol": self.symbol,
+                "start_sequence": self._start_sequence,
+                "sequence": sequence,
+                "bids": [[price, quantity] for price, quantity in self._bids.items()],
+                "asks": [[price, quantity] for price, quantity in self._asks.items()]
+            }
+            if False in encodings:
+                book_text = encode_message(update)
+            if True in encodings:
+                book_bytes = wire.encode_book(update)
+            self._bids = {}
+            self._asks = {}
+            self._start_sequence = None
+
+        trades_text = trades_bytes = None
+        if has_trades:
+            if False in encodings:
+                trades_text = encode_message({"type": "trades", "symbol": self.symbol, "trades": self._trades})
+            if True in encodings:
+                trades_bytes = wire.encode_trades(self.symbol, self._trades)
+            self._trades = []
+
+        lagging = []
+        for subscriber in list(self.subscribers):
+            if subscriber.closed:
+                self.unsubscribe(subscriber)
+                continue
+            book, trades = (book_bytes, trades_bytes) if subscriber.binary else (book_text, trades_text)
+            if subscriber.sequence is None:  # Its snapshot is still being taken
+                if book is not None:
+                    subscriber.backlog.append((sequence, book))
+                if trades is not None:
+                    subscriber.backlog.append((None, trades))
+                continue
+            try:
+                if book is not None and sequence > subscriber.sequence:
+                    subscriber.queue.put_nowait(book)
+                    subscriber.sequence = sequence
+                if trades is not None:
+                    subscriber.queue.put_nowait(trades)
+            except asyncio.QueueFull:
+                lagging.append(subscriber)
+        self.messages_published += has_book + has_trades
+        if histogram is not None:
+            histogram.record(time.perf_counter_ns() - start)
+
+        if lagging:
+            await self._handle_lagging(lagging)
+
+    async def _handle_lagging(self, lagging: List[Subscriber]) -> None:
+        """Apply the overflow policy to subscribers that cannot keep up"""
+        if self.overflow_policy == "disconnect":
+            for subscriber in lagging:
+                self.disconnects += 1
+                self.unsubscribe(subscriber)
+                try:
+                    await subscriber.websocket.close(code=1013, reason="Subscriber too slow")
+                except Exception:
+                    pass  # Connection might already be closed
+            return
+
+        # One snapshot, encoded once per protocol, replaces the backlog of every lagging subscriber
+        snapshot = await self._snapshot()
+        encoded = {}
+        for subscriber in lagging:
+            self.resyncs += 1
+            while not subscriber.queue.empty():
+                subscriber.queue.get_nowait()
+            if subscriber.binary not in encoded:
+                encoded[subscriber.binary] = encode_book(snapshot, subscriber.binary)
+            subscriber.queue.put_nowait(encoded[subscriber.binary])
+            subscriber.sequence = snapshot["sequence"]
@@ -0,0 +1,278 @@
+import asyncio
+import json
+import uuid
+from collections import defaultdict
+from concurrent.futures import Future
+from datetime import datetime
+from functools import partial
+from typing import Callable, Collection, Dict, List, Optional, Set, Tuple, Union
+from fastapi import WebSocket, WebSocketDisconnect
+from loguru import logger
+from ..engine.order import Order, OrderStatus, OrderType
+from .publisher import encode_message
+from . import wire
+
+# (client order id, future of the book command or None if rejected up front, completion or reject reason)
+_Pending = Tuple[str, Optional[Future], Union[Callable, str]]
+
+_PRUNE_THRESHOLD = 1024  # Cached orders before the session first asks its books which are still live
+
+
+def _is_live(order: Order) -> bool:
+    """Whether an acknowledged order is resting on the book or waiting for its stop trigger"""
+    if order.order_type == OrderType.STOP:
+        return order.status == OrderStatus.NEW
+    return order.order_type in (OrderType.LIMIT, OrderType.STOP_LIMIT) and \
+        order.status in (OrderStatus.NEW, OrderStatus.PARTIAL)
+
+
+class OrderEntrySession:
+    """One order-entry WebSocket connection.
+
+    Each request is handed to its book's single writer as soon as it is
+    read, without waiting for earlier requests to complete, so clients can
+    pipeline orders; a separate task writes the acknowledgements back in
+    request order as results arrive. Orders are addressed by client order
+    ids, which must be unique among the session's live orders.
+
+    JSON requests are objects with a ``type`` of ``new`` (``client_order_id``,
+    ``symbol``, ``side``, ``order_type``, ``quantity``, ``price``, for stop
+    orders ``stop_price`` and for iceberg orders ``display_quantity``),
+    ``cancel`` (``client_order_id``) or ``replace`` (``client_order_id``,
+    ``new_client_order_id`` and a new ``quantity`` and/or ``price``, applied
+    with ``OrderBook.amend_order``); replies are ``ack`` (``order`` and
+    ``trades``) or ``reject`` (``reason``). Binary sessions use the ``wire``
+    order-entry messages instead.
+
+    Orders that fill passively are only seen by the book, so the cached
+    order states are checked against it when a client order id is reused
+    and whenever the cache doubles in size.
+
+    Every order is tagged with the session's ``owner``. With
+    ``cancel_on_disconnect`` (the default) the session's resting orders are
+    mass cancelled on every book it traded on when the connection drops.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        submit: Callable[..., Future],
+        on_trades: Callable[[str, List], None],
+        symbols: Collection[str],
+        binary: bool = False,
+        max_pending: int = 1024,
+        owner: Optional[str] = None,
+        cancel_on_disconnect: bool = True,
+    ):
+        self.websocket = websocket
+        self.binary = binary
+        self.symbols = symbols
+        self.owner = owner or f"session-{uuid.uuid4()}"
+        self.cancel_on_disconnect = cancel_on_disconnect
+        self.traded_symbols: Set[str] = set()  # Books this session has sent orders to
+        self.orders: Dict[str, Order] = {}  # Client order id -> last known state, while live
+        self._replacing: Dict[str, str] = {}  # New client order id -> the id it replaces, while in flight
+        self._prune_at = _PRUNE_THRESHOLD
+        self._submit = submit
+        self._on_trades = on_trades
+        self._pending: asyncio.Queue = asyncio.Queue(maxsize=max_pending)  # Bounds unacknowledged requests
+
+    async def run(self) -> None:
+        """Serve requests until the client disconnects"""
+        writer = asyncio.create_task(self._write_replies())
+        try:
+            while True:
+                message = await self.websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                await self._pending.put(await self._read(message))
+                if len(self.orders) >= self._prune_at:
+                    await self._prune()
+        except WebSocketDisconnect:
+            pass
+        finally:
+            writer.cancel()
+            if self.cancel_on_disconnect:
+                self._cancel_all()
+
+    def _cancel_all(self) -> List[Future]:
+        """Pull every resting order of this session, one mass cancel per book"""
+        # Queued behind the session's pending requests, so orders still in flight are covered too
+        return [self._submit(symbol, "mass_cancel", self.owner) for symbol in self.traded_symbols]
+
+    async def _prune(self) -> None:
+        """Forget cached orders their book no longer holds, such as ones filled passively"""
+        by_symbol = defaultdict(dict)  # symbol -> order id -> client order id
+        for client_order_id, order in self.orders.items():
+            if client_order_id not in self._replacing:
+                by_symbol[order.symbol][order.order_id] = client_order_id
+        for symbol, order_ids in by_symbol.items():
+            # Queued behind this session's earlier requests, so orders still in flight are settled first
+            live = set(await asyncio.wrap_future(self._submit(symbol, "live_orders", list(order_ids))))
+            for order_id, client_order_id in order_ids.items():
+                order = self.orders.get(client_order_id)
+                if order_id not in live and order is not None and order.order_id == order_id:
+                    del self.orders[client_order_id]
+        self._prune_at = max(_PRUNE_THRESHOLD, 2 * len(self.orders))
+
+    async def _read(self, message: dict) -> _Pending:
+        """Parse one request and submit it; malformed requests become rejects"""
+        client_order_id = ""
+        try:
+            if self.binary:
+                data = message.get("bytes") or b""
+                kind = wire.message_type(data)
+                if kind == wire.MSG_NEW_ORDER:
+                    client_order_id, order = wire.decode_new_order(data, str(uuid.uuid4()), datetime.utcnow())
+                    return await self._new(client_order_id, order)
+                if kind == wire.MSG_CANCEL:
+                    _, client_order_id = wire.decode_cancel(data)
+                    return self._cancel(client_order_id)
+                if kind == wire.MSG_REPLACE:
+                    _, original, client_order_id, quantity, price = wire.decode_replace(data)
+                    return await self._replace(original, client_order_id, quantity, price)
+                raise ValueError(f"Unknown message type {kind}")
+
+            request = json.loads(message.get("text") or "")
+            kind = request.get("type")
+            client_order_id = str(request.get("client_order_id", ""))
+            if kind == "new":
+                return await self._new(client_order_id, Order(
+                    order_id=str(uuid.uuid4()),
+                    symbol=request["symbol"],
+                    side=request["side"],
+                    order_type=request["order_type"],
+                    quantity=request["quantity"],
+                    price=request.get("price"),
+                    stop_price=request.get("stop_price"),
+                    display_quantity=request.get("display_quantity"),
+                    remaining_quantity=request["quantity"]
+                ))
+            if kind == "cancel":
+                return self._cancel(client_order_id)
+            if kind == "replace":
+                original, client_order_id = client_order_id, str(request.get("new_client_order_id", ""))
+                return await self._replace(original, client_order_id, request.get("quantity"), request.get("price"))
+            raise ValueError(f"Unknown request type {kind}")
+        except (KeyError, TypeError, ValueError) as e:
+            reason = f"Missing field {e}" if isinstance(e, KeyError) else str(e)
+            return client_order_id, None, reason
+
+    async def _check_new_id(self, client_order_id: str) -> None:
+        if not client_order_id:
+            raise ValueError("client_order_id is required")
+        order = self.orders.get(client_order_id)
+        if order is None or not _is_live(order):
+            return
+        # The cached state misses passive fills (and is a stale copy in sharded mode), so ask the book
+        if client_order_id in self._replacing or \
+                await asyncio.wrap_future(self._submit(order.symbol, "live_orders", [order.order_id])):
+            raise ValueError(f"Duplicate client order id {client_order_id}")
+        if self.orders.get(client_order_id) is order:
+            del self.orders[client_order_id]
+
+    async def _new(self, client_order_id: str, order: Order) -> _Pending:
+        await self._check_new_id(client_order_id)
+        if order.symbol not in self.symbols:
+            raise ValueError("Trading pair not found")
+        if order.order_type in (OrderType.LIMIT, OrderType.STOP_LIMIT) and order.price is None:
+            raise ValueError("Price is required for limit orders")
+        order.owner = self.owner
+        self.orders[client_order_id] = order
+        self.traded_symbols.add(order.symbol)
+        # add_orders returns the updated order, which also works across shard processes
+        future = self._submit(order.symbol, "add_orders", [order])
+        return client_order_id, future, lambda results: self._accepted(client_order_id, results[0])
+
+    def _cancel(self, client_order_id: str) -> _Pending:
+        order = self.orders.get(client_order_id)
+        if order is None:
+            raise ValueError(f"Unknown client order id {client_order_id}")
+        future = self._submit(order.symbol, "cancel_order", order.order_id)
+        return client_order_id, future, partial(self._cancelled, client_order_id)
+
+    async def _replace(
+        self, original: str, client_order_id: str, quantity: Optional[float], price: Optional[float]
+    ) -> _Pending:
+        if original not in self.orders:
+            raise ValueError(f"Unknown client order id {original}")
+        await self._check_new_id(client_order_id)
+        order = self.orders.get(original)
+        if order is None:
+            raise ValueError(f"Unknown client order id {original}")
+        # The original id is retired as soon as the replace is read, so a pipelined
+        # cancel on it cannot reach the order the amend is about to change
+        del self.orders[original]
+        self.orders[client_order_id] = order
+        self._replacing[client_order_id] = original
+        # An amend: the order keeps its place in the queue when only its size goes down
+        future = self._submit(order.symbol, "amend_order", order.order_id, quantity, price)
+        return client_order_id, future, partial(self._replaced, original, client_order_id)
+
+    def _accepted(self, client_order_id: str, result: dict, replaces: Optional[str] = None):
+        order, trades = result["order"], result["trades"]
+        self._on_trades(order.symbol, trades)
+        if _is_live(order):
+            self.orders[client_order_id] = order  # A copy in sharded mode, so keep the latest
+        else:
+            self.orders.pop(client_order_id, None)
+        if self.binary:
+            return wire.encode_ack(client_order_id, order, trades)
+        reply = {"type": "ack", "client_order_id": client_order_id, "order": order, "trades": trades}
+        if replaces is not None:
+            reply["replaces"] = replaces
+        return encode_message(reply)
+
+    def _cancelled(self, client_order_id: str, cancelled: bool):
+        order = self.orders.pop(client_order_id, None)
+        if not cancelled or order is None:
+            raise ValueError("Order is not resting")
+        order.status = OrderStatus.CANCELLED
+        if self.binary:
+            return wire.encode_ack(client_order_id, order, [])
+        return encode_message({"type": "ack", "client_order_id": client_order_id, "order": order, "trades": []})
+
+    def _replaced(self, original: str, client_order_id: str, result: dict):
+        if not result["amended"]:
+            self._refused(client_order_id, restore=result["reason"] != "Order is not resting")
+            raise ValueError(result["reason"])
+        self._replacing.pop(client_order_id, None)
+        order = self.orders.pop(client_order_id, None)
+        if order is None:
+            raise ValueError("Order is not resting")
+        state = result["order"]
+        for field in ("price", "quantity", "filled_quantity", "remaining_quantity", "status"):
+            setattr(order, field, state[field])
+        return self._accepted(client_order_id, {"order": order, "trades": result["trades"]}, replaces=original)
+
+    def _refused(self, client_order_id: str, restore: bool = True) -> None:
+        """Forget a request the book refused; a refused replace leaves the order under its original id"""
+        order = self.orders.pop(client_order_id, None)
+        original = self._replacing.pop(client_order_id, None)
+        if restore and original is not None and order is not None:
+            self.orders[original] = order
+
+    def _reject(self, client_order_id: str, reason: str):
+        if self.binary:
+            return wire.encode_reject(client_order_id[:16], reason)
+        return encode_message({"type": "reject", "client_order_id": client_order_id, "reason": reason})
+
+    async def _write_replies(self) -> None:
+        """Send one reply per request, in request order"""
+        send = self.websocket.send_bytes if self.binary else self.websocket.send_text
+        while True:
+            client_order_id, future, complete = await self._pending.get()
+            if future is None:
+                reply = self._reject(client_order_id, complete)
+            else:
+                try:
+                    reply = complete(await asyncio.wrap_future(future))
+                except Exception as e:
+                    if future.exception() is not None:
+                        self._refused(client_order_id)  # The book refused it, so it never went live
+                    reply = self._reject(client_order_id, str(e))
+            try:
+                await send(reply)
+            except Exception as e:
+                logger.debug(f"Order entry session closed while replying: {e}")
+                return
@@ -0,0 +1,280 @@
+"""Compact binary wire protocol for order entry and market data.
+
+Every message is a fixed-layout little-endian struct whose first byte is
+the message type, optionally followed by a run of fixed-size rows
+(price levels or trades). Clients opt in per WebSocket connection by
+offering the ``BINARY_SUBPROTOCOL`` subprotocol; connections that do not
+keep the JSON protocol.
+
+Symbols and client order ids are fixed 16-byte, NUL-padded UTF-8 fields.
+Prices and quantities are float64 with NaN meaning "none" (no price for
+market orders, no stop price or display quantity for plain orders).
+Trades reference orders by the book's internal integer ids.
+"""
+import math
+import struct
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+from ..engine.order import Order, OrderSide, OrderStatus, OrderType
+
+BINARY_SUBPROTOCOL = "matching-engine.binary.v1"
+
+# Market data, server -> client
+MSG_SNAPSHOT = 1
+MSG_L2UPDATE = 2
+MSG_TRADES = 3
+# Order entry, client -> server
+MSG_NEW_ORDER = 16
+MSG_CANCEL = 17
+MSG_REPLACE = 18
+# Order entry, server -> client
+MSG_ACK = 32
+MSG_REJECT = 33
+
+SIDES = tuple(OrderSide)
+ORDER_TYPES = tuple(OrderType)
+STATUSES = tuple(OrderStatus)
+_SIDE_CODES = {side: code for code, side in enumerate(SIDES)}
+_ORDER_TYPE_CODES = {order_type: code for code, order_type in enumerate(ORDER_TYPES)}
+_STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+
+# type, symbol, start_sequence, sequence, bid count, ask count; then (price, quantity) rows
+BOOK_HEADER = struct.Struct("<B16sQQII")
+LEVEL = struct.Struct("<dd")
+# type, symbol, trade count; then trade rows
+TRADES_HEADER = struct.Struct("<B16sI")
+# trade_id, timestamp_ns, price, quantity, aggressor side, maker oid, taker oid
+TRADE = struct.Struct("<QqddBQQ")
+# type, side, order type, symbol, client order id, quantity, price, stop price, display quantity
+NEW_ORDER = struct.Struct("<BBB16s16sdddd")
+# type, symbol, client order id
+CANCEL = struct.Struct("<B16s16s")
+# type, symbol, client order id to replace, new client order id, quantity, price (NaN = unchanged)
+REPLACE = struct.Struct("<B16s16s16sdd")
+# type, status, client order id, filled quantity, remaining quantity, trade count; then trade rows
+ACK = struct.Struct("<BB16sddI")
+# type, client order id, reason length; then the UTF-8 reason
+REJECT = struct.Struct("<B16sH")
+
+
+def _pack_text(value: str) -> bytes:
+    encoded = value.encode()
+    if len(encoded) > 16:
+        raise ValueError(f"{value!r} does not fit in 16 bytes")
+    return encoded
+
+
+def _unpack_text(value: bytes) -> str:
+    return value.rstrip(b"\0").decode()
+
+
+def _pack_trades(buffer: bytearray, offset: int, trades: Iterable) -> None:
+    for trade in trades:
+        TRADE.pack_into(
+            buffer, offset, trade.trade_id, trade.timestamp_ns, trade.price, trade.quantity,
+            _SIDE_CODES[trade.aggressor_side], trade.maker_oid, trade.taker_oid,
+        )
+        offset += TRADE.size
+
+
+def _unpack_trades(view: memoryview, offset: int, count: int) -> List[dict]:
+    return [
+        {
+            "trade_id": trade_id,
+            "timestamp_ns": timestamp_ns,
+            "price": price,
+            "quantity": quantity,
+            "aggressor_side": SIDES[side],
+            "maker_oid": maker_oid,
+            "taker_oid": taker_oid,
+        }
+        for trade_id, timestamp_ns, price, quantity, side, maker_oid, taker_oid
+        in TRADE.iter_unpack(view[offset:offset + count * TRADE.size])
+    ]
+
+
+def encode_book(message: dict) -> bytes:
+    """Encode a ``snapshot`` or ``l2update`` market data message"""
+    bids, asks = message["bids"], message["asks"]
+    snapshot = message["type"] == "snapshot"
+    buffer = bytearray(BOOK_HEADER.size + (len(bids) + len(asks)) * LEVEL.size)
+    BOOK_HEADER.pack_into(
+        buffer, 0,
+        MSG_SNAPSHOT if snapshot else MSG_L2UPDATE,
+        _pack_text(message["symbol"]),
+        message["sequence"] if snapshot else message["start_sequence"],
+        message["sequence"],
+        len(bids),
+        len(asks),
+    )
+    offset = BOOK_HEADER.size
+    for price, quantity in bids:
+        LEVEL.pack_into(buffer, offset, price, quantity)
+        offset += LEVEL.size
+    for price, quantity in asks:
+        LEVEL.pack_into(buffer, offset, price, quantity)
+        offset += LEVEL.size
+    return bytes(buffer)
+
+
+def encode_trades(symbol: str, trades: List) -> bytes:
+    """Encode a batch of ``Trade`` records for the trade feed"""
+    buffer = bytearray(TRADES_HEADER.size + len(trades) * TRADE.size)
+    TRADES_HEADER.pack_into(buffer, 0, MSG_TRADES, _pack_text(symbol), len(trades))
+    _pack_trades(buffer, TRADES_HEADER.size, trades)
+    return bytes(buffer)
+
+
+def encode_new_order(
+    symbol: str,
+    client_order_id: str,
+    side: OrderSide,
+    order_type: OrderType,
+    quantity: float,
+    price: Optional[float] = None,
+    stop_price: Optional[float] = None,
+    display_quantity: Optional[float] = None,
+) -> bytes:
+    return NEW_ORDER.pack(
+        MSG_NEW_ORDER, _SIDE_CODES[side], _ORDER_TYPE_CODES[order_type],
+        _pack_text(symbol), _pack_text(client_order_id), quantity, math.nan if price is None else price,
+        math.nan if stop_price is None else stop_price, math.nan if display_quantity is None else display_quantity,
+    )
+
+
+def encode_cancel(symbol: str, client_order_id: str) -> bytes:
+    return CANCEL.pack(MSG_CANCEL, _pack_text(symbol), _pack_text(client_order_id))
+
+
+def encode_replace(
+    symbol: str,
+    client_order_id: str,
+    new_client_order_id: str,
+    quantity: Optional[float] = None,
+    price: Optional[float] = None,
+) -> bytes:
+    return REPLACE.pack(
+        MSG_REPLACE, _pack_text(symbol), _pack_text(client_order_id), _pack_text(new_client_order_id),
+        math.nan if quantity is None else quantity, math.nan if price is None else price,
+    )
+
+
+def encode_ack(client_order_id: str, order: Order, trades: List) -> bytes:
+    """Acknowledge an accepted order with its state and the fills it took"""
+    buffer = bytearray(ACK.size + len(trades) * TRADE.size)
+    ACK.pack_into(
+        buffer, 0, MSG_ACK, _STATUS_CODES[order.status], _pack_text(client_order_id),
+        order.filled_quantity, order.remaining_quantity, len(trades),
+    )
+    _pack_trades(buffer, ACK.size, trades)
+    return bytes(buffer)
+
+
+def encode_reject(client_order_id: str, reason: str) -> bytes:
+    encoded = reason.encode()[:0xFFFF]
+    return REJECT.pack(MSG_REJECT, _pack_text(client_order_id), len(encoded)) + encoded
+
+
+def message_type(data: bytes) -> int:
+    if not data:
+        raise ValueError("Empty message")
+    return data[0]
+
+
+def decode_new_order(data: bytes, order_id: str, timestamp: datetime) -> Tuple[str, Order]:
+    """Decode a new order message straight into an ``Order``.
+
+    Fields are unpacked in place from the received buffer and the order is
+    built without pydantic validation, so the checks ``Order`` would make
+    are done here; stop and iceberg terms are checked by the book as for
+    JSON orders. Returns the client order id and the order.
+    """
+    if len(data) != NEW_ORDER.size:
+        raise ValueError("Malformed new order message")
+    _, side, order_type, symbol, client_order_id, quantity, price, stop_price, display_quantity = \
+        NEW_ORDER.unpack_from(data)
+    if side >= len(SIDES) or order_type >= len(ORDER_TYPES):
+        raise ValueError("Unknown side or order type")
+    if not quantity > 0:
+        raise ValueError("Quantity must be greater than 0")
+    if math.isinf(quantity) or math.isinf(price) or math.isinf(stop_price) or math.isinf(display_quantity):
+        raise ValueError("Prices and quantities must be finite")  # NaN stands for an absent field
+    return _unpack_text(client_order_id), Order.model_construct(
+        order_id=order_id,
+        symbol=_unpack_text(symbol),
+        order_type=ORDER_TYPES[order_type],
+        side=SIDES[side],
+        quantity=quantity,
+        price=None if math.isnan(price) else price,
+        stop_price=None if math.isnan(stop_price) else stop_price,
+        display_quantity=None if math.isnan(display_quantity) else display_quantity,
+        timestamp=timestamp,
+        status=OrderStatus.NEW,
+        filled_quantity=0.0,
+        remaining_quantity=quantity,
+        owner=None
+    )
+
+
+def decode_cancel(data: bytes) -> Tuple[str, str]:
+    """Returns the symbol and client order id of a cancel message"""
+    if len(data) != CANCEL.size:
+        raise ValueError("Malformed cancel message")
+    _, symbol, client_order_id = CANCEL.unpack_from(data)
+    return _unpack_text(symbol), _unpack_text(client_order_id)
+
+
+def decode_replace(data: bytes) -> Tuple[str, str, str, float, Optional[float]]:
+    """Returns the symbol, client order id, new client order id, quantity and price of a replace.
+
+    A NaN quantity or price leaves that term unchanged (None).
+    """
+    if len(data) != REPLACE.size:
+        raise ValueError("Malformed replace message")
+    _, symbol, client_order_id, new_client_order_id, quantity, price = REPLACE.unpack_from(data)
+    if quantity <= 0:
+        raise ValueError("Quantity must be greater than 0")
+    return (
+        _unpack_text(symbol), _unpack_text(client_order_id), _unpack_text(new_client_order_id),
+        None if math.isnan(quantity) else quantity, None if math.isnan(price) else price,
+    )
+
+
+def decode(data: bytes) -> dict:
+    """Decode any server -> client message into a dict, for clients and tests"""
+    view = memoryview(data)
+    kind = message_type(data)
+    if kind in (MSG_SNAPSHOT, MSG_L2UPDATE):
+        _, symbol, start_sequence, sequence, bid_count, ask_count = BOOK_HEADER.unpack_from(view)
+        levels = [list(level) for level in LEVEL.iter_unpack(view[BOOK_HEADER.size:])]
+        message = {
+            "type": "snapshot" if kind == MSG_SNAPSHOT else "l2update",
+            "symbol": _unpack_text(symbol),
+            "sequence": sequence,
+            "bids": levels[:bid_count],
+            "asks": levels[bid_count:bid_count + ask_count],
+        }
+        if kind == MSG_L2UPDATE:
+            message["start_sequence"] = start_sequence
+        return message
+    if kind == MSG_TRADES:
+        _, symbol, count = TRADES_HEADER.unpack_from(view)
+        return {"type": "trades", "symbol": _unpack_text(symbol), "trades": _unpack_trades(view, TRADES_HEADER.size, count)}
+    if kind == MSG_ACK:
+        _, status, client_order_id, filled, remaining, count = ACK.unpack_from(view)
+        return {
+            "type": "ack",
+            "client_order_id": _unpack_text(client_order_id),
+            "status": STATUSES[status],
+            "filled_quantity": filled,
+            "remaining_quantity": remaining,
+            "trades": _unpack_trades(view, ACK.size, count),
+        }
+    if kind == MSG_REJECT:
+        _, client_order_id, length = REJECT.unpack_from(view)
+        return {
+            "type": "reject",
+            "client_order_id": _unpack_text(client_order_id),
+            "reason": bytes(view[REJECT.size:REJECT.size + length]).decode(),
+        }
+    raise ValueError(f"Unknown message type {kind}")
@@ -0,0 +1,181 @@
+from typing import List, Optional, Tuple
+from sortedcontainers import SortedDict
+
+
+class DepthIndex:
+    """Cumulative depth of one side of a fixed-point book, in O(log n).
+
+    Two Fenwick (binary indexed) trees over a window of ticks hold the
+    resting quantity and notional (quantity x tick) per tick, ordered
+    best-first: ascending ticks for asks, descending for bids. That makes
+    "how much rests at or better than price P" and "how far does quantity
+    Q sweep, at what cost" prefix-sum queries instead of walks over every
+    level. Like ``PriceLadder``, the window is recentered (and grown, up to
+    ``max_capacity`` ticks) when a tick falls outside it, and ticks too far
+    from the best price are kept in a sparse map summed level by level.
+    """
+
+    def __init__(self, descending: bool = False, capacity: int = 1024, max_capacity: int = 1 << 16):
+        """Initialize an empty index; ``descending`` ranks higher ticks first (bids)"""
+        if capacity <= 0 or max_capacity < capacity:
+            raise ValueError("Capacity must be greater than 0 and at most max_capacity")
+        self.descending = descending
+        self.max_capacity = max_capacity
+        self.total = 0
+        self._capacity = capacity
+        self._base: Optional[int] = None  # Rank key stored at position 1
+        self._points: List[int] = [0] * capacity  # Plain quantity per position, used to rebuild
+        self._quantity: List[int] = [0] * (capacity + 1)
+        self._notional: List[int] = [0] * (capacity + 1)
+        self._far = SortedDict()  # Rank key -> quantity for ticks outside the window
+
+    def add(self, tick: int, quantity: int) -> None:
+        """Change the resting quantity at a tick by ``quantity`` (negative to remove)"""
+        if not quantity:
+            return
+        key = -tick if self.descending else tick
+        if self._base is None or not 0 <= key - self._base < self._capacity:
+            if key in self._far or not self._recenter(key):
+                self.total += quantity
+                remaining = self._far.get(key, 0) + quantity
+                if remaining:
+                    self._far[key] = remaining
+                else:
+                    del self._far[key]
+                return
+        position = key - self._base + 1
+        self._points[position - 1] += quantity
+        self.total += quantity
+        notional = quantity * tick
+        capacity = self._capacity
+        quantity_tree, notional_tree = self._quantity, self._notional
+        while position <= capacity:
+            quantity_tree[position] += quantity
+            notional_tree[position] += notional
+            position += position & -position
+
+    def quantity_within(self, limit_tick: Optional[int] = None) -> int:
+        """Total quantity resting at ticks at or better than ``limit_tick`` (all if None)"""
+        if limit_tick is None:
+            return self.total
+        within = self._prefix(self._quantity, self._position(limit_tick))
+        if self._far:
+            far = self._far
+            within += sum(far[key] for key in far.irange(None, -limit_tick if self.descending else limit_tick))
+        return within
+
+    def sweep(self, quantity: int, limit_tick: Optional[int] = None) -> Tuple[int, int, Optional[int]]:
+        """Cost of taking up to ``quantity`` best-first without going past ``limit_tick``.
+
+        Returns ``(filled quantity, notional in tick x lot units, last tick
+        reached)``; the tick is None when nothing can be filled.
+        """
+        filled = min(quantity, self.quantity_within(limit_tick))
+        if filled <= 0:
+            return 0, 0, None
+
+        remaining = filled
+        notional = 0
+        if self._far:
+            # Sparse levels ranked ahead of the window fill first, those behind it last
+            remaining, notional, tick = self._sweep_far(self._far.irange(None, self._base - 1), remaining)
+            if not remaining:
+                return filled, notional, tick
+            window = self._prefix(self._quantity, self._capacity)
+            if remaining > window:
+                remaining, behind, tick = self._sweep_far(self._far.irange(self._base + self._capacity), remaining - window)
+                return filled, notional + self._prefix(self._notional, self._capacity) + behind, tick
+
+        # Binary lifting: the largest position whose prefix is still short of the fill
+        position = 0
+        step = 1 << self._capacity.bit_length()
+        quantity_tree = self._quantity
+        while step:
+            nxt = position + step
+            if nxt <= self._capacity and quantity_tree[nxt] < remaining:
+                position = nxt
+                remaining -= quantity_tree[nxt]
+            step >>= 1
+
+        key = self._base + position  # Rank key of the last level reached
+        tick = -key if self.descending else key
+        notional += self._prefix(self._notional, position) + remaining * tick
+        return filled, notional, tick
+
+    def _sweep_far(self, keys, remaining: int) -> Tuple[int, int, Optional[int]]:
+        """Take from sparse levels in rank order; returns (quantity still wanted, notional, last tick)"""
+        notional = 0
+        tick = None
+        for key in keys:
+            if not remaining:
+                break
+            take = min(self._far[key], remaining)
+            tick = -key if self.descending else key
+            notional += take * tick
+            remaining -= take
+        return remaining, notional, tick
+
+    def _position(self, tick: int) -> int:
+        """Number of window positions ranked at or better than a tick"""
+        if self._base is None:
+            return 0
+        offset = (-tick if self.descending else tick) - self._base
+        return max(0, min(offset + 1, self._capacity))
+
+    @staticmethod
+    def _prefix(tree: List[int], position: int) -> int:
+        total = 0
+        while position > 0:
+            total += tree[position]
+            position -= position & -position
+        return total
+
+    def _recenter(self, key: int) -> bool:
+        """Move (and if needed grow) the window to cover key and all resting depth.
+
+        As in ``PriceLadder``, a key that would need more than
+        ``max_capacity`` ticks only moves the window if it ranks best;
+        otherwise False is returned and it belongs in the sparse map.
+        """
+        occupied = [(self._base + i, points) for i, points in enumerate(self._points) if points]
+        occupied = sorted(occupied + list(self._far.items()))
+        low = min(key, occupied[0][0]) if occupied else key
+        high = max(key, occupied[-1][0]) if occupied else key
+
+        span = high - low + 1
+        capacity = self._capacity
+        while capacity < 2 * span and capacity < self.max_capacity:
+            capacity = min(capacity * 2, self.max_capacity)
+        if span <= capacity:
+            base = low - (capacity - span) // 2
+        elif key < occupied[0][0]:
+            base = key - capacity // 2
+        else:
+            return False
+
+        points = [0] * capacity
+        quantity_tree = [0] * (capacity + 1)
+        notional_tree = [0] * (capacity + 1)
+        far = SortedDict()
+        for k, quantity in occupied:
+            position = k - base + 1
+            if not 0 < position <= capacity:
+                far[k] = quantity
+                continue
+            points[position - 1] = quantity
+            quantity_tree[position] = quantity
+            notional_tree[position] = quantity * (-k if self.descending else k)
+        # Linear-time Fenwick construction: push each node into its parent
+        for position in range(1, capacity + 1):
+            parent = position + (position & -position)
+            if parent <= capacity:
+                quantity_tree[parent] += quantity_tree[position]
+                notional_tree[parent] += notional_tree[position]
+
+        self._base = base
+        self._capacity = capacity
+        self._points = points
+        self._quantity = quantity_tree
+        self._notional = notional_tree
+        self._far = far
+        return True
@@ -0,0 +1,59 @@
+import math
+from decimal import Decimal
+from pydantic import BaseModel, Field, field_validator
+
+
+class Instrument(BaseModel):
+    """Per-symbol trading specification.
+
+    Prices are expressed as integer multiples of ``tick_size`` (ticks) and
+    quantities as integer multiples of ``lot_size`` (lots). An ``OrderBook``
+    created with an instrument performs all of its book arithmetic on these
+    scaled integers, so fills are exact and price level keys are stable.
+    """
+    symbol: str = Field(..., description="Trading pair symbol")
+    tick_size: Decimal = Field(..., description="Minimum price increment")
+    lot_size: Decimal = Field(..., description="Minimum quantity increment")
+
+    @field_validator('tick_size', 'lot_size')
+    @classmethod
+    def validate_increment(cls, v: Decimal) -> Decimal:
+        if v <= 0:
+            raise ValueError("Increment must be greater than 0")
+        return v
+
+    @property
+    def price_scale(self) -> int:
+        """Number of decimal places in a price"""
+        return max(-self.tick_size.normalize().as_tuple().exponent, 0)
+
+    @property
+    def quantity_scale(self) -> int:
+        """Number of decimal places in a quantity"""
+        return max(-self.lot_size.normalize().as_tuple().exponent, 0)
+
+    def price_to_ticks(self, price: float) -> int:
+        """Convert a price to an integer number of ticks"""
+        if not math.isfinite(price):
+            raise ValueError(f"Price {price} is not a finite number")
+        ticks, remainder = divmod(Decimal(str(price)), self.tick_size)
+        if remainder:
+            raise ValueError(f"Price {price} is not a multiple of tick size {self.tick_size}")
+        return int(ticks)
+
+    def ticks_to_price(self, ticks: int) -> float:
+        """Convert an integer number of ticks back to a price"""
+        return float(ticks * self.tick_size)
+
+    def quantity_to_lots(self, quantity: float) -> int:
+        """Convert a quantity to an integer number of lots"""
+        if not math.isfinite(quantity):
+            raise ValueError(f"Quantity {quantity} is not a finite number")
+        lots, remainder = divmod(Decimal(str(quantity)), self.lot_size)
+        if remainder:
+            raise ValueError(f"Quantity {quantity} is not a multiple of lot size {self.lot_size}")
+        return int(lots)
+
+    def lots_to_quantity(self, lots: int) -> float:
+        """Convert an integer number of lots back to a quantity"""
+        return float(lots * self.lot_size)
@@ -0,0 +1,373 @@
+import math
+import os
+import struct
+import zlib
+from datetime import datetime, timedelta
+from typing import BinaryIO, Dict, Iterator, Optional, Tuple, Union
+from loguru import logger
+from .order import Order, OrderAmend, OrderCancel, OrderMassCancel, OrderSide, OrderType
+from .orderbook import OrderBook
+from .snapshot import load_snapshot, write_snapshot
+
+# File layout: MAGIC, then frames of [payload length][crc32 of payload][payload]
+MAGIC = b"MEJ2"
+_HEADER = struct.Struct("<II")
+
+# Payloads start with the frame type and journal sequence, followed by
+# type-specific fixed fields and then length-prefixed UTF-8 strings
+FRAME_NEW = 1
+FRAME_CANCEL = 2
+FRAME_CHECKPOINT = 3  # First frame after truncation; carries the sequence covered by the snapshot
+FRAME_AMEND = 4
+FRAME_MASS_CANCEL = 5
+_NEW = struct.Struct("<BQBBBddq")  # type, sequence, side, order type, has price, price, quantity, timestamp (us)
+_PREFIX = struct.Struct("<BQ")  # type, sequence: common to every payload
+_CANCEL = _PREFIX
+_CHECKPOINT = _PREFIX
+_AMEND = struct.Struct("<BQBdBd")  # type, sequence, has quantity, quantity, has price, price
+# type, sequence, side (0xFF = both), has min price, min price, has max price, max price
+_MASS_CANCEL = struct.Struct("<BQBBdBd")
+_BOTH_SIDES = 0xFF
+_STRING_LENGTH = struct.Struct("<H")
+_NEW_TRAILER = struct.Struct("<dd")  # stop price, display quantity (NaN = none); follows the new order strings
+
+# Enum codes are positions in these tuples; only ever append new members
+_SIDES = tuple(OrderSide)
+_ORDER_TYPES = tuple(OrderType)
+_SIDE_CODES = {side: code for code, side in enumerate(_SIDES)}
+_ORDER_TYPE_CODES = {order_type: code for code, order_type in enumerate(_ORDER_TYPES)}
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+DURABILITY_MODES = ("none", "batch", "sync")
+
+JournalEntry = Tuple[int, str, Union[Order, OrderCancel, OrderAmend, OrderMassCancel]]
+
+
+def _pack_strings(*values: str) -> bytes:
+    parts = []
+    for value in values:
+        encoded = value.encode("utf-8")
+        parts.append(_STRING_LENGTH.pack(len(encoded)))
+        parts.append(encoded)
+    return b"".join(parts)
+
+
+def _unpack_strings(payload: bytes, offset: int, count: int) -> Tuple[list, int]:
+    values = []
+    for _ in range(count):
+        (length,) = _STRING_LENGTH.unpack_from(payload, offset)
+        offset += _STRING_LENGTH.size
+        values.append(payload[offset:offset + length].decode("utf-8"))
+        offset += length
+    return values, offset
+
+
+def _decode(payload: bytes) -> Optional[JournalEntry]:
+    """Turn a frame payload back into (sequence, symbol, command), or None for a checkpoint"""
+    frame_type = payload[0]
+    if frame_type == FRAME_NEW:
+        _, sequence, side, order_type, has_price, price, quantity, timestamp_us = _NEW.unpack_from(payload)
+        (symbol, order_id, owner), offset = _unpack_strings(payload, _NEW.size, 3)
+        stop_price, display_quantity = _NEW_TRAILER.unpack_from(payload, offset)
+        order = Order(
+            order_id=order_id,
+            symbol=symbol,
+            order_type=_ORDER_TYPES[order_type],
+            side=_SIDES[side],
+            quantity=quantity,
+            price=price if has_price else None,
+            stop_price=None if math.isnan(stop_price) else stop_price,
+            display_quantity=None if math.isnan(display_quantity) else display_quantity,
+            timestamp=_EPOCH + timestamp_us * _MICROSECOND,
+            remaining_quantity=quantity,
+            owner=owner or None
+        )
+        return sequence, symbol, order
+    if frame_type == FRAME_CANCEL:
+        _, sequence = _CANCEL.unpack_from(payload)
+        (symbol, order_id), _ = _unpack_strings(payload, _CANCEL.size, 2)
+        return sequence, symbol, OrderCancel(order_id=order_id)
+    if frame_type == FRAME_AMEND:
+        _, sequence, has_quantity, quantity, has_price, price = _AMEND.unpack_from(payload)
+        (symbol, order_id), _ = _unpack_strings(payload, _AMEND.size, 2)
+        amend = OrderAmend(
+            order_id=order_id,
+            quantity=quantity if has_quantity else None,
+            price=price if has_price else None
+        )
+        return sequence, symbol, amend
+    if frame_type == FRAME_MASS_CANCEL:
+        _, sequence, side, has_min, min_price, has_max, max_price = _MASS_CANCEL.unpack_from(payload)
+        (symbol, owner), _ = _unpack_strings(payload, _MASS_CANCEL.size, 2)
+        mass_cancel = OrderMassCancel(
+            owner=owner or None,
+            side=None if side == _BOTH_SIDES else _SIDES[side],
+            min_price=min_price if has_min else None,
+            max_price=max_price if has_max else None
+        )
+        return sequence, symbol, mass_cancel
+    if frame_type == FRAME_CHECKPOINT:
+        return None
+    raise ValueError(f"Unknown journal frame type {frame_type}")
+
+
+def _scan(handle: BinaryIO) -> Iterator[Tuple[int, bytes]]:
+    """Yield (end offset, payload) for each intact frame, stopping at a torn or corrupt tail"""
+    offset = handle.tell()
+    while True:
+        header = handle.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            return
+        length, checksum = _HEADER.unpack(header)
+        payload = handle.read(length)
+        if len(payload) < length or zlib.crc32(payload) != checksum:
+            logger.warning(f"Journal {handle.name}: discarding torn frame at offset {offset}")
+            return
+        offset += _HEADER.size + length
+        yield offset, payload
+
+
+def read_journal(path: str) -> Iterator[JournalEntry]:
+    """Iterate the commands stored in a journal file, oldest first"""
+    if not os.path.exists(path):
+        return
+    with open(path, "rb") as handle:
+        if handle.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a matching engine journal")
+        for _, payload in _scan(handle):
+            entry = _decode(payload)
+            if entry is not None:
+                yield entry
+
+
+def replay_journal(path: str, books: Dict[str, OrderBook], after_sequence: int = 0) -> int:
+    """Rebuild books by re-applying journaled commands; returns the number applied.
+
+    Only commands that succeeded are journaled, so replay is deterministic:
+    the same commands in the same order produce the same book.
+    """
+    applied = 0
+    for sequence, symbol, command in read_journal(path):
+        if sequence <= after_sequence or symbol not in books:
+            continue
+        if isinstance(command, Order):
+            books[symbol].add_order(command)
+        elif isinstance(command, OrderAmend):
+            books[symbol].amend_order(command.order_id, command.quantity, command.price)
+        elif isinstance(command, OrderMassCancel):
+            books[symbol].mass_cancel(command.owner, command.side, command.min_price, command.max_price)
+        else:
+            books[symbol].cancel_order(command.order_id)
+        applied += 1
+    return applied
+
+
+class Journal:
+    """Append-only binary write-ahead journal of inbound book commands.
+
+    New orders, cancels, amends and mass cancels are framed with a length and CRC32 and appended
+    to a single file. ``durability`` trades latency for safety:
+
+    - ``"none"``: leave writes in process and OS buffers
+    - ``"batch"``: group commit, one flush + fsync per ``commit()``
+    - ``"sync"``: flush + fsync after every command
+
+    Opening an existing journal drops any torn frame at its tail and
+    continues the sequence from the last intact frame. ``checkpoint()``
+    truncates the journal once a snapshot covers everything in it.
+    """
+
+    def __init__(self, path: str, durability: str = "batch"):
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"Unknown durability mode: {durability}")
+        self.path = path
+        self.durability = durability
+        self.sequence = 0
+        self.checkpoint_sequence = 0  # Last sequence covered by a snapshot
+        self.fsyncs = 0
+        self._dirty = False
+
+        end = self._recover()
+        self._file = open(path, "r+b" if end else "wb")
+        if end:
+            self._file.seek(end)
+            self._file.truncate()
+        else:
+            self._file.write(MAGIC)
+            self._file.flush()
+
+    def _recover(self) -> int:
+        """Find the end of the last intact frame and the last sequence number"""
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            return 0
+        with open(self.path, "rb") as handle:
+            if handle.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{self.path} is not a matching engine journal")
+            end = len(MAGIC)
+            for end, payload in _scan(handle):
+                frame_type, self.sequence = _PREFIX.unpack_from(payload)
+                if frame_type == FRAME_CHECKPOINT:
+                    self.checkpoint_sequence = self.sequence
+        return end
+
+    def append_new(self, symbol: str, order: Order) -> int:
+        """Journal a new order"""
+        self.sequence += 1
+        timestamp_us = (order.timestamp.replace(tzinfo=None) - _EPOCH) // _MICROSECOND
+        payload = _NEW.pack(
+            FRAME_NEW,
+            self.sequence,
+            _SIDE_CODES[order.side],
+            _ORDER_TYPE_CODES[order.order_type],
+            order.price is not None,
+            order.price or 0.0,
+            order.quantity,
+            timestamp_us,
+        ) + _pack_strings(symbol, order.order_id, order.owner or "") + _NEW_TRAILER.pack(
+            math.nan if order.stop_price is None else order.stop_price,
+            math.nan if order.display_quantity is None else order.display_quantity
+        )
+        self._write(payload)
+        return self.sequence
+
+    def append_cancel(self, symbol: str, order_id: str) -> int:
+        """Journal a cancel"""
+        self.sequence += 1
+        self._write(_CANCEL.pack(FRAME_CANCEL, self.sequence) + _pack_strings(symbol, order_id))
+        return self.sequence
+
+    def append_amend(self, symbol: str, order_id: str, quantity: Optional[float], price: Optional[float]) -> int:
+        """Journal an amend"""
+        self.sequence += 1
+        payload = _AMEND.pack(
+            FRAME_AMEND,
+            self.sequence,
+            quantity is not None,
+            quantity or 0.0,
+            price is not None,
+            price or 0.0,
+        ) + _pack_strings(symbol, order_id)
+        self._write(payload)
+        return self.sequence
+
+    def append_mass_cancel(
+        self,
+        symbol: str,
+        owner: Optional[str],
+        side: Optional[OrderSide],
+        min_price: Optional[float],
+        max_price: Optional[float],
+    ) -> int:
+        """Journal a mass cancel by its filters; replay cancels the same orders"""
+        self.sequence += 1
+        payload = _MASS_CANCEL.pack(
+            FRAME_MASS_CANCEL,
+            self.sequence,
+            _BOTH_SIDES if side is None else _SIDE_CODES[side],
+            min_price is not None,
+            min_price or 0.0,
+            max_price is not None,
+            max_price or 0.0,
+        ) + _pack_strings(symbol, owner or "")
+        self._write(payload)
+        return self.sequence
+
+    def record(self, symbol: str, method: str, args: tuple, result) -> None:
+        """Journal a successfully executed OrderBook operation, if it mutates the book"""
+        if method == "add_order":
+            self.append_new(symbol, args[0])
+        elif method == "add_orders":
+            for request in args[0]:
+                if isinstance(request, Order):
+                    self.append_new(symbol, request)
+                elif isinstance(request, OrderAmend):
+                    self.append_amend(symbol, request.order_id, request.quantity, request.price)
+                else:
+                    self.append_cancel(symbol, request.order_id)
+        elif method == "cancel_order" and result:
+            self.append_cancel(symbol, args[0])
+        elif method == "amend_order" and result["amended"]:
+            order_id, quantity, price = (args + (None, None))[:3]
+            self.append_amend(symbol, order_id, quantity, price)
+        elif method == "mass_cancel" and result:
+            self.append_mass_cancel(symbol, *(args + (None,) * 4)[:4])
+
+    def commit(self) -> None:
+        """Make everything appended so far durable according to the mode"""
+        if self._dirty and self.durability == "batch":
+            self._sync()
+
+    def checkpoint(self) -> None:
+        """Truncate the journal after a snapshot of everything journaled so far.
+
+        The replacement file holds only a checkpoint frame, so the sequence
+        keeps counting from where it was. It is written and fsynced under a
+        temporary name and renamed over the journal.
+        """
+        self._file.close()
+        payload = _CHECKPOINT.pack(FRAME_CHECKPOINT, self.sequence)
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "wb") as handle:
+            handle.write(MAGIC)
+            handle.write(_HEADER.pack(len(payload), zlib.crc32(payload)))
+            handle.write(payload)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temporary, self.path)
+        self._file = open(self.path, "ab")
+        self.checkpoint_sequence = self.sequence
+        self._dirty = False
+
+    def close(self) -> None:
+        if self._dirty and self.durability != "none":
+            self._sync()
+        self._file.close()
+
+    def _write(self, payload: bytes) -> None:
+        self._file.write(_HEADER.pack(len(payload), zlib.crc32(payload)))
+        self._file.write(payload)
+        self._dirty = True
+        if self.durability == "sync":
+            self._sync()
+
+    def _sync(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.fsyncs += 1
+        self._dirty = False
+
+
+def snapshot_path(journal_path: str) -> str:
+    """Path of the snapshot that pairs with a journal file"""
+    return os.path.splitext(journal_path)[0] + ".snap"
+
+
+def checkpoint_book(book: OrderBook, journal: Journal) -> None:
+    """Snapshot a book next to its journal, then truncate the journal.
+
+    Must run on the book's writer after the latest commands were
+    committed. A crash between the two steps only leaves journal entries
+    the snapshot already covers, which recovery skips.
+    """
+    write_snapshot(book, snapshot_path(journal.path), journal.sequence)
+    journal.checkpoint()
+
+
+def open_book_journal(directory: str, book: OrderBook, durability: str = "batch") -> Journal:
+    """Recover a book from its snapshot and journal in ``directory`` and open the journal for appending"""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{book.symbol}.wal")
+    journal = Journal(path, durability)
+    after_sequence = 0
+    if os.path.exists(snapshot_path(path)):
+        after_sequence = load_snapshot(snapshot_path(path), book)
+        journal.sequence = max(journal.sequence, after_sequence)
+    applied = replay_journal(path, {book.symbol: book}, after_sequence)
+    if after_sequence or applied:
+        logger.info(
+            f"Recovered {book.symbol} from {directory}: snapshot at {after_sequence}, "
+            f"{applied} commands replayed, {len(book.orders)} orders"
+        )
+    return journal
@@ -0,0 +1,104 @@
+from typing import Dict, List
+from .order import OrderType
+
+
+class LatencyHistogram:
+    """Log-linear histogram of nanosecond latencies, in the style of HdrHistogram.
+
+    Values below ``2**precision_bits`` get exact buckets; above that every
+    power of two is split into ``2**(precision_bits - 1)`` buckets, bounding
+    the relative error of any reported value to about ``2**(1 - precision_bits)``
+    (3% at the default of 6 bits). Recording is an index computation and a
+    list increment, with no allocation.
+    """
+    __slots__ = ("count", "total", "max", "_bits", "_half", "_counts")
+
+    def __init__(self, precision_bits: int = 6):
+        if precision_bits < 2:
+            raise ValueError("Precision must be at least 2 bits")
+        self.count = 0
+        self.total = 0
+        self.max = 0
+        self._bits = precision_bits
+        self._half = 1 << (precision_bits - 1)
+        self._counts: List[int] = [0] * ((65 - precision_bits) * self._half + (1 << precision_bits))
+
+    def record(self, value: int) -> None:
+        """Add one latency sample in nanoseconds"""
+        if value < 0:
+            value = 0
+        shift = value.bit_length() - self._bits
+        if shift <= 0:
+            self._counts[value] += 1
+        else:
+            self._counts[shift * self._half + (value >> shift)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def _bucket_high(self, index: int) -> int:
+        """Largest value that falls into a bucket"""
+        if index < (1 << self._bits):
+            return index
+        shift = index // self._half - 1
+        mantissa = index - shift * self._half
+        return ((mantissa + 1) << shift) - 1
+
+    def percentile(self, pct: float) -> int:
+        """Upper bound of the bucket holding the pct-th percentile sample"""
+        if not self.count:
+            return 0
+        rank = max(1, -(-self.count * pct // 100))  # Ceiling without floats drifting
+        seen = 0
+        for index, bucket in enumerate(self._counts):
+            seen += bucket
+            if seen >= rank:
+                return min(self._bucket_high(index), self.max)
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        """Count, mean and percentiles in microseconds"""
+        return {
+            "count": self.count,
+            "mean_us": self.total / self.count / 1000 if self.count else 0.0,
+            "p50_us": self.percentile(50) / 1000,
+            "p90_us": self.percentile(90) / 1000,
+            "p99_us": self.percentile(99) / 1000,
+            "p99.9_us": self.percentile(99.9) / 1000,
+            "max_us": self.max / 1000,
+        }
+
+
+class BookMetrics:
+    """Counters and latency histograms for one OrderBook.
+
+    A book only carries one of these once ``OrderBook.enable_metrics()`` has
+    been called; until then every instrumentation point is a single
+    ``is None`` check.
+    """
+    __slots__ = ("orders", "trades", "cancels", "stops_triggered", "levels_matched", "add_order", "match_level", "cancel_order")
+
+    def __init__(self):
+        self.orders: Dict[OrderType, int] = {order_type: 0 for order_type in OrderType}
+        self.trades = 0
+        self.cancels = 0
+        self.stops_triggered = 0
+        self.levels_matched = 0
+        self.add_order = LatencyHistogram()
+        self.match_level = LatencyHistogram()
+        self.cancel_order = LatencyHistogram()
+
+    def summary(self) -> dict:
+        return {
+            "orders": {order_type.value: count for order_type, count in self.orders.items()},
+            "trades": self.trades,
+            "cancels": self.cancels,
+            "stops_triggered": self.stops_triggered,
+            "levels_matched": self.levels_matched,
+            "latency": {
+                "add_order": self.add_order.summary(),
+                "match_level": self.match_level.summary(),
+                "cancel_order": self.cancel_order.summary(),
+            },
+        }
@@ -8,6 +8,8 @@ class OrderType(str, Enum):
     LIMIT = "limit"
     IOC = "ioc"
     FOK = "fok"
+    STOP = "stop"  # Market order held until the last trade price reaches stop_price
+    STOP_LIMIT = "stop_limit"  # Limit order held until the last trade price reaches stop_price
 
 class OrderSide(str, Enum):
     BUY = "buy"
@@ -26,10 +28,13 @@ class Order(BaseModel):
     side: OrderSide
     quantity: float
     price: Optional[float] = None
+    stop_price: Optional[float] = None  # Trigger price of stop and stop-limit orders
+    display_quantity: Optional[float] = None  # Visible size of an iceberg limit order; the rest is hidden
     timestamp: datetime = Field(default_factory=datetime.utcnow)
     status: OrderStatus = OrderStatus.NEW
     filled_quantity: float = 0.0
     remaining_quantity: float = Field(..., description="Quantity remaining to be filled")
+    owner: Optional[str] = Field(None, description="Account or session the order belongs to")
     
     def __init__(self, **data):
         super().__init__(**data)
@@ -60,4 +65,21 @@ class Order(BaseModel):
             self.order_type == OrderType.MARKET
             or self.order_type in [OrderType.IOC, OrderType.FOK]
             or (self.order_type == OrderType.LIMIT and self.price is not None)
-        )
\ No newline at end of file
+        )
+
+class OrderCancel(BaseModel):
+    """Request to cancel a resting order, used in batch submissions"""
+    order_id: str = Field(..., description="Identifier of the order to cancel")
+
+class OrderAmend(BaseModel):
+    """Request to change the price and/or total quantity of a resting order"""
+    order_id: str = Field(..., description="Identifier of the order to amend")
+    quantity: Optional[float] = None
+    price: Optional[float] = None
+
+class OrderMassCancel(BaseModel):
+    """Request to cancel every resting order matching the filters; None matches anything"""
+    owner: Optional[str] = None
+    side: Optional[OrderSide] = None
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
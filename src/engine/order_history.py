@@ -0,0 +1,70 @@
+import sys
+import time
+from collections import OrderedDict
+from typing import Optional
+from .order_record import OrderRecord
+
+
+class OrderHistory:
+    """Bounded cache of recently completed orders, kept for status queries.
+
+    Filled and cancelled orders leave the book's active index and are
+    parked here instead. The oldest entries are evicted once ``max_size``
+    is reached, and entries older than ``ttl`` seconds (if set) are expired
+    lazily on insert and lookup, so memory stays flat under sustained flow.
+    """
+    __slots__ = ("max_size", "ttl", "evictions", "_entries")
+
+    def __init__(self, max_size: int = 10_000, ttl: Optional[float] = None):
+        if max_size < 0:
+            raise ValueError("History size cannot be negative")
+        self.max_size = max_size
+        self.ttl = ttl
+        self.evictions = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # order_id -> (completed at, record)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, order_id: str) -> bool:
+        return self.get(order_id) is not None
+
+    def __sizeof__(self) -> int:
+        """Size of the cache itself, excluding the records it holds"""
+        entry_size = sys.getsizeof((0.0, None))
+        return object.__sizeof__(self) + sys.getsizeof(self._entries) + entry_size * len(self._entries)
+
+    def add(self, record: OrderRecord) -> None:
+        """Record a terminal order, evicting the oldest entries if needed"""
+        if self.max_size == 0:
+            return
+        now = time.monotonic()
+        entries = self._entries
+        entries.pop(record.order_id, None)
+        entries[record.order_id] = (now, record)
+        self._expire(now)
+        while len(entries) > self.max_size:
+            entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, order_id: str) -> Optional[OrderRecord]:
+        """Returns the completed order, or None if unknown or already evicted"""
+        entry = self._entries.get(order_id)
+        if entry is None:
+            return None
+        if self.ttl is not None and time.monotonic() - entry[0] > self.ttl:
+            self._expire(time.monotonic())
+            return None
+        return entry[1]
+
+    def _expire(self, now: float) -> None:
+        """Drop entries past their TTL; insertion order makes them a prefix"""
+        if self.ttl is None:
+            return
+        entries = self._entries
+        while entries:
+            completed_at, _ = next(iter(entries.values()))
+            if now - completed_at <= self.ttl:
+                break
+            entries.popitem(last=False)
+            self.evictions += 1
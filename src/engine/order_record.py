@@ -0,0 +1,154 @@
+import time
+import weakref
+from typing import Optional
+from .instrument import Instrument
+from .order import Order, OrderSide, OrderStatus, OrderType
+
+
+class OrderRecord:
+    """Compact internal representation of an order inside the book.
+
+    The pydantic ``Order`` is only used at the API boundary for validation
+    and serialization. Inside ``OrderBook`` every order is held as a slotted
+    record with an integer id and a monotonic nanosecond timestamp, and the
+    record doubles as the node of its price level queue (``prev``/``next``).
+
+    If the caller still holds the ``Order`` the record was built from, it is
+    refreshed through a weak reference when the order leaves the book or is
+    read back with ``OrderBook.get_order``, without keeping the model alive
+    for the lifetime of the book. Partial fills of a resting order are not
+    copied one by one.
+
+    When the book trades an ``Instrument``, ``price`` is held in ticks and
+    the quantity fields in lots (``stop_price`` is in ticks too). ``owner``
+    is the optional account or session tag used for mass cancels.
+
+    For a resting iceberg order ``remaining_quantity`` is only the displayed
+    slice; the undisclosed rest is ``hidden_quantity``, released up to
+    ``display_quantity`` at a time as each slice fills. ``priority``
+    orders records within a price level queue: it starts out equal to
+    ``oid`` and is renewed when an iceberg's next slice joins the back of
+    the queue, while ``oid`` stays the order's identity.
+    """
+    __slots__ = (
+        "oid", "order_id", "side", "order_type", "price", "quantity",
+        "filled_quantity", "remaining_quantity", "status", "timestamp_ns",
+        "owner", "stop_price", "display_quantity", "hidden_quantity", "priority", "prev", "next", "_source",
+    )
+
+    def __init__(
+        self,
+        oid: int,
+        order_id: str,
+        side: OrderSide,
+        order_type: OrderType,
+        price: Optional[float],
+        quantity: float,
+        remaining_quantity: Optional[float] = None,
+        filled_quantity: float = 0.0,
+        status: OrderStatus = OrderStatus.NEW,
+        timestamp_ns: Optional[int] = None,
+        owner: Optional[str] = None,
+        stop_price: Optional[float] = None,
+        display_quantity: Optional[float] = None,
+        hidden_quantity: float = 0,
+        priority: Optional[int] = None,
+    ):
+        self.oid = oid
+        self.order_id = order_id
+        self.side = side
+        self.order_type = order_type
+        self.price = price
+        self.quantity = quantity
+        self.remaining_quantity = quantity if remaining_quantity is None else remaining_quantity
+        self.filled_quantity = filled_quantity
+        self.status = status
+        self.timestamp_ns = time.monotonic_ns() if timestamp_ns is None else timestamp_ns
+        self.owner = owner
+        self.stop_price = stop_price
+        self.display_quantity = display_quantity
+        self.hidden_quantity = hidden_quantity
+        self.priority = oid if priority is None else priority
+        self.prev: Optional["OrderRecord"] = None
+        self.next: Optional["OrderRecord"] = None
+        self._source: Optional[weakref.ref] = None
+
+    @classmethod
+    def from_order(cls, order: Order, oid: int, instrument: Optional[Instrument] = None) -> "OrderRecord":
+        """Build a record from a validated API order"""
+        if order.order_type in (OrderType.STOP, OrderType.STOP_LIMIT):
+            if order.stop_price is None:
+                raise ValueError("Stop price is required for stop orders")
+            if order.order_type == OrderType.STOP_LIMIT and order.price is None:
+                raise ValueError("Price is required for stop-limit orders")
+        elif order.stop_price is not None:
+            raise ValueError("Stop price is only valid for stop orders")
+        if order.display_quantity is not None:
+            if order.order_type != OrderType.LIMIT:
+                raise ValueError("Display quantity is only valid for limit orders")
+            if not 0 < order.display_quantity <= order.quantity:
+                raise ValueError("Display quantity must be greater than 0 and at most the order quantity")
+        if instrument is None:
+            price = order.price
+            stop_price = order.stop_price
+            display_quantity = order.display_quantity
+            quantity = order.quantity
+            remaining_quantity = order.remaining_quantity
+            filled_quantity = order.filled_quantity
+        else:
+            price = None if order.price is None else instrument.price_to_ticks(order.price)
+            stop_price = None if order.stop_price is None else instrument.price_to_ticks(order.stop_price)
+            display_quantity = None if order.display_quantity is None else instrument.quantity_to_lots(order.display_quantity)
+            quantity = instrument.quantity_to_lots(order.quantity)
+            remaining_quantity = instrument.quantity_to_lots(order.remaining_quantity)
+            filled_quantity = instrument.quantity_to_lots(order.filled_quantity)
+
+        record = cls(
+            oid,
+            order.order_id,
+            order.side,
+            order.order_type,
+            price,
+            quantity,
+            remaining_quantity,
+            filled_quantity,
+            order.status,
+            owner=order.owner,
+            stop_price=stop_price,
+            display_quantity=display_quantity,
+        )
+        record._source = weakref.ref(order)
+        return record
+
+    def sync(self, instrument: Optional[Instrument] = None, terms: bool = False) -> None:
+        """Copy fill state back to the originating Order if it is still alive.
+
+        With ``terms`` the price and total quantity are copied too, after an amend.
+        """
+        source = self._source
+        if source is None:
+            return
+        order = source()
+        if order is None:
+            self._source = None
+            return
+        remaining = self.remaining_quantity + self.hidden_quantity
+        if instrument is None:
+            order.filled_quantity = self.filled_quantity
+            order.remaining_quantity = remaining
+        else:
+            order.filled_quantity = instrument.lots_to_quantity(self.filled_quantity)
+            order.remaining_quantity = instrument.lots_to_quantity(remaining)
+        order.status = self.status
+        if terms:
+            if instrument is None:
+                order.price, order.quantity = self.price, self.quantity
+            else:
+                order.price = instrument.ticks_to_price(self.price)
+                order.quantity = instrument.lots_to_quantity(self.quantity)
+
+    def __repr__(self) -> str:
+        return (
+            f"OrderRecord(oid={self.oid}, order_id={self.order_id!r}, side={self.side.value}, "
+            f"price={self.price}, remaining={self.remaining_quantity}, status={self.status.value})"
+        )
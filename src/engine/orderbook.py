@@ -1,42 +1,222 @@
+import sys
+import time
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional, Union
 from decimal import Decimal
 from collections import defaultdict
+from itertools import islice
 from sortedcontainers import SortedDict
-from loguru import logger
-from .order import Order, OrderSide, OrderStatus, OrderType
+from .depth_index import DepthIndex
+from .instrument import Instrument
+from .metrics import BookMetrics
+from .order import Order, OrderAmend, OrderCancel, OrderSide, OrderStatus, OrderType
+from .order_history import OrderHistory
+from .order_record import OrderRecord
+from .price_ladder import PriceLadder
+from .price_level import PriceLevel
+from .trade import Trade
+from .trade_tape import TradeTape
+
+_DEPTH_CACHE_SIZE = 8  # Distinct snapshot depths kept cached per book
+_STOP_TYPES = (OrderType.STOP, OrderType.STOP_LIMIT)
 
 class OrderBook:
-    def __init__(self, symbol: str):
-        """Initialize a new order book"""
+    def __init__(
+        self,
+        symbol: str,
+        instrument: Optional[Instrument] = None,
+        backend: str = "sorted",
+        history_size: int = 10_000,
+        history_ttl: Optional[float] = None,
+        trade_tape_size: int = 10_000,
+    ):
+        """Initialize a new order book, in fixed-point mode when given an instrument"""
         self.symbol = symbol
-        self.bids = SortedDict(lambda x: -x)  # Price levels for bids, sorted descending
-        self.asks = SortedDict()  # Price levels for asks, sorted ascending
-        self.orders = {}  # Map order_id to Order
-        self.bid_queues = defaultdict(list)  # Orders at each bid price level
-        self.ask_queues = defaultdict(list)  # Orders at each ask price level
+        self.instrument = instrument
+        self.backend = backend
+        if backend == "sorted":
+            self.bids = SortedDict(lambda x: -x)  # Price levels for bids, sorted descending
+            self.asks = SortedDict()  # Price levels for asks, sorted ascending
+        elif backend == "ladder":
+            if instrument is None:
+                raise ValueError("The ladder backend requires an instrument")
+            self.bids = PriceLadder(descending=True)
+            self.asks = PriceLadder()
+        else:
+            raise ValueError(f"Unknown order book backend: {backend}")
+        self.orders: Dict[str, OrderRecord] = {}  # Map order_id to resting order record
+        self.owner_orders: Dict[str, Dict[str, OrderRecord]] = {}  # Owner -> its resting orders by order_id
+        self.history = OrderHistory(history_size, history_ttl)  # Recently completed orders
+        self.trade_tape = TradeTape(symbol, trade_tape_size)
+        self._next_trade_id = 1
+        self.metrics: Optional[BookMetrics] = None  # Set by enable_metrics()
+        self.bid_queues = defaultdict(PriceLevel)  # FIFO queue at each bid price level
+        self.ask_queues = defaultdict(PriceLevel)  # FIFO queue at each ask price level
+        self._next_oid = 1  # Internal integer order ids, assigned in arrival order
+        # Hidden iceberg quantity per price level; never published, but fillable
+        self.bid_reserve: Dict = {}
+        self.ask_reserve: Dict = {}
+        # Cumulative fillable quantity (displayed plus reserve) per side, so FOK checks and
+        # quote_sweep are O(log n) in fixed-point mode
+        self.bid_depth = DepthIndex(descending=True) if instrument is not None else None
+        self.ask_depth = DepthIndex() if instrument is not None else None
+        # Pending stop orders: buy stops fire from the lowest stop price up, sell stops from the highest down
+        self.buy_stops = SortedDict()
+        self.sell_stops = SortedDict(lambda x: -x)
+        self.stop_orders: Dict[str, OrderRecord] = {}  # Map order_id to pending stop order record
+        self.last_trade_price = None  # In book units; None until the first trade
+        self._triggering = False
+
+        # Market data sequencing: every price level change bumps the sequence and is
+        # coalesced (latest aggregate per price) until drained by the feed
+        self.sequence = 0
+        self._drained_sequence = 0
+        self._bid_changes: Dict = {}
+        self._ask_changes: Dict = {}
+
+        # Snapshot levels cached per depth, each side tagged with the version it was built at
+        self._bid_version = 0
+        self._ask_version = 0
+        self._depth_cache: Dict[int, list] = {}  # depth -> [bid_version, bids, ask_version, asks]
+
+        if instrument is None:
+            self._price_out = self._quantity_out = float
+        else:
+            self._price_out = instrument.ticks_to_price
+            self._quantity_out = instrument.lots_to_quantity
 
     @property
     def best_bid(self) -> Optional[float]:
         """Returns the highest bid price"""
-        return self.bids.keys()[0] if self.bids else None
+        return self._price_out(self.bids.peekitem(0)[0]) if self.bids else None
 
     @property
     def best_ask(self) -> Optional[float]:
         """Returns the lowest ask price"""
-        return self.asks.keys()[0] if self.asks else None
+        return self._price_out(self.asks.peekitem(0)[0]) if self.asks else None
 
-    def add_order(self, order: Order) -> List[dict]:
+    def add_order(self, order: Order) -> List[Trade]:
         """Add a new order to the book and process any immediate matches"""
-        self.orders[order.order_id] = order
+        return self._execute(OrderRecord.from_order(order, 0, self.instrument))
+
+    def add_orders(self, requests: Iterable[Union[Order, OrderCancel, OrderAmend]]) -> List[dict]:
+        """Returns one result per request after applying a batch of new orders, cancels and amends"""
+        prepared = []
+        for request in requests:
+            if isinstance(request, Order):
+                prepared.append((request, OrderRecord.from_order(request, 0, self.instrument)))
+            elif isinstance(request, OrderAmend):
+                prepared.append((request, self._amend_terms(request.quantity, request.price)))
+            else:
+                prepared.append((request, None))
+
+        results = []
+        for request, value in prepared:
+            if value is None:
+                results.append({"order_id": request.order_id, "cancelled": self.cancel_order(request.order_id)})
+            elif isinstance(request, OrderAmend):
+                results.append(self._amend(request.order_id, *value))
+            else:
+                results.append({"order": request, "trades": self._execute(value)})
+        return results
+
+    def _execute(self, record: OrderRecord) -> List[Trade]:
+        """Assign an internal id to a validated record and match it"""
+        metrics = self.metrics
+        start = time.perf_counter_ns() if metrics is not None else 0
+        record.oid = record.priority = self._next_oid
+        self._next_oid += 1
+        order_type = record.order_type
+
+        if order_type in _STOP_TYPES:
+            if self._stop_triggered(record.side, record.stop_price):
+                self._activate(record)
+            else:
+                self._add_stop(record)
+
+        if record.order_type in _STOP_TYPES:
+            trades = []  # Waiting for its trigger
+        elif record.order_type == OrderType.MARKET:
+            trades = self._process_market_order(record)
+        elif record.order_type in [OrderType.IOC, OrderType.FOK]:
+            trades = self._process_immediate_order(record)
+        else:
+            trades = self._process_limit_order(record)
+
+        record.sync(self.instrument)
+        if record.order_id not in self.orders and record.order_id not in self.stop_orders:
+            self.history.add(record)  # Did not rest on the book
+
+        if self._triggering:
+            return trades  # A stop fired inside a cascade, accounted for by the order that set it off
+        if trades and (self.buy_stops or self.sell_stops):
+            trades.extend(self._fire_stops())
+        if metrics is not None:
+            metrics.orders[order_type] += 1
+            metrics.trades += len(trades)
+            metrics.add_order.record(time.perf_counter_ns() - start)
+        return trades
 
-        if order.order_type == OrderType.MARKET:
-            return self._process_market_order(order)
-        elif order.order_type in [OrderType.IOC, OrderType.FOK]:
-            return self._process_immediate_order(order)
-        return self._process_limit_order(order)
+    def _stop_triggered(self, side: OrderSide, stop_price) -> bool:
+        """Whether the last trade price has reached a stop price"""
+        last = self.last_trade_price
+        if last is None:
+            return False
+        return last >= stop_price if side == OrderSide.BUY else last <= stop_price
+
+    def _activate(self, record: OrderRecord) -> None:
+        """Turn a triggered stop into the order it stands for"""
+        record.order_type = OrderType.MARKET if record.order_type == OrderType.STOP else OrderType.LIMIT
+
+    def _add_stop(self, record: OrderRecord) -> None:
+        """Park a stop order in its side's trigger book"""
+        stops = self.buy_stops if record.side == OrderSide.BUY else self.sell_stops
+        queue = stops.get(record.stop_price)
+        if queue is None:
+            queue = stops[record.stop_price] = PriceLevel(record.stop_price)
+        queue.append(record)
+        self.stop_orders[record.order_id] = record
+
+    def _remove_stop(self, record: OrderRecord) -> None:
+        stops = self.buy_stops if record.side == OrderSide.BUY else self.sell_stops
+        queue = stops[record.stop_price]
+        queue.remove(record.order_id)
+        if not queue:
+            del stops[record.stop_price]
+        del self.stop_orders[record.order_id]
+
+    def _next_triggered(self) -> Optional[OrderRecord]:
+        """Pop the first stop order the last trade price has reached, if any.
+
+        Only the head of each trigger book is compared, so finding nothing
+        to fire costs O(1) however many stops are waiting.
+        """
+        for side, stops in ((OrderSide.BUY, self.buy_stops), (OrderSide.SELL, self.sell_stops)):
+            if stops:
+                stop_price, queue = stops.peekitem(0)
+                if self._stop_triggered(side, stop_price):
+                    record = queue.head
+                    self._remove_stop(record)
+                    return record
+        return None
+
+    def _fire_stops(self) -> List[Trade]:
+        """Returns the trades of every stop order set off by the last trade price, cascades included"""
+        trades = []
+        self._triggering = True
+        try:
+            record = self._next_triggered()
+            while record is not None:
+                self._activate(record)
+                trades.extend(self._execute(record))
+                if self.metrics is not None:
+                    self.metrics.stops_triggered += 1
+                record = self._next_triggered()
+        finally:
+            self._triggering = False
+        return trades
 
-    def _process_market_order(self, order: Order) -> List[dict]:
+    def _process_market_order(self, order: OrderRecord) -> List[Trade]:
         """Process a market order"""
         trades = []
         opposite_side = self.asks if order.side == OrderSide.BUY else self.bids
@@ -46,34 +226,29 @@ class OrderBook:
             return trades
 
         while order.remaining_quantity > 0 and opposite_side:
-            best_price = opposite_side.keys()[0]
+            best_price = opposite_side.peekitem(0)[0]
             trades.extend(self._match_at_price_level(order, best_price))
 
-            if order.remaining_quantity > 0:
-                if not opposite_side:
-                    order.status = OrderStatus.PARTIAL if order.filled_quantity > 0 else OrderStatus.CANCELLED
-                    break
-                elif order.order_type == OrderType.FOK:
-                    order.status = OrderStatus.CANCELLED
-                    trades = []  # Clear trades for FOK orders that can't be fully filled
-                    break
+            if order.remaining_quantity > 0 and not opposite_side:
+                order.status = OrderStatus.PARTIAL if order.filled_quantity > 0 else OrderStatus.CANCELLED
+                break
 
         if order.remaining_quantity == 0:
             order.status = OrderStatus.FILLED
 
         return trades
 
-    def _process_limit_order(self, order: Order) -> List[dict]:
+    def _process_limit_order(self, order: OrderRecord) -> List[Trade]:
         """Process a limit order"""
         trades = []
 
         # Try to match against existing orders
-        if order.side == OrderSide.BUY and self.asks and order.price >= self.best_ask:
-            while order.remaining_quantity > 0 and self.asks and order.price >= self.best_ask:
-                trades.extend(self._match_at_price_level(order, self.best_ask))
-        elif order.side == OrderSide.SELL and self.bids and order.price <= self.best_bid:
-            while order.remaining_quantity > 0 and self.bids and order.price <= self.best_bid:
-                trades.extend(self._match_at_price_level(order, self.best_bid))
+        if order.side == OrderSide.BUY:
+            while order.remaining_quantity > 0 and self.asks and order.price >= self.asks.peekitem(0)[0]:
+                trades.extend(self._match_at_price_level(order, self.asks.peekitem(0)[0]))
+        else:
+            while order.remaining_quantity > 0 and self.bids and order.price <= self.bids.peekitem(0)[0]:
+                trades.extend(self._match_at_price_level(order, self.bids.peekitem(0)[0]))
 
         # Add any remaining quantity to the book
         if order.remaining_quantity > 0:
@@ -81,157 +256,598 @@ class OrderBook:
 
         return trades
 
-    def _process_immediate_order(self, order: Order) -> List[dict]:
-        """Process IOC or FOK orders"""
-        if order.order_type == OrderType.FOK:
-            # For FOK, check if we can fill the entire quantity first
-            opposite_side = self.asks if order.side == OrderSide.BUY else self.bids
-            if not opposite_side:
-                order.status = OrderStatus.CANCELLED
-                return []
-
-            total_available = 0
-            for price in opposite_side.keys():
-                if (order.side == OrderSide.BUY and price > order.price) or \
-                   (order.side == OrderSide.SELL and price < order.price):
-                    break
-                total_available += opposite_side[price]
-                if total_available >= order.quantity:
-                    break
+    def _process_immediate_order(self, order: OrderRecord) -> List[Trade]:
+        """Process IOC or FOK orders, never trading through their limit price"""
+        # FOK is decided up front, so trades are never built and then discarded
+        if order.order_type == OrderType.FOK and \
+                self._quantity_within(order.side, order.price, order.remaining_quantity) < order.remaining_quantity:
+            order.status = OrderStatus.CANCELLED
+            return []
 
-            if total_available < order.quantity:
-                order.status = OrderStatus.CANCELLED
-                return []
+        trades = []
+        buying = order.side == OrderSide.BUY
+        opposite_side = self.asks if buying else self.bids
+        while order.remaining_quantity > 0 and opposite_side:
+            best_price = opposite_side.peekitem(0)[0]
+            if order.price is not None and (best_price > order.price if buying else best_price < order.price):
+                break
+            trades.extend(self._match_at_price_level(order, best_price))
+
+        if order.remaining_quantity == 0:
+            order.status = OrderStatus.FILLED
+        else:
+            # The unfilled remainder is cancelled
+            order.status = OrderStatus.PARTIAL if order.filled_quantity > 0 else OrderStatus.CANCELLED
+        return trades
+
+    def _quantity_within(self, side: OrderSide, limit_price: Optional[float] = None, needed: Optional[float] = None) -> float:
+        """Opposite-side quantity a taker on ``side`` can reach within ``limit_price``.
+
+        Uses the depth index when there is one; otherwise walks the levels,
+        stopping early once ``needed`` is reached. Iceberg reserves count.
+        """
+        if side == OrderSide.BUY:
+            levels, reserve, depth = self.asks, self.ask_reserve, self.ask_depth
+        else:
+            levels, reserve, depth = self.bids, self.bid_reserve, self.bid_depth
+        if depth is not None:
+            return depth.quantity_within(limit_price)
+
+        total = 0
+        for price, quantity in levels.items():
+            if limit_price is not None and (price > limit_price if side == OrderSide.BUY else price < limit_price):
+                break
+            total += quantity + reserve.get(price, 0)
+            if needed is not None and total >= needed:
+                break
+        return total
+
+    def quote_sweep(self, side: OrderSide, quantity: float, limit_price: Optional[float] = None) -> dict:
+        """Estimate what a taker order on ``side`` would fill right now, without trading.
+
+        Reports how much of ``quantity`` is available within ``limit_price``
+        (unbounded if None, iceberg reserves included, as for FOK checks),
+        the last price level reached and the average price and notional of
+        the fill.
+        """
+        if quantity <= 0:
+            raise ValueError("Quantity must be greater than 0")
+        buying = side == OrderSide.BUY
+        if buying:
+            levels, reserve, depth = self.asks, self.ask_reserve, self.ask_depth
+        else:
+            levels, reserve, depth = self.bids, self.bid_reserve, self.bid_depth
+        if depth is not None:
+            lots = self.instrument.quantity_to_lots(quantity)
+            limit = None if limit_price is None else self.instrument.price_to_ticks(limit_price)
+            filled, notional, last = depth.sweep(lots, limit)
+            filled_out = self.instrument.lots_to_quantity(filled)
+            notional_out = float(Decimal(notional) * self.instrument.tick_size * self.instrument.lot_size)
+        else:
+            filled = notional = 0
+            last = None
+            for price, level_quantity in levels.items():
+                if filled >= quantity or \
+                        (limit_price is not None and (price > limit_price if buying else price < limit_price)):
+                    break
+                take = min(level_quantity + reserve.get(price, 0), quantity - filled)
+                filled += take
+                notional += take * price
+                last = price
+            filled_out, notional_out = filled, notional
 
-        # Process like a market order
-        return self._process_market_order(order)
+        return {
+            "symbol": self.symbol,
+            "side": side,
+            "quantity": quantity,
+            "fillable_quantity": filled_out,
+            "fully_fillable": filled_out >= quantity,
+            "average_price": notional_out / filled_out if filled_out else None,
+            "worst_price": None if last is None else self._price_out(last),
+            "notional": notional_out
+        }
+
+    def _adjust_depth(self, side: OrderSide, price, quantity) -> None:
+        """Apply a change in resting quantity at a level to the depth index"""
+        depth = self.bid_depth if side == OrderSide.BUY else self.ask_depth
+        if depth is not None:
+            depth.add(price, quantity)
+
+    def _adjust_reserve(self, side: OrderSide, price, quantity) -> None:
+        """Apply a change in iceberg hidden quantity at a level to the reserve and the depth index"""
+        reserve = self.bid_reserve if side == OrderSide.BUY else self.ask_reserve
+        left = reserve.get(price, 0) + quantity
+        if left > 0:
+            reserve[price] = left
+        else:
+            reserve.pop(price, None)
+        self._adjust_depth(side, price, quantity)
 
-    def _match_at_price_level(self, incoming_order: Order, price_level: float) -> List[dict]:
+    def _match_at_price_level(self, incoming_order: OrderRecord, price_level: float) -> List[Trade]:
         """Match incoming order against resting orders at a price level"""
+        metrics = self.metrics
+        start = time.perf_counter_ns() if metrics is not None else 0
         trades = []
-        queue = self.ask_queues[price_level] if incoming_order.side == OrderSide.BUY else self.bid_queues[price_level]
+        if incoming_order.side == OrderSide.BUY:
+            level_side, levels, queue = OrderSide.SELL, self.asks, self.ask_queues.get(price_level)
+        else:
+            level_side, levels, queue = OrderSide.BUY, self.bids, self.bid_queues.get(price_level)
 
+        level_traded = 0  # Net quantity taken off the level
+        price_out = self._price_out(price_level)
+        timestamp_ns = time.time_ns()  # One matching pass shares a timestamp
         while queue and incoming_order.remaining_quantity > 0:
-            resting_order = queue[0]
+            resting_order = queue.head
             traded_quantity = min(incoming_order.remaining_quantity, resting_order.remaining_quantity)
 
-            trade = {
-                "timestamp": datetime.utcnow(),
-                "symbol": self.symbol,
-                "trade_id": f"trade_{datetime.utcnow().timestamp()}",
-                "price": price_level,
-                "quantity": traded_quantity,
-                "aggressor_side": incoming_order.side.value,
-                "maker_order_id": resting_order.order_id,
-                "taker_order_id": incoming_order.order_id
-            }
+            trade = Trade(
+                self._next_trade_id,
+                timestamp_ns,
+                self.symbol,
+                price_out,
+                self._quantity_out(traded_quantity),
+                incoming_order.side,
+                resting_order.order_id,
+                incoming_order.order_id,
+                resting_order.oid,
+                incoming_order.oid,
+            )
+            self._next_trade_id += 1
             trades.append(trade)
+            self.trade_tape.append(trade)
 
             # Update quantities
             incoming_order.filled_quantity += traded_quantity
             incoming_order.remaining_quantity -= traded_quantity
             resting_order.filled_quantity += traded_quantity
             resting_order.remaining_quantity -= traded_quantity
-
-            if resting_order.remaining_quantity == 0:
+            levels[price_level] -= traded_quantity
+            level_traded += traded_quantity
+
+            if resting_order.remaining_quantity == 0 and resting_order.hidden_quantity:
+                # Iceberg slice used up: the same record shows its next slice from the back of the queue,
+                # keeping its oid but taking a new priority, so queue order stays the priority order
+                # the L3 cursor relies on
+                reload = min(resting_order.display_quantity, resting_order.hidden_quantity)
+                resting_order.hidden_quantity -= reload
+                resting_order.remaining_quantity = reload
+                resting_order.status = OrderStatus.PARTIAL
+                resting_order.priority = self._next_oid
+                self._next_oid += 1
+                queue.pop_head()
+                queue.append(resting_order)
+                levels[price_level] += reload
+                level_traded -= reload
+                self._adjust_reserve(level_side, price_level, -reload)
+            elif resting_order.remaining_quantity == 0:
                 resting_order.status = OrderStatus.FILLED
-                queue.pop(0)
+                resting_order.sync(self.instrument)  # Makers still resting are synced when read back
+                queue.pop_head()
+                self._forget(resting_order)
+                self.history.add(resting_order)
                 if not queue:
                     self._remove_price_level(price_level, resting_order.side)
+            else:
+                resting_order.status = OrderStatus.PARTIAL
 
             if incoming_order.remaining_quantity == 0:
                 incoming_order.status = OrderStatus.FILLED
             elif incoming_order.filled_quantity > 0:
                 incoming_order.status = OrderStatus.PARTIAL
 
+        if trades:
+            self.last_trade_price = price_level
+            self._adjust_depth(level_side, price_level, -level_traded)
+            self._level_changed(level_side, price_level, levels.get(price_level, 0))
+
+        if metrics is not None:
+            metrics.levels_matched += 1
+            metrics.match_level.record(time.perf_counter_ns() - start)
         return trades
 
     def get_all_bids(self) -> List[Dict[str, float]]:
         """Returns all bid orders aggregated by price level."""
         return [{
-            "price": float(price),
-            "quantity": sum(order.remaining_quantity for order in self.bid_queues[price])
-        } for price in self.bids.keys()]
+            "price": self._price_out(price),
+            "quantity": self._quantity_out(quantity)
+        } for price, quantity in self.bids.items()]
 
     def get_all_asks(self) -> List[Dict[str, float]]:
         """Returns all ask orders aggregated by price level."""
         return [{
-            "price": float(price),
-            "quantity": sum(order.remaining_quantity for order in self.ask_queues[price])
-        } for price in self.asks.keys()]
-
-    def _add_to_book(self, order: Order) -> None:
-        """Add an order to the order book"""
+            "price": self._price_out(price),
+            "quantity": self._quantity_out(quantity)
+        } for price, quantity in self.asks.items()]
+
+    def get_all_levels(self) -> Dict[str, List[Dict[str, float]]]:
+        """Both sides aggregated by price level, read together so they are consistent."""
+        return {"bids": self.get_all_bids(), "asks": self.get_all_asks()}
+
+    def get_orders(
+        self,
+        side: OrderSide,
+        cursor: Optional[str] = None,
+        limit: int = 1000,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+    ) -> dict:
+        """Returns one page of resting orders on a side in priority order, with a cursor for the next"""
+        if limit <= 0:
+            raise ValueError("Limit must be greater than 0")
+        buying = side == OrderSide.BUY
+        levels, queues = (self.bids, self.bid_queues) if buying else (self.asks, self.ask_queues)
+        to_key = float if self.instrument is None else self.instrument.price_to_ticks
+        low = None if min_price is None else to_key(min_price)
+        high = None if max_price is None else to_key(max_price)
+        start, end = (high, low) if buying else (low, high)
+
+        resume_price = after_id = None
+        after_priority = 0
+        if cursor is not None:
+            price_text, priority_text, after_id = cursor.split(":", 2)
+            resume_price = float(price_text) if self.instrument is None else int(price_text)
+            after_priority = int(priority_text)
+            if start is None or (resume_price < start if buying else resume_price > start):
+                start = resume_price
+
+        price_out, quantity_out = self._price_out, self._quantity_out
+        orders = []
+        next_cursor = None  # Names the last order appended
+        for price in (levels.keys() if start is None else levels.irange(start)):
+            if end is not None and (price < end if buying else price > end):
+                break
+            queue = queues[price]
+            for record in queue.after(after_id, after_priority) if price == resume_price else queue:
+                if len(orders) == limit:
+                    return {"symbol": self.symbol, "side": side, "orders": orders, "next_cursor": next_cursor}
+                orders.append({
+                    "order_id": record.order_id,
+                    "price": price_out(price),
+                    "quantity": quantity_out(record.remaining_quantity),
+                    "timestamp_ns": record.timestamp_ns
+                })
+                next_cursor = f"{price!r}:{record.priority}:{record.order_id}"
+        return {"symbol": self.symbol, "side": side, "orders": orders, "next_cursor": None}
+
+    def _add_to_book(self, order: OrderRecord) -> None:
+        """Add an order to the order book, showing only the first slice of an iceberg"""
+        display = order.display_quantity
+        if display is not None and order.remaining_quantity > display:
+            order.hidden_quantity = order.remaining_quantity - display
+            order.remaining_quantity = display
+            self._adjust_reserve(order.side, order.price, order.hidden_quantity)
         if order.side == OrderSide.BUY:
-            if order.price not in self.bids:
-                self.bids[order.price] = order.remaining_quantity
-            else:
-                self.bids[order.price] += order.remaining_quantity
-            self.bid_queues[order.price].append(order)
+            levels, queues = self.bids, self.bid_queues
         else:
-            if order.price not in self.asks:
-                self.asks[order.price] = order.remaining_quantity
-            else:
-                self.asks[order.price] += order.remaining_quantity
-            self.ask_queues[order.price].append(order)
+            levels, queues = self.asks, self.ask_queues
+
+        queue = queues.get(order.price)
+        if queue is None:
+            queue = queues[order.price] = PriceLevel(order.price)
+        if order.price not in levels:
+            levels[order.price] = order.remaining_quantity
+        else:
+            levels[order.price] += order.remaining_quantity
+        queue.append(order)
+        self.orders[order.order_id] = order
+        if order.owner is not None:
+            self.owner_orders.setdefault(order.owner, {})[order.order_id] = order
+        self._adjust_depth(order.side, order.price, order.remaining_quantity)
+        self._level_changed(order.side, order.price, levels[order.price])
+
+    def _level_changed(self, side: OrderSide, price: float, quantity: float) -> None:
+        """Record the new aggregate quantity of a price level for the delta feed"""
+        self.sequence += 1
+        if side == OrderSide.BUY:
+            self._bid_changes[price] = quantity
+            self._bid_version += 1
+        else:
+            self._ask_changes[price] = quantity
+            self._ask_version += 1
+
+    def drain_level_changes(self) -> Optional[dict]:
+        """Returns the price levels changed since the last drain as an L2 delta, or None"""
+        if self.sequence == self._drained_sequence:
+            return None
+
+        update = {
+            "type": "l2update",
+            "symbol": self.symbol,
+            "start_sequence": self._drained_sequence + 1,
+            "sequence": self.sequence,
+            "bids": [[self._price_out(price), self._quantity_out(quantity)] for price, quantity in self._bid_changes.items()],
+            "asks": [[self._price_out(price), self._quantity_out(quantity)] for price, quantity in self._ask_changes.items()]
+        }
+        self._bid_changes = {}
+        self._ask_changes = {}
+        self._drained_sequence = self.sequence
+        return update
 
     def _remove_price_level(self, price: float, side: OrderSide) -> None:
         """Remove a price level from the order book"""
         if side == OrderSide.BUY:
-            if price in self.bids:
-                del self.bids[price]
-                del self.bid_queues[price]
+            self.bids.pop(price, None)
+            self.bid_queues.pop(price, None)
         else:
-            if price in self.asks:
-                del self.asks[price]
-                del self.ask_queues[price]
+            self.asks.pop(price, None)
+            self.ask_queues.pop(price, None)
 
     def cancel_order(self, order_id: str) -> bool:
-        """Cancel an order in the book"""
-        if order_id not in self.orders:
-            return False
+        """Cancel an order in the book, or a stop order still waiting for its trigger"""
+        order = self.orders.get(order_id)
+        if order is None:
+            order = self.stop_orders.get(order_id)
+            if order is None:
+                return False
+        metrics = self.metrics
+        start = time.perf_counter_ns() if metrics is not None else 0
+
+        if order.order_type in _STOP_TYPES:
+            self._remove_stop(order)
+        else:
+            self._unlink(order)
+            self._forget(order)
+        order.status = OrderStatus.CANCELLED
+        order.sync(self.instrument)
+        self.history.add(order)
 
-        order = self.orders[order_id]
-        if order.status in [OrderStatus.FILLED, OrderStatus.CANCELLED]:
-            return False
+        if metrics is not None:
+            metrics.cancels += 1
+            metrics.cancel_order.record(time.perf_counter_ns() - start)
+        return True
 
+    def _forget(self, order: OrderRecord) -> None:
+        """Drop an order that left the book from the order and owner indexes"""
+        del self.orders[order.order_id]
+        if order.owner is not None:
+            owned = self.owner_orders.get(order.owner)
+            if owned is not None:
+                owned.pop(order.order_id, None)
+                if not owned:
+                    del self.owner_orders[order.owner]
+
+    def mass_cancel(
+        self,
+        owner: Optional[str] = None,
+        side: Optional[OrderSide] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+    ) -> List[str]:
+        """Returns the ids of the resting and stop orders cancelled for matching the filters"""
+        to_key = float if self.instrument is None else self.instrument.price_to_ticks
+        low = None if min_price is None else to_key(min_price)
+        high = None if max_price is None else to_key(max_price)
+
+        cancelled = []
+        for level_side in (OrderSide.BUY, OrderSide.SELL) if side is None else (side,):
+            buying = level_side == OrderSide.BUY
+            levels, queues = (self.bids, self.bid_queues) if buying else (self.asks, self.ask_queues)
+            if owner is not None:
+                selected = defaultdict(list)  # price -> the owner's orders there
+                for record in self.owner_orders.get(owner, {}).values():
+                    if record.side == level_side and (low is None or record.price >= low) \
+                            and (high is None or record.price <= high):
+                        selected[record.price].append(record)
+            else:
+                first, last = (high, low) if buying else (low, high)
+                selected = {}
+                for price in (levels.keys() if first is None else levels.irange(first)):
+                    if last is not None and (price < last if buying else price > last):
+                        break
+                    selected[price] = None  # The whole level
+
+            for price, records in selected.items():
+                queue = queues[price]
+                if records is None or len(records) == len(queue):
+                    records = list(queue)
+                    removed, left = levels[price], 0
+                    self._remove_price_level(price, level_side)
+                else:
+                    removed = 0
+                    for record in records:
+                        queue.remove(record.order_id)
+                        removed += record.remaining_quantity
+                    left = levels[price] = levels[price] - removed
+                self._adjust_depth(level_side, price, -removed)
+                hidden = sum(record.hidden_quantity for record in records)
+                if hidden:
+                    self._adjust_reserve(level_side, price, -hidden)
+                self._level_changed(level_side, price, left)
+
+                for record in records:
+                    self._forget(record)
+                    record.status = OrderStatus.CANCELLED
+                    record.sync(self.instrument)
+                    self.history.add(record)
+                    cancelled.append(record.order_id)
+
+        for record in list(self.stop_orders.values()):
+            if (owner is None or record.owner == owner) and (side is None or record.side == side) \
+                    and (low is None or record.stop_price >= low) and (high is None or record.stop_price <= high):
+                self._remove_stop(record)
+                record.status = OrderStatus.CANCELLED
+                record.sync(self.instrument)
+                self.history.add(record)
+                cancelled.append(record.order_id)
+
+        if self.metrics is not None:
+            self.metrics.cancels += len(cancelled)
+        return cancelled
+
+    def _unlink(self, order: OrderRecord) -> None:
+        """Take a resting order off its level queue and out of the level aggregates"""
         if order.side == OrderSide.BUY:
-            self.bids[order.price] -= order.remaining_quantity
-            if self.bids[order.price] <= 0:
-                del self.bids[order.price]
-            queue = self.bid_queues[order.price]
+            levels, queue = self.bids, self.bid_queues.get(order.price)
         else:
-            self.asks[order.price] -= order.remaining_quantity
-            if self.asks[order.price] <= 0:
-                del self.asks[order.price]
-            queue = self.ask_queues[order.price]
-
-        queue.remove(order)
-        if not queue:
-            self._remove_price_level(order.price, order.side)
+            levels, queue = self.asks, self.ask_queues.get(order.price)
+
+        # Unlinking from the level queue is O(1) regardless of its depth
+        if queue is not None and queue.remove(order.order_id) is not None:
+            levels[order.price] -= order.remaining_quantity
+            self._adjust_depth(order.side, order.price, -order.remaining_quantity)
+            if order.hidden_quantity:
+                self._adjust_reserve(order.side, order.price, -order.hidden_quantity)
+            if not queue:
+                self._remove_price_level(order.price, order.side)
+            self._level_changed(order.side, order.price, levels.get(order.price, 0))
+
+    def amend_order(self, order_id: str, quantity: Optional[float] = None, price: Optional[float] = None) -> dict:
+        """Returns the result of changing the price and/or total quantity of a resting order"""
+        return self._amend(order_id, *self._amend_terms(quantity, price))
+
+    def _amend_terms(self, quantity: Optional[float], price: Optional[float]) -> tuple:
+        """Validate an amend's new terms and convert them to book units"""
+        if quantity is None and price is None:
+            raise ValueError("An amend must change the quantity or the price")
+        if quantity is not None and quantity <= 0:
+            raise ValueError("Quantity must be greater than 0")
+        if price is not None and price <= 0:
+            raise ValueError("Price must be greater than 0")
+        if self.instrument is None:
+            return quantity, price
+        return (
+            None if quantity is None else self.instrument.quantity_to_lots(quantity),
+            None if price is None else self.instrument.price_to_ticks(price),
+        )
+
+    def _amend(self, order_id: str, quantity, price) -> dict:
+        record = self.orders.get(order_id)
+        if record is None:
+            return {"order_id": order_id, "amended": False, "reason": "Order is not resting"}
+        quantity = record.quantity if quantity is None else quantity
+        price = record.price if price is None else price
+        if quantity <= record.filled_quantity:
+            return {"order_id": order_id, "amended": False, "reason": "Quantity must exceed the filled quantity"}
+
+        remaining = quantity - record.filled_quantity
+        hidden = record.hidden_quantity
+        priority_kept = price == record.price and remaining <= record.remaining_quantity + hidden
+        if priority_kept:
+            # An iceberg gives up hidden quantity first, so its displayed slice shrinks last
+            reduction = record.remaining_quantity + hidden - remaining
+            record.hidden_quantity = hidden - min(hidden, reduction)
+            if hidden != record.hidden_quantity:
+                self._adjust_reserve(record.side, price, record.hidden_quantity - hidden)
+            reduction -= hidden - record.hidden_quantity
+            record.quantity = quantity
+            if reduction:
+                levels = self.bids if record.side == OrderSide.BUY else self.asks
+                record.remaining_quantity -= reduction
+                levels[price] -= reduction
+                self._adjust_depth(record.side, price, -reduction)
+                self._level_changed(record.side, price, levels[price])
+            trades = []
+        else:
+            self._unlink(record)
+            self._forget(record)
+            record.price, record.quantity, record.remaining_quantity = price, quantity, remaining
+            record.hidden_quantity = 0  # Re-split when it rests again
+            trades = self._execute(record)
 
-        del self.orders[order_id]
-        order.status = OrderStatus.CANCELLED
-        return True
+        record.sync(self.instrument, terms=True)
+        return {
+            "order_id": order_id,
+            "amended": True,
+            "priority_kept": priority_kept,
+            "trades": trades,
+            "order": self.get_order(order_id)
+        }
+
+    def enable_metrics(self) -> None:
+        """Start collecting counters and latency histograms (off by default)"""
+        if self.metrics is None:
+            self.metrics = BookMetrics()
+
+    def get_metrics(self) -> Optional[dict]:
+        """Returns collected metrics plus current book gauges, or None if disabled"""
+        if self.metrics is None:
+            return None
+        summary = self.metrics.summary()
+        summary.update({
+            "bid_levels": len(self.bids),
+            "ask_levels": len(self.asks),
+            "resting_orders": len(self.orders),
+            "pending_stops": len(self.stop_orders),
+            "sequence": self.sequence
+        })
+        return summary
+
+    def get_trades(self, after_trade_id: int = 0, limit: int = 100) -> List[Trade]:
+        """Returns up to ``limit`` trades from the tape newer than ``after_trade_id``"""
+        return list(islice(self.trade_tape.since(after_trade_id), limit))
+
+    def live_orders(self, order_ids: Iterable[str]) -> List[str]:
+        """Those of ``order_ids`` still resting or waiting for their stop trigger"""
+        return [order_id for order_id in order_ids if order_id in self.orders or order_id in self.stop_orders]
+
+    def get_order(self, order_id: str) -> Optional[dict]:
+        """Returns the state of a resting or recently completed order, or None"""
+        record = self.orders.get(order_id) or self.stop_orders.get(order_id) or self.history.get(order_id)
+        if record is None:
+            return None
+        record.sync(self.instrument)
+        return {
+            "order_id": record.order_id,
+            "symbol": self.symbol,
+            "side": record.side,
+            "order_type": record.order_type,
+            "price": None if record.price is None else self._price_out(record.price),
+            "stop_price": None if record.stop_price is None else self._price_out(record.stop_price),
+            "quantity": self._quantity_out(record.quantity),
+            "filled_quantity": self._quantity_out(record.filled_quantity),
+            "remaining_quantity": self._quantity_out(record.remaining_quantity + record.hidden_quantity),
+            "display_quantity": None if record.display_quantity is None else self._quantity_out(record.display_quantity),
+            "status": record.status,
+            "owner": record.owner,
+            "resting": order_id in self.orders
+        }
+
+    def memory_stats(self) -> dict:
+        """Counts and approximate sizes of the book's order storage"""
+        record_size = sys.getsizeof(OrderRecord.__new__(OrderRecord))
+        return {
+            "symbol": self.symbol,
+            "resting_orders": len(self.orders),
+            "history_orders": len(self.history),
+            "history_evictions": self.history.evictions,
+            "bid_levels": len(self.bids),
+            "ask_levels": len(self.asks),
+            "approx_bytes": (
+                sys.getsizeof(self.orders)
+                + sys.getsizeof(self.history)
+                + record_size * (len(self.orders) + len(self.history))
+            )
+        }
+
+    def _top_levels(self, levels, depth: int) -> List[List[float]]:
+        """Best ``depth`` levels of one side, best first, in O(depth)"""
+        price_out, quantity_out = self._price_out, self._quantity_out
+        return [[price_out(price), quantity_out(quantity)] for price, quantity in islice(levels.items(), depth)]
+
+    def get_order_book_snapshot(self, depth: Optional[int] = 10) -> dict:
+        """Get current order book state up to specified depth (every level if None).
+
+        Levels are cached per depth and a side is only rebuilt when one of
+        its levels changed since the previous call, so polling a quiet book
+        only copies the cached rows instead of walking and converting levels.
+        """
+        if depth is not None and depth < 0:
+            raise ValueError("Depth must not be negative")
+        cached = self._depth_cache.get(depth)
+        if cached is None:
+            if len(self._depth_cache) >= _DEPTH_CACHE_SIZE:
+                self._depth_cache.clear()
+            cached = self._depth_cache[depth] = [-1, None, -1, None]
+        if cached[0] != self._bid_version:
+            cached[0], cached[1] = self._bid_version, self._top_levels(self.bids, depth)
+        if cached[2] != self._ask_version:
+            cached[2], cached[3] = self._ask_version, self._top_levels(self.asks, depth)
 
-    def get_order_book_snapshot(self, depth: int = 10) -> dict:
-        """Get current order book state up to specified depth"""
-        bids = []
-        asks = []
-        
-        # Get top bids (highest prices)
-        bid_prices = list(reversed(list(self.bids.keys())))[:depth]
-        for price in bid_prices:
-            bids.append([float(price), float(self.bids[price])])
-        
-        # Get top asks (lowest prices)
-        ask_prices = list(self.asks.keys())[:depth]
-        for price in ask_prices:
-            asks.append([float(price), float(self.asks[price])])
-        
         return {
+            "type": "snapshot",
             "timestamp": datetime.utcnow().isoformat(),
             "symbol": self.symbol,
-            "bids": bids,
-            "asks": asks
+            "sequence": self.sequence,
+            "bids": [list(row) for row in cached[1]],  # Copies, so callers cannot edit the cache
+            "asks": [list(row) for row in cached[3]]
         }
\ No newline at end of file
@@ -0,0 +1,268 @@
+from itertools import chain
+from typing import Iterator, List, Optional, Tuple
+from sortedcontainers import SortedDict
+
+
+class PriceLadder:
+    """Tick-indexed price level map for one side of a fixed-point book.
+
+    A drop-in replacement for the ``SortedDict`` used for ``bids``/``asks``
+    when prices are integer ticks clustered within a band. Levels live in a
+    flat array indexed by ``tick - base``, occupancy is tracked in an integer
+    bitmap and the best level is cached, so lookups, inserts and best-price
+    queries avoid the sorted insert of a ``SortedDict``. When a tick falls
+    outside the current window the ladder is recentered around the occupied
+    range, growing the array if the band no longer fits.
+
+    The window never grows past ``max_capacity`` ticks. Levels that cannot
+    fit alongside the best price (a stray order far from the market) are
+    kept in a sparse ``SortedDict`` instead, so one outlier costs a dict
+    entry rather than a window spanning the whole gap.
+    """
+
+    def __init__(self, descending: bool = False, capacity: int = 1024, max_capacity: int = 1 << 16):
+        """Initialize an empty ladder; ``descending`` orders bids best-first"""
+        if capacity <= 0 or max_capacity < capacity:
+            raise ValueError("Capacity must be greater than 0 and at most max_capacity")
+        self.descending = descending
+        self.max_capacity = max_capacity
+        self._capacity = capacity
+        self._base: Optional[int] = None  # Tick stored at index 0
+        self._levels: List[Optional[float]] = [None] * capacity
+        self._bitmap = 0  # Bit i set when index i holds a level
+        self._count = 0
+        self._best = -1  # Index of the best level, -1 when empty
+        self._far = SortedDict()  # Tick -> quantity for levels outside the window
+
+    def __len__(self) -> int:
+        return self._count + len(self._far)
+
+    def __bool__(self) -> bool:
+        return self._count > 0 or bool(self._far)
+
+    def __contains__(self, tick: int) -> bool:
+        index = self._index(tick)
+        if index < 0:
+            return tick in self._far
+        return self._levels[index] is not None
+
+    def __getitem__(self, tick: int):
+        index = self._index(tick)
+        if index < 0:
+            return self._far[tick]
+        if self._levels[index] is None:
+            raise KeyError(tick)
+        return self._levels[index]
+
+    def __setitem__(self, tick: int, quantity) -> None:
+        index = self._index(tick)
+        if index < 0:
+            if tick in self._far or not self._recenter(tick):
+                self._far[tick] = quantity
+                return
+            index = tick - self._base
+        if self._levels[index] is None:
+            self._bitmap |= 1 << index
+            self._count += 1
+            best = self._best
+            if best < 0 or (index > best if self.descending else index < best):
+                self._best = index
+        self._levels[index] = quantity
+
+    def __delitem__(self, tick: int) -> None:
+        index = self._index(tick)
+        if index < 0:
+            del self._far[tick]
+            return
+        if self._levels[index] is None:
+            raise KeyError(tick)
+        self._levels[index] = None
+        self._bitmap &= ~(1 << index)
+        self._count -= 1
+        if index == self._best:
+            self._best = self._find_best()
+
+    def __iter__(self) -> Iterator[int]:
+        return self.keys()
+
+    def get(self, tick: int, default=None):
+        """Returns the quantity at a tick, or default if there is no level"""
+        index = self._index(tick)
+        if index < 0:
+            return self._far.get(tick, default)
+        if self._levels[index] is None:
+            return default
+        return self._levels[index]
+
+    def pop(self, tick: int, default=None):
+        """Remove a level and return its quantity, or default if absent"""
+        index = self._index(tick)
+        if index < 0:
+            return self._far.pop(tick, default)
+        if self._levels[index] is None:
+            return default
+        quantity = self._levels[index]
+        del self[tick]
+        return quantity
+
+    def peekitem(self, index: int = -1) -> Tuple[int, float]:
+        """Returns the best (index 0) or worst (index -1) level"""
+        if index not in (0, -1):
+            raise IndexError("PriceLadder only supports peeking the best or worst level")
+        if not self._far:
+            if not self._count:
+                raise IndexError("peekitem on empty ladder")
+            position = self._best if index == 0 else self._find_worst()
+            return self._base + position, self._levels[position]
+        tick = next(self.keys()) if index == 0 else self._worst_tick()
+        return tick, self[tick]
+
+    def keys(self) -> Iterator[int]:
+        """Iterate level ticks best-first"""
+        if not self._far:
+            return (self._base + index for index in self._indices())
+        before, after = self._far_ranges()
+        return chain(before, (self._base + index for index in self._indices()), after)
+
+    def values(self) -> Iterator[float]:
+        """Iterate level quantities best-first"""
+        for _, quantity in self.items():
+            yield quantity
+
+    def items(self) -> Iterator[Tuple[int, float]]:
+        """Iterate (tick, quantity) pairs best-first"""
+        if not self._far:
+            for index in self._indices():
+                yield self._base + index, self._levels[index]
+            return
+        far = self._far
+        before, after = self._far_ranges()
+        for tick in before:
+            yield tick, far[tick]
+        for index in self._indices():
+            yield self._base + index, self._levels[index]
+        for tick in after:
+            yield tick, far[tick]
+
+    def irange(self, minimum: int) -> Iterator[int]:
+        """Iterate level ticks best-first, starting at ``minimum`` (inclusive).
+
+        Matches ``SortedDict.irange`` under the book's key order: bids from
+        ``minimum`` downwards, asks from ``minimum`` upwards.
+        """
+        if not self:
+            return
+        before, after = self._far_ranges(minimum)
+        yield from before
+        index = minimum - self._base
+        bitmap = self._bitmap
+        if self.descending:
+            bitmap &= (1 << (min(index, self._capacity - 1) + 1)) - 1 if index >= 0 else 0
+        elif index > 0:
+            bitmap = bitmap >> index << index
+        for position in self._indices(bitmap):
+            yield self._base + position
+        yield from after
+
+    def _far_ranges(self, start: Optional[int] = None) -> Tuple[Iterator[int], Iterator[int]]:
+        """Sparse level ticks ranked ahead of and behind the window, best-first from ``start``"""
+        far, low, high = self._far, self._base, self._base + self._capacity - 1
+        if self.descending:
+            top = start
+            return (
+                far.irange(high + 1, top, reverse=True),
+                far.irange(None, low - 1 if top is None else min(top, low - 1), reverse=True),
+            )
+        return (
+            far.irange(start, low - 1),
+            far.irange(high + 1 if start is None else max(start, high + 1)),
+        )
+
+    def _worst_tick(self) -> int:
+        ticks = [self._far.peekitem(0 if self.descending else -1)[0]]
+        if self._count:
+            ticks.append(self._base + self._find_worst())
+        return min(ticks) if self.descending else max(ticks)
+
+    def _index(self, tick: int) -> int:
+        """Array index for a tick, or -1 if it lies outside the window"""
+        if self._base is None:
+            return -1
+        index = tick - self._base
+        return index if 0 <= index < self._capacity else -1
+
+    def _indices(self, bitmap: Optional[int] = None) -> Iterator[int]:
+        """Occupied indices in priority order, read off a copy of the bitmap"""
+        if bitmap is None:
+            bitmap = self._bitmap
+        if self.descending:
+            while bitmap:
+                index = bitmap.bit_length() - 1
+                yield index
+                bitmap ^= 1 << index
+        else:
+            while bitmap:
+                low = bitmap & -bitmap
+                yield low.bit_length() - 1
+                bitmap ^= low
+
+    def _lowest(self) -> int:
+        bitmap = self._bitmap
+        return (bitmap & -bitmap).bit_length() - 1
+
+    def _highest(self) -> int:
+        return self._bitmap.bit_length() - 1
+
+    def _find_best(self) -> int:
+        if not self._bitmap:
+            return -1
+        return self._highest() if self.descending else self._lowest()
+
+    def _find_worst(self) -> int:
+        return self._lowest() if self.descending else self._highest()
+
+    def _recenter(self, tick: int) -> bool:
+        """Move (and if needed grow) the window so it covers tick and all levels.
+
+        When that would take more than ``max_capacity`` ticks, the window is
+        moved onto tick only if tick is the new best price, pushing levels it
+        no longer covers into the sparse map; otherwise nothing moves and
+        False is returned, so the caller parks tick in the sparse map.
+        """
+        occupied = list(self.items())
+        if occupied:
+            low = min(tick, occupied[0][0], occupied[-1][0])
+            high = max(tick, occupied[0][0], occupied[-1][0])
+        else:
+            low = high = tick
+
+        span = high - low + 1
+        capacity = self._capacity
+        while capacity < 2 * span and capacity < self.max_capacity:
+            capacity = min(capacity * 2, self.max_capacity)
+        if span <= capacity:
+            base = low - (capacity - span) // 2
+        elif tick > occupied[0][0] if self.descending else tick < occupied[0][0]:
+            base = tick - capacity // 2
+        else:
+            return False
+
+        levels: List[Optional[float]] = [None] * capacity
+        bitmap = 0
+        far = SortedDict()
+        for level_tick, quantity in occupied:
+            index = level_tick - base
+            if 0 <= index < capacity:
+                levels[index] = quantity
+                bitmap |= 1 << index
+            else:
+                far[level_tick] = quantity
+
+        self._base = base
+        self._capacity = capacity
+        self._levels = levels
+        self._bitmap = bitmap
+        self._count = len(occupied) - len(far)
+        self._far = far
+        self._best = self._find_best()
+        return True
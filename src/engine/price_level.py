@@ -0,0 +1,93 @@
+from typing import Dict, Iterator, Optional
+from .order_record import OrderRecord
+
+
+class PriceLevel:
+    """FIFO queue of resting orders at a single price.
+
+    Orders are kept in an intrusive doubly-linked list (the ``prev``/``next``
+    slots of each ``OrderRecord``) with an order_id -> record index, so
+    appending, cancelling any order and popping the head are all O(1) while
+    preserving time priority.
+    """
+    __slots__ = ("price", "_head", "_tail", "_orders")
+
+    def __init__(self, price: Optional[float] = None):
+        self.price = price
+        self._head: Optional[OrderRecord] = None
+        self._tail: Optional[OrderRecord] = None
+        self._orders: Dict[str, OrderRecord] = {}
+
+    def __len__(self) -> int:
+        return len(self._orders)
+
+    def __bool__(self) -> bool:
+        return self._head is not None
+
+    def __contains__(self, order_id: str) -> bool:
+        return order_id in self._orders
+
+    def __iter__(self) -> Iterator[OrderRecord]:
+        """Iterate resting orders in time priority"""
+        record = self._head
+        while record is not None:
+            yield record
+            record = record.next
+
+    def after(self, order_id: str, priority: int) -> Iterator[OrderRecord]:
+        """Iterate orders queued behind ``order_id``.
+
+        If that order has since left the queue, resume behind the position
+        it held, i.e. at the first order with a ``priority`` above the given one.
+        """
+        record = self._orders.get(order_id)
+        if record is not None:
+            record = record.next
+        else:
+            record = self._head
+            while record is not None and record.priority <= priority:
+                record = record.next
+        while record is not None:
+            yield record
+            record = record.next
+
+    @property
+    def head(self) -> Optional[OrderRecord]:
+        """Returns the order with time priority at this level"""
+        return self._head
+
+    def append(self, record: OrderRecord) -> None:
+        """Add an order to the back of the queue"""
+        self._orders[record.order_id] = record
+        tail = self._tail
+        record.prev = tail
+        record.next = None
+        if tail is None:
+            self._head = record
+        else:
+            tail.next = record
+        self._tail = record
+
+    def remove(self, order_id: str) -> Optional[OrderRecord]:
+        """Unlink an order from anywhere in the queue"""
+        record = self._orders.pop(order_id, None)
+        if record is None:
+            return None
+        prev, nxt = record.prev, record.next
+        if prev is None:
+            self._head = nxt
+        else:
+            prev.next = nxt
+        if nxt is None:
+            self._tail = prev
+        else:
+            nxt.prev = prev
+        record.prev = record.next = None
+        return record
+
+    def pop_head(self) -> Optional[OrderRecord]:
+        """Remove and return the order with time priority"""
+        record = self._head
+        if record is None:
+            return None
+        return self.remove(record.order_id)
@@ -0,0 +1,239 @@
+"""Replay recorded order flow through OrderBooks, without the HTTP layer.
+
+Usage:
+    python -m src.engine.replay EVENTS [--trades CSV] [--top-of-book CSV]
+        [--chunk-size N] [--instrument SYMBOL:TICK:LOT] [--backend sorted|ladder]
+
+EVENTS is NDJSON (``.ndjson``/``.jsonl``, one object per line) or CSV with
+a header row. Each event has ``symbol``, ``order_id`` and, for new orders,
+``side``, ``order_type`` (default ``limit``), ``quantity`` and ``price``
+(plus ``stop_price`` for stop orders and an optional ``display_quantity``
+for iceberg limit orders); ``action`` is ``new`` (default) or ``cancel``.
+"""
+import argparse
+import csv
+import json
+import time
+from datetime import datetime
+from decimal import Decimal
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+from .instrument import Instrument
+from .order import Order, OrderType
+from .orderbook import OrderBook
+
+TRADE_COLUMNS = (
+    "trade_id", "timestamp_ns", "symbol", "price", "quantity",
+    "aggressor_side", "maker_order_id", "taker_order_id",
+)
+TOP_OF_BOOK_COLUMNS = ("event", "symbol", "best_bid", "best_ask")
+
+
+def read_events(path: str, chunk_size: int = 10_000) -> Iterator[List[dict]]:
+    """Stream events from an NDJSON or CSV file in lists of ``chunk_size``"""
+    with open(path, newline="") as handle:
+        if path.endswith(".csv"):
+            rows = csv.DictReader(handle)
+        else:
+            rows = (json.loads(line) for line in handle if line.strip())
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+
+class ReplayStats:
+    """Counters and timing for one replay run"""
+    __slots__ = ("events", "orders", "cancels", "rejected", "trades", "elapsed")
+
+    def __init__(self):
+        self.events = self.orders = self.cancels = self.rejected = self.trades = 0
+        self.elapsed = 0.0
+
+    @property
+    def events_per_sec(self) -> float:
+        return self.events / self.elapsed if self.elapsed else 0.0
+
+    def to_dict(self) -> dict:
+        result = {name: getattr(self, name) for name in self.__slots__}
+        result["events_per_sec"] = self.events_per_sec
+        return result
+
+
+class ReplayEngine:
+    """Drive one or many OrderBooks from chunks of recorded events.
+
+    Books are created on first use with ``book_factory(symbol)``. Trades
+    and top-of-book changes are collected as row tuples per chunk and handed
+    to ``trade_sink``/``top_of_book_sink`` in one list, so output is written
+    in bulk rather than per event. Malformed events and those the book
+    rejects (for example prices off the instrument tick) are counted and
+    skipped.
+    """
+
+    def __init__(
+        self,
+        book_factory: Callable[[str], OrderBook] = OrderBook,
+        trade_sink: Optional[Callable[[List[tuple]], None]] = None,
+        top_of_book_sink: Optional[Callable[[List[tuple]], None]] = None,
+    ):
+        self.book_factory = book_factory
+        self.books: Dict[str, OrderBook] = {}
+        self.trade_sink = trade_sink
+        self.top_of_book_sink = top_of_book_sink
+        self.stats = ReplayStats()
+        self._top_of_book: Dict[str, tuple] = {}
+
+    def run(self, chunks: Iterable[List[dict]]) -> ReplayStats:
+        """Replay every chunk and return the accumulated stats"""
+        for chunk in chunks:
+            start = time.perf_counter()
+            trade_rows, top_rows = self._replay_chunk(chunk)
+            self.stats.elapsed += time.perf_counter() - start
+            # Output cost is kept out of the measured matching rate
+            if self.trade_sink is not None and trade_rows:
+                self.trade_sink(trade_rows)
+            if self.top_of_book_sink is not None and top_rows:
+                self.top_of_book_sink(top_rows)
+        return self.stats
+
+    def _book(self, symbol: str) -> OrderBook:
+        book = self.books.get(symbol)
+        if book is None:
+            book = self.books[symbol] = self.book_factory(symbol)
+        return book
+
+    def _replay_chunk(self, chunk: List[dict]):
+        stats = self.stats
+        collect_trades = self.trade_sink is not None
+        collect_top = self.top_of_book_sink is not None
+        trade_rows = []
+        top_rows = []
+        last_top = self._top_of_book
+        timestamp = datetime.utcnow()  # Replayed orders share their chunk's wall-clock time
+
+        for event in chunk:
+            index = stats.events
+            stats.events += 1
+            symbol = event["symbol"]
+            book = self._book(symbol)
+            try:
+                if event.get("action", "new") == "cancel":
+                    stats.cancels += 1
+                    book.cancel_order(event["order_id"])
+                    trades = ()
+                else:
+                    stats.orders += 1
+                    trades = book.add_order(_make_order(event, timestamp))
+            except (KeyError, ValueError):
+                stats.rejected += 1
+                continue
+
+            stats.trades += len(trades)
+            if collect_trades:
+                trade_rows.extend(
+                    (t.trade_id, t.timestamp_ns, t.symbol, t.price, t.quantity,
+                     t.aggressor_side.value, t.maker_order_id, t.taker_order_id)
+                    for t in trades
+                )
+            if collect_top:
+                # Compare raw level keys; convert to prices only when the top changed
+                bids, asks = book.bids, book.asks
+                top = (bids.peekitem(0)[0] if bids else None, asks.peekitem(0)[0] if asks else None)
+                if last_top.get(symbol) != top:
+                    last_top[symbol] = top
+                    top_rows.append((index, symbol, book.best_bid, book.best_ask))
+        return trade_rows, top_rows
+
+
+def _make_order(event: dict, timestamp: datetime) -> Order:
+    """Build a validated Order from a raw event; raises ValueError for a malformed one"""
+    order_type = OrderType(event.get("order_type") or OrderType.LIMIT)
+    price = event.get("price")
+    price = None if price in (None, "") else price
+    stop_price = event.get("stop_price")
+    stop_price = None if stop_price in (None, "") else stop_price
+    display_quantity = event.get("display_quantity")
+    if order_type in (OrderType.LIMIT, OrderType.STOP_LIMIT) and price is None:
+        raise ValueError("Price is required for limit orders")
+    if (order_type in (OrderType.STOP, OrderType.STOP_LIMIT)) != (stop_price is not None):
+        raise ValueError("Stop price is required for stop orders, and only for them")
+    return Order(
+        order_id=str(event["order_id"]),
+        symbol=event["symbol"],
+        order_type=order_type,
+        side=event["side"],
+        quantity=event["quantity"],
+        price=price,
+        stop_price=stop_price,
+        display_quantity=None if display_quantity in (None, "") else display_quantity,
+        timestamp=timestamp,
+        remaining_quantity=event["quantity"]
+    )
+
+
+class CsvSink:
+    """Append rows to a CSV file with a header, one ``writerows`` per chunk"""
+
+    def __init__(self, path: str, columns: Iterable[str]):
+        self._handle = open(path, "w", newline="")
+        self._writer = csv.writer(self._handle)
+        self._writer.writerow(columns)
+
+    def __call__(self, rows: List[tuple]) -> None:
+        self._writer.writerows(rows)
+
+    def close(self) -> None:
+        self._handle.close()
+
+
+def _parse_instrument(value: str) -> Instrument:
+    symbol, tick_size, lot_size = value.split(":")
+    return Instrument(symbol=symbol, tick_size=Decimal(tick_size), lot_size=Decimal(lot_size))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("events", help="NDJSON or CSV file of order events")
+    parser.add_argument("--trades", help="Write trades to this CSV file")
+    parser.add_argument("--top-of-book", help="Write best bid/ask changes to this CSV file")
+    parser.add_argument("--chunk-size", type=int, default=10_000)
+    parser.add_argument(
+        "--instrument", action="append", type=_parse_instrument, default=[],
+        help="SYMBOL:TICK:LOT for a fixed-point book (repeatable)",
+    )
+    parser.add_argument("--backend", choices=("sorted", "ladder"), default="sorted")
+    args = parser.parse_args()
+
+    instruments = {instrument.symbol: instrument for instrument in args.instrument}
+
+    def book_factory(symbol: str) -> OrderBook:
+        instrument = instruments.get(symbol)
+        return OrderBook(symbol, instrument, args.backend if instrument is not None else "sorted")
+
+    sinks = []
+    if args.trades:
+        sinks.append(CsvSink(args.trades, TRADE_COLUMNS))
+    if args.top_of_book:
+        sinks.append(CsvSink(args.top_of_book, TOP_OF_BOOK_COLUMNS))
+    engine = ReplayEngine(
+        book_factory,
+        trade_sink=sinks[0] if args.trades else None,
+        top_of_book_sink=sinks[-1] if args.top_of_book else None,
+    )
+    try:
+        stats = engine.run(read_events(args.events, args.chunk_size))
+    finally:
+        for sink in sinks:
+            sink.close()
+
+    print(
+        f"{stats.events:,} events ({stats.orders:,} orders, {stats.cancels:,} cancels, "
+        f"{stats.rejected:,} rejected) -> {stats.trades:,} trades across {len(engine.books)} books"
+    )
+    print(f"{stats.elapsed:.3f}s matching, {stats.events_per_sec:,.0f} events/sec")
+
+
+if __name__ == "__main__":
+    main()
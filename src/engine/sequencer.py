@@ -0,0 +1,144 @@
+import os
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Callable, Iterable, Optional
+from loguru import logger
+from .journal import Journal, checkpoint_book
+from .orderbook import OrderBook
+
+
+class BookSequencer:
+    """Single writer for one OrderBook, running on a dedicated thread.
+
+    Every operation on the book is submitted as a command to an inbound
+    FIFO queue and executed by the worker thread in arrival order, so the
+    book never needs locking and processing order is deterministic. Callers
+    get a ``concurrent.futures.Future`` for the result, which asyncio code
+    can await with ``asyncio.wrap_future``. Long sweeps run off the event
+    loop thread instead of stalling it.
+
+    After each batch of commands drained from the queue, ``on_batch`` is
+    called on the worker thread with the book, which is the place to drain
+    market data changes. ``cpu_affinity`` pins the worker thread to a set
+    of CPUs (Linux only) so heavy symbols can be isolated.
+
+    With a ``journal``, every successful mutating command is appended to it
+    and the batch is committed (group commit) before any of its futures are
+    resolved or market data is published. With a ``snapshot_interval``,
+    once that many commands have been journaled since the last checkpoint
+    the book is snapshotted next to the journal and the journal truncated,
+    and a final checkpoint is taken on ``stop()``.
+    """
+
+    def __init__(
+        self,
+        book: OrderBook,
+        on_batch: Optional[Callable[[OrderBook], None]] = None,
+        cpu_affinity: Optional[Iterable[int]] = None,
+        max_batch: int = 256,
+        journal: Optional[Journal] = None,
+        snapshot_interval: int = 0,
+    ):
+        if snapshot_interval and journal is None:
+            raise ValueError("Snapshots require a journal")
+        self.book = book
+        self.journal = journal
+        self.snapshot_interval = snapshot_interval
+        self.on_batch = on_batch
+        self.cpu_affinity = set(cpu_affinity) if cpu_affinity is not None else None
+        self.max_batch = max_batch
+        self.commands_processed = 0
+        self._inbox: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name=f"sequencer-{book.symbol}", daemon=True)
+        self._started = False
+
+    def start(self) -> "BookSequencer":
+        """Start the worker thread"""
+        if not self._started:
+            self._started = True
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Process everything already queued, then stop the worker"""
+        if self._started:
+            self._inbox.put(None)
+            self._thread.join(timeout)
+        if self.journal is not None:
+            self.journal.close()
+
+    @property
+    def queue_depth(self) -> int:
+        """Approximate number of commands waiting to be processed"""
+        return self._inbox.qsize()
+
+    def submit(self, method: str, *args) -> Future:
+        """Queue a call of ``OrderBook.<method>(*args)`` and return its future"""
+        if not hasattr(self.book, method):
+            raise AttributeError(f"OrderBook has no operation {method!r}")
+        future: Future = Future()
+        self._inbox.put((future, method, args))
+        return future
+
+    def _run(self) -> None:
+        if self.cpu_affinity and hasattr(os, "sched_setaffinity"):
+            try:
+                os.sched_setaffinity(threading.get_native_id(), self.cpu_affinity)
+            except OSError as e:
+                logger.warning(f"Could not pin {self._thread.name} to CPUs {self.cpu_affinity}: {e}")
+
+        book = self.book
+        journal = self.journal
+        inbox = self._inbox
+        while True:
+            batch = [inbox.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(inbox.get_nowait())
+                except queue.Empty:
+                    break
+
+            stopping = False
+            completed = []
+            for command in batch:
+                if command is None:
+                    stopping = True
+                    continue
+                future, method, args = command
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    result = getattr(book, method)(*args)
+                except BaseException as e:
+                    completed.append((future, False, e))
+                    continue
+                if journal is not None:
+                    journal.record(book.symbol, method, args, result)
+                completed.append((future, True, result))
+            self.commands_processed += len(completed)
+
+            # Group commit: the whole batch becomes durable before anything is acknowledged
+            if journal is not None:
+                journal.commit()
+            for future, ok, value in completed:
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+
+            if self.on_batch is not None:
+                try:
+                    self.on_batch(book)
+                except Exception as e:
+                    logger.error(f"{self._thread.name} on_batch callback failed: {e}")
+
+            if self.snapshot_interval:
+                since = journal.sequence - journal.checkpoint_sequence
+                if since >= self.snapshot_interval or (stopping and since):
+                    try:
+                        checkpoint_book(book, journal)
+                    except OSError as e:
+                        logger.error(f"{self._thread.name} could not checkpoint {book.symbol}: {e}")
+            if stopping:
+                return
@@ -0,0 +1,211 @@
+import itertools
+import multiprocessing
+import pickle
+import threading
+import zlib
+from concurrent.futures import Future
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from loguru import logger
+from .instrument import Instrument
+from .journal import checkpoint_book, open_book_journal
+from .orderbook import OrderBook
+
+# (symbol, instrument, backend) needed to build an OrderBook inside a worker
+BookSpec = Tuple[str, Optional[Instrument], str]
+
+
+def assign_shards(symbols: Iterable[str], shard_count: int, overrides: Optional[Dict[str, int]] = None) -> Dict[str, int]:
+    """Map each symbol to a shard index, stable across restarts"""
+    if shard_count <= 0:
+        raise ValueError("Shard count must be greater than 0")
+    overrides = overrides or {}
+    return {
+        symbol: overrides.get(symbol, zlib.crc32(symbol.encode()) % shard_count)
+        for symbol in symbols
+    }
+
+
+def _portable_exception(error: BaseException) -> BaseException:
+    """Return the exception itself if it can cross a pipe, else a RuntimeError"""
+    try:
+        pickle.dumps(error)
+        return error
+    except Exception:
+        return RuntimeError(f"{type(error).__name__}: {error}")
+
+
+def _shard_main(
+    conn,
+    specs: List[BookSpec],
+    journal_dir: Optional[str] = None,
+    durability: str = "batch",
+    snapshot_interval: int = 0,
+) -> None:
+    """Worker process: host a set of OrderBooks and serve commands from the router.
+
+    Commands waiting in the pipe are processed as one batch; results for the
+    batch go back in a single message, followed by one coalesced l2update per
+    symbol the batch touched. With a ``journal_dir`` each book is recovered
+    from its journal on start and the batch is group-committed before replying,
+    with a snapshot checkpoint every ``snapshot_interval`` journaled commands.
+    """
+    books = {symbol: OrderBook(symbol, instrument, backend) for symbol, instrument, backend in specs}
+    journals = {}
+    if journal_dir is not None:
+        journals = {symbol: open_book_journal(journal_dir, book, durability) for symbol, book in books.items()}
+    while True:
+        batch = [conn.recv()]
+        while conn.poll():
+            batch.append(conn.recv())
+
+        stopping = False
+        replies = []
+        touched = set()
+        for message in batch:
+            if message is None:
+                stopping = True
+                continue
+            request_id, symbol, method, args = message
+            try:
+                result = getattr(books[symbol], method)(*args)
+            except Exception as e:
+                replies.append((request_id, False, _portable_exception(e)))
+                continue
+            if symbol in journals:
+                journals[symbol].record(symbol, method, args, result)
+            replies.append((request_id, True, result))
+            touched.add(symbol)
+
+        for symbol in touched:
+            if symbol in journals:
+                journals[symbol].commit()
+        if replies:
+            conn.send(("results", replies))
+        for symbol in touched:
+            update = books[symbol].drain_level_changes()
+            if update is not None:
+                conn.send(("book", symbol, update))
+        if snapshot_interval:
+            for symbol, journal in journals.items():
+                since = journal.sequence - journal.checkpoint_sequence
+                if since >= snapshot_interval or (stopping and since):
+                    checkpoint_book(books[symbol], journal)
+        if stopping:
+            for journal in journals.values():
+                journal.close()
+            conn.close()
+            return
+
+
+class _Shard:
+    """Router-side handle on one worker process"""
+
+    def __init__(self, index: int, specs: List[BookSpec], context, journal_dir: Optional[str], durability: str, snapshot_interval: int):
+        self.index = index
+        self.symbols = [spec[0] for spec in specs]
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_shard_main,
+            args=(child_conn, specs, journal_dir, durability, snapshot_interval),
+            name=f"shard-{index}",
+            daemon=True,
+        )
+        self.send_lock = threading.Lock()
+        self.pending: Dict[int, Future] = {}
+        self.process.start()
+        child_conn.close()
+
+
+class ShardRouter:
+    """Spread order books across worker processes to use more than one core.
+
+    Symbols are partitioned over ``shard_count`` processes, each hosting its
+    own OrderBooks and processing its commands in arrival order. ``submit``
+    mirrors ``BookSequencer.submit`` with an extra symbol argument and
+    returns a Future resolved by a reader thread per shard. Book deltas
+    produced in the workers are merged back and passed to ``on_book_update``
+    (called on the reader thread) as ``(symbol, l2update)``.
+
+    Arguments and results cross process boundaries by pickling, so callers
+    should use operations that return the state they need (for example
+    ``add_orders``, which returns the updated Order). With a ``journal_dir``
+    each worker journals, snapshots and recovers its own books.
+    """
+
+    def __init__(
+        self,
+        specs: Iterable[BookSpec],
+        shard_count: int,
+        on_book_update: Optional[Callable[[str, dict], None]] = None,
+        overrides: Optional[Dict[str, int]] = None,
+        start_method: str = "spawn",
+        journal_dir: Optional[str] = None,
+        durability: str = "batch",
+        snapshot_interval: int = 0,
+    ):
+        specs = list(specs)
+        self.assignment = assign_shards([spec[0] for spec in specs], shard_count, overrides)
+        self.on_book_update = on_book_update
+        self._ids = itertools.count(1)
+        context = multiprocessing.get_context(start_method)
+
+        self.shards: List[_Shard] = []
+        for index in range(shard_count):
+            shard_specs = [spec for spec in specs if self.assignment[spec[0]] == index]
+            shard = _Shard(index, shard_specs, context, journal_dir, durability, snapshot_interval)
+            reader = threading.Thread(target=self._read, args=(shard,), name=f"shard-{index}-reader", daemon=True)
+            reader.start()
+            self.shards.append(shard)
+
+    def submit(self, symbol: str, method: str, *args) -> Future:
+        """Queue ``OrderBook.<method>(*args)`` on the shard owning symbol"""
+        if symbol not in self.assignment:
+            raise KeyError(f"Unknown symbol {symbol!r}")
+        if not hasattr(OrderBook, method):
+            raise AttributeError(f"OrderBook has no operation {method!r}")
+        shard = self.shards[self.assignment[symbol]]
+        future: Future = Future()
+        request_id = next(self._ids)
+        with shard.send_lock:
+            shard.pending[request_id] = future
+            shard.conn.send((request_id, symbol, method, args))
+        return future
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Let each worker finish queued commands, then stop it"""
+        for shard in self.shards:
+            with shard.send_lock:
+                try:
+                    shard.conn.send(None)
+                except OSError:
+                    pass  # Worker already gone
+        for shard in self.shards:
+            shard.process.join(timeout)
+
+    def _read(self, shard: _Shard) -> None:
+        """Resolve futures and forward book updates coming back from a worker"""
+        while True:
+            try:
+                message = shard.conn.recv()
+            except (EOFError, OSError):
+                break
+            if message[0] == "results":
+                for request_id, ok, value in message[1]:
+                    future = shard.pending.pop(request_id, None)
+                    if future is None:
+                        continue
+                    if ok:
+                        future.set_result(value)
+                    else:
+                        future.set_exception(value)
+            elif self.on_book_update is not None:
+                _, symbol, update = message
+                try:
+                    self.on_book_update(symbol, update)
+                except Exception as e:
+                    logger.error(f"Book update handler failed for {symbol}: {e}")
+
+        # The worker exited: nothing pending will ever be answered
+        for future in list(shard.pending.values()):
+            future.set_exception(RuntimeError(f"Shard {shard.index} exited"))
+        shard.pending.clear()
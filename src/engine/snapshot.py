@@ -0,0 +1,255 @@
+import itertools
+import math
+import mmap
+import os
+import struct
+from typing import List
+from .order import OrderSide, OrderStatus, OrderType
+from .order_record import OrderRecord
+from .orderbook import OrderBook
+from .price_level import PriceLevel
+
+# File layout:
+#   header
+#   symbol, tick size, lot size (length-prefixed UTF-8; sizes empty in float mode)
+#   level table: one entry per price level, bids then asks, best price first
+#   record table: resting orders level by level, in time priority
+#   stop table: pending stop orders in trigger order, buy stops then sell stops
+#   string table: order ids and owners, referenced from records by (offset, length)
+MAGIC = b"MES2"
+# magic, fixed-point, book sequence, next oid, next trade id, journal sequence, levels, records,
+# stops, last trade price (NaN before the first trade)
+_HEADER = struct.Struct("<4sBQQQQIIId")
+_STRING_LENGTH = struct.Struct("<H")
+
+# Prices and quantities are integer ticks/lots in fixed-point mode, doubles otherwise
+_FLOAT_LEVEL = struct.Struct("<BddI")  # side, price, aggregate quantity, order count
+_FIXED_LEVEL = struct.Struct("<BqqI")
+# oid, side, type, status, price, qty, filled, remaining, ts, id offset, id length, owner offset, owner length,
+# display quantity (0 unless iceberg), hidden quantity, queue priority
+_FLOAT_RECORD = struct.Struct("<QBBBddddqIHIHddQ")
+_FIXED_RECORD = struct.Struct("<QBBBqqqqqIHIHqqQ")
+# oid, side, type, limit price (0 for stop market orders), stop price, qty, ts, id offset, id length,
+# owner offset, owner length
+_FLOAT_STOP = struct.Struct("<QBBdddqIHIH")
+_FIXED_STOP = struct.Struct("<QBBqqqqIHIH")
+
+# Enum codes are positions in these tuples; only ever append new members
+_SIDES = tuple(OrderSide)
+_ORDER_TYPES = tuple(OrderType)
+_STATUSES = tuple(OrderStatus)
+_SIDE_CODES = {side: code for code, side in enumerate(_SIDES)}
+_ORDER_TYPE_CODES = {order_type: code for code, order_type in enumerate(_ORDER_TYPES)}
+_STATUS_CODES = {status: code for code, status in enumerate(_STATUSES)}
+
+
+def _pack_string(value: str) -> bytes:
+    encoded = value.encode("utf-8")
+    return _STRING_LENGTH.pack(len(encoded)) + encoded
+
+
+def _unpack_string(buffer, offset: int):
+    (length,) = _STRING_LENGTH.unpack_from(buffer, offset)
+    offset += _STRING_LENGTH.size
+    return bytes(buffer[offset:offset + length]).decode("utf-8"), offset + length
+
+
+def _instrument_fields(book: OrderBook) -> List[str]:
+    if book.instrument is None:
+        return ["", ""]
+    return [str(book.instrument.tick_size), str(book.instrument.lot_size)]
+
+
+def write_snapshot(book: OrderBook, path: str, journal_sequence: int = 0) -> int:
+    """Write the full resting state of a book to ``path``; returns the file size.
+
+    ``journal_sequence`` is the last journaled command reflected in the
+    book, so recovery replays only what came after it. The file is written
+    to a temporary name, fsynced and renamed into place, so a crash never
+    leaves a partial snapshot behind.
+    """
+    fixed = book.instrument is not None
+    level_struct = _FIXED_LEVEL if fixed else _FLOAT_LEVEL
+    record_struct = _FIXED_RECORD if fixed else _FLOAT_RECORD
+    stop_struct = _FIXED_STOP if fixed else _FLOAT_STOP
+
+    levels = []
+    records = []
+    stops = []
+    strings = []
+    string_offset = 0
+    for side, prices, queues in (
+        (OrderSide.BUY, book.bids, book.bid_queues),
+        (OrderSide.SELL, book.asks, book.ask_queues),
+    ):
+        for price, quantity in prices.items():
+            queue = queues[price]
+            levels.append(level_struct.pack(_SIDE_CODES[side], price, quantity, len(queue)))
+            for record in queue:
+                order_id = record.order_id.encode("utf-8")
+                owner = (record.owner or "").encode("utf-8")  # Empty means no owner
+                records.append(record_struct.pack(
+                    record.oid,
+                    _SIDE_CODES[record.side],
+                    _ORDER_TYPE_CODES[record.order_type],
+                    _STATUS_CODES[record.status],
+                    record.price,
+                    record.quantity,
+                    record.filled_quantity,
+                    record.remaining_quantity,
+                    record.timestamp_ns,
+                    string_offset,
+                    len(order_id),
+                    string_offset + len(order_id),
+                    len(owner),
+                    record.display_quantity or 0,
+                    record.hidden_quantity,
+                    record.priority,
+                ))
+                strings.append(order_id)
+                strings.append(owner)
+                string_offset += len(order_id) + len(owner)
+
+    for trigger_book in (book.buy_stops, book.sell_stops):
+        for queue in trigger_book.values():
+            for record in queue:
+                order_id = record.order_id.encode("utf-8")
+                owner = (record.owner or "").encode("utf-8")
+                stops.append(stop_struct.pack(
+                    record.oid,
+                    _SIDE_CODES[record.side],
+                    _ORDER_TYPE_CODES[record.order_type],
+                    record.price or 0,
+                    record.stop_price,
+                    record.quantity,
+                    record.timestamp_ns,
+                    string_offset,
+                    len(order_id),
+                    string_offset + len(order_id),
+                    len(owner),
+                ))
+                strings.append(order_id)
+                strings.append(owner)
+                string_offset += len(order_id) + len(owner)
+
+    header = _HEADER.pack(
+        MAGIC, fixed, book.sequence, book._next_oid, book._next_trade_id, journal_sequence, len(levels), len(records),
+        len(stops), math.nan if book.last_trade_price is None else book.last_trade_price,
+    )
+    fields = b"".join(_pack_string(value) for value in [book.symbol] + _instrument_fields(book))
+
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as handle:
+        for part in (header, fields, *levels, *records, *stops, *strings):
+            handle.write(part)
+        handle.flush()
+        os.fsync(handle.fileno())
+        size = handle.tell()
+    os.replace(temporary, path)
+    return size
+
+
+def load_snapshot(path: str, book: OrderBook) -> int:
+    """Restore an empty book from a snapshot file; returns its journal sequence.
+
+    The file is memory-mapped and the level and record tables are decoded
+    in bulk with ``Struct.iter_unpack``; only the order ids are sliced out
+    of the string table individually.
+    """
+    if book.orders or book.bids or book.asks or book.stop_orders:
+        raise ValueError("Snapshots can only be loaded into an empty order book")
+
+    with open(path, "rb") as handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        if bytes(data[:len(MAGIC)]) != MAGIC:
+            raise ValueError(f"{path} is not an order book snapshot")
+        (_, fixed, sequence, next_oid, next_trade_id, journal_sequence, level_count, record_count, stop_count,
+         last_trade_price) = _HEADER.unpack_from(data)
+        offset = _HEADER.size
+        symbol, offset = _unpack_string(data, offset)
+        tick_size, offset = _unpack_string(data, offset)
+        lot_size, offset = _unpack_string(data, offset)
+        if symbol != book.symbol or bool(fixed) != (book.instrument is not None):
+            raise ValueError(f"Snapshot {path} does not match order book {book.symbol}")
+        if [tick_size, lot_size] != _instrument_fields(book):
+            raise ValueError(f"Snapshot {path} was taken with tick size {tick_size} and lot size {lot_size}")
+
+        level_struct = _FIXED_LEVEL if fixed else _FLOAT_LEVEL
+        record_struct = _FIXED_RECORD if fixed else _FLOAT_RECORD
+        stop_struct = _FIXED_STOP if fixed else _FLOAT_STOP
+        records_start = offset + level_count * level_struct.size
+        stops_start = records_start + record_count * record_struct.size
+        strings_start = stops_start + stop_count * stop_struct.size
+
+        view = memoryview(data)
+        try:
+            level_rows = level_struct.iter_unpack(view[offset:records_start])
+            record_rows = record_struct.iter_unpack(view[records_start:stops_start])
+            for side_code, price, quantity, count in level_rows:
+                if _SIDES[side_code] == OrderSide.BUY:
+                    levels, queues = book.bids, book.bid_queues
+                else:
+                    levels, queues = book.asks, book.ask_queues
+                levels[price] = quantity
+                book._adjust_depth(_SIDES[side_code], price, quantity)
+                queue = queues[price] = PriceLevel(price)
+                for row in itertools.islice(record_rows, count):
+                    (oid, side, order_type, status, _, size, filled, remaining, timestamp_ns, start, length,
+                     owner_start, owner_length, display, hidden, priority) = row
+                    start += strings_start
+                    owner = None
+                    if owner_length:
+                        owner_start += strings_start
+                        owner = str(data[owner_start:owner_start + owner_length], "utf-8")
+                    record = OrderRecord(
+                        oid,
+                        str(data[start:start + length], "utf-8"),
+                        _SIDES[side],
+                        _ORDER_TYPES[order_type],
+                        price,
+                        size,
+                        remaining,
+                        filled,
+                        _STATUSES[status],
+                        timestamp_ns,
+                        owner,
+                        display_quantity=display or None,
+                        hidden_quantity=hidden,
+                        priority=priority,
+                    )
+                    queue.append(record)
+                    book.orders[record.order_id] = record
+                    if owner is not None:
+                        book.owner_orders.setdefault(owner, {})[record.order_id] = record
+                    if hidden:
+                        book._adjust_reserve(record.side, price, hidden)
+
+            # Appended in trigger order, so each stop price queue keeps its arrival order
+            for row in stop_struct.iter_unpack(view[stops_start:strings_start]):
+                oid, side, order_type, price, stop_price, size, timestamp_ns, start, length, owner_start, owner_length = row
+                start += strings_start
+                owner_start += strings_start
+                order_type = _ORDER_TYPES[order_type]
+                book._add_stop(OrderRecord(
+                    oid,
+                    str(data[start:start + length], "utf-8"),
+                    _SIDES[side],
+                    order_type,
+                    price if order_type == OrderType.STOP_LIMIT else None,
+                    size,
+                    size,
+                    0,  # Stops are unfilled until triggered
+                    timestamp_ns=timestamp_ns,
+                    owner=str(data[owner_start:owner_start + owner_length], "utf-8") if owner_length else None,
+                    stop_price=stop_price,
+                ))
+            del level_rows, record_rows
+        finally:
+            view.release()
+
+    book.sequence = book._drained_sequence = sequence
+    book._depth_cache.clear()
+    book._next_oid = next_oid
+    book._next_trade_id = next_trade_id
+    if not math.isnan(last_trade_price):
+        book.last_trade_price = int(last_trade_price) if fixed else last_trade_price
+    return journal_sequence
@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta
+from .order import OrderSide
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+class Trade:
+    """A single fill, as emitted by ``OrderBook`` and stored on its ``TradeTape``.
+
+    ``trade_id`` is a per-book sequence number, so ids are unique and
+    ordered; ``timestamp_ns`` is wall-clock nanoseconds since the epoch.
+    ``maker_oid``/``taker_oid`` are the book's internal integer order ids.
+    Prices and quantities are in output units (floats).
+
+    Records read like the dicts trades used to be: ``trade["price"]``,
+    ``dict(trade)`` and JSON encoding all work on the public fields.
+    """
+    __slots__ = (
+        "trade_id", "timestamp_ns", "symbol", "price", "quantity", "aggressor_side",
+        "maker_order_id", "taker_order_id", "maker_oid", "taker_oid",
+    )
+
+    # Fields exposed through the mapping interface
+    _KEYS = (
+        "trade_id", "timestamp", "symbol", "price", "quantity", "aggressor_side",
+        "maker_order_id", "taker_order_id",
+    )
+
+    def __init__(
+        self,
+        trade_id: int,
+        timestamp_ns: int,
+        symbol: str,
+        price: float,
+        quantity: float,
+        aggressor_side: OrderSide,
+        maker_order_id: str,
+        taker_order_id: str,
+        maker_oid: int = 0,
+        taker_oid: int = 0,
+    ):
+        self.trade_id = trade_id
+        self.timestamp_ns = timestamp_ns
+        self.symbol = symbol
+        self.price = price
+        self.quantity = quantity
+        self.aggressor_side = aggressor_side
+        self.maker_order_id = maker_order_id
+        self.taker_order_id = taker_order_id
+        self.maker_oid = maker_oid
+        self.taker_oid = taker_oid
+
+    @property
+    def timestamp(self) -> datetime:
+        """Execution time as a naive UTC datetime (microsecond precision)"""
+        return _EPOCH + timedelta(microseconds=self.timestamp_ns // 1000)
+
+    def keys(self):
+        return self._KEYS
+
+    def __getitem__(self, key: str):
+        if key not in self._KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def to_dict(self) -> dict:
+        return {key: getattr(self, key) for key in self._KEYS}
+
+    def __repr__(self) -> str:
+        return (
+            f"Trade(trade_id={self.trade_id}, symbol={self.symbol!r}, price={self.price}, "
+            f"quantity={self.quantity}, maker={self.maker_order_id!r}, taker={self.taker_order_id!r})"
+        )
@@ -0,0 +1,119 @@
+from array import array
+from typing import Dict, Iterator, List, Optional
+from .order import OrderSide
+from .trade import Trade
+
+try:
+    import numpy
+except ImportError:  # Optional: columns are exported as array.array without it
+    numpy = None
+
+_SIDES = tuple(OrderSide)
+_SIDE_CODES = {side: code for code, side in enumerate(_SIDES)}
+
+# Numeric columns and their array typecodes
+_COLUMNS = (
+    ("trade_id", "q"),
+    ("timestamp_ns", "q"),
+    ("price", "d"),
+    ("quantity", "d"),
+    ("aggressor_side", "b"),
+    ("maker_oid", "q"),
+    ("taker_oid", "q"),
+)
+
+
+class TradeTape:
+    """Fixed-capacity ring buffer of a book's most recent trades.
+
+    Trades are stored column-wise in preallocated ``array`` columns (plus
+    two object columns for the external order ids), so appending a fill
+    writes into existing slots instead of allocating. Once full, the oldest
+    trades are overwritten. Read back with ``since`` as a generator of
+    ``Trade`` records, or in bulk with ``columns`` for analytics.
+    """
+
+    def __init__(self, symbol: str, capacity: int = 10_000):
+        if capacity <= 0:
+            raise ValueError("Capacity must be greater than 0")
+        self.symbol = symbol
+        self.capacity = capacity
+        self.total = 0  # Trades ever appended; the next write goes to total % capacity
+        self._columns: Dict[str, array] = {
+            name: array(typecode, [0]) * capacity for name, typecode in _COLUMNS
+        }
+        self._maker_order_ids: List[Optional[str]] = [None] * capacity
+        self._taker_order_ids: List[Optional[str]] = [None] * capacity
+
+    def __len__(self) -> int:
+        return min(self.total, self.capacity)
+
+    @property
+    def last_trade_id(self) -> int:
+        """Id of the newest trade on the tape, 0 if empty"""
+        if not self.total:
+            return 0
+        return self._columns["trade_id"][(self.total - 1) % self.capacity]
+
+    def append(self, trade: Trade) -> None:
+        slot = self.total % self.capacity
+        columns = self._columns
+        columns["trade_id"][slot] = trade.trade_id
+        columns["timestamp_ns"][slot] = trade.timestamp_ns
+        columns["price"][slot] = trade.price
+        columns["quantity"][slot] = trade.quantity
+        columns["aggressor_side"][slot] = _SIDE_CODES[trade.aggressor_side]
+        columns["maker_oid"][slot] = trade.maker_oid
+        columns["taker_oid"][slot] = trade.taker_oid
+        self._maker_order_ids[slot] = trade.maker_order_id
+        self._taker_order_ids[slot] = trade.taker_order_id
+        self.total += 1
+
+    def _slots(self, after_trade_id: int) -> range:
+        """Logical positions (0 = oldest retained) of trades newer than an id"""
+        count = len(self)
+        if not count:
+            return range(0)
+        # Trade ids are consecutive, so the first wanted position is arithmetic
+        oldest_id = self._columns["trade_id"][(self.total - count) % self.capacity]
+        return range(max(0, after_trade_id - oldest_id + 1), count)
+
+    def since(self, after_trade_id: int = 0) -> Iterator[Trade]:
+        """Yield retained trades with an id greater than ``after_trade_id``, oldest first"""
+        columns = self._columns
+        start = self.total - len(self)
+        for position in self._slots(after_trade_id):
+            slot = (start + position) % self.capacity
+            yield Trade(
+                columns["trade_id"][slot],
+                columns["timestamp_ns"][slot],
+                self.symbol,
+                columns["price"][slot],
+                columns["quantity"][slot],
+                _SIDES[columns["aggressor_side"][slot]],
+                self._maker_order_ids[slot],
+                self._taker_order_ids[slot],
+                columns["maker_oid"][slot],
+                columns["taker_oid"][slot],
+            )
+
+    def columns(self, after_trade_id: int = 0) -> Dict[str, object]:
+        """Export retained trades newer than an id as columns, oldest first.
+
+        Numeric columns are NumPy arrays when NumPy is installed and
+        ``array.array`` otherwise; order id columns are lists.
+        """
+        positions = self._slots(after_trade_id)
+        start = (self.total - len(self) + positions.start) % self.capacity if positions else 0
+        count = len(positions)
+        # At most two contiguous runs of the ring
+        first = slice(start, min(start + count, self.capacity))
+        second = slice(0, max(0, start + count - self.capacity))
+
+        exported: Dict[str, object] = {}
+        for name, typecode in _COLUMNS:
+            column = self._columns[name][first] + self._columns[name][second]
+            exported[name] = numpy.frombuffer(column, dtype=column.typecode) if numpy is not None else column
+        exported["maker_order_id"] = self._maker_order_ids[first] + self._maker_order_ids[second]
+        exported["taker_order_id"] = self._taker_order_ids[first] + self._taker_order_ids[second]
+        return exported
@@ -1,8 +1,41 @@
 import pytest
 from datetime import datetime
+from decimal import Decimal
+from src.engine.instrument import Instrument
 from src.engine.order import Order, OrderType, OrderSide, OrderStatus
 from src.engine.orderbook import OrderBook
 
+BTC_USDT = Instrument(symbol="BTC-USDT", tick_size=Decimal("0.01"), lot_size=Decimal("0.001"))
+
+def make_order(
+    order_id, side, price=None, quantity=1.0, order_type=OrderType.LIMIT, symbol="BTC-USDT", owner=None,
+    stop_price=None, display_quantity=None
+):
+    """Build an order for tests, fully unfilled"""
+    return Order(
+        order_id=order_id,
+        symbol=symbol,
+        order_type=order_type,
+        side=side,
+        quantity=quantity,
+        price=price,
+        remaining_quantity=quantity,
+        owner=owner,
+        stop_price=stop_price,
+        display_quantity=display_quantity
+    )
+
+def book_state(book):
+    """A book's default-depth snapshot without its timestamp, for comparing books"""
+    snapshot = book.get_order_book_snapshot()
+    snapshot.pop("timestamp")
+    return snapshot
+
+@pytest.fixture(params=[None, BTC_USDT], ids=["float", "fixed"])
+def instrument(request):
+    """Fixture running a test against a float book and a fixed-point book"""
+    return request.param
+
 @pytest.fixture
 def sample_order_params():
     """Fixture providing sample order parameters"""
@@ -55,4 +88,4 @@ def populated_order_book(empty_order_book, limit_buy_order, limit_sell_order):
     order_book = empty_order_book
     order_book.add_order(limit_buy_order)
     order_book.add_order(limit_sell_order)
-    return order_book
\ No newline at end of file
+    return order_book
@@ -1,5 +1,6 @@
 import pytest
 from fastapi.testclient import TestClient
+from src.api import wire
 from src.api.main import app
 
 # Initialize test client with default settings
@@ -90,4 +91,240 @@ async def test_orderbook_websocket():
         assert "bids" in data
         assert len(data["bids"]) > 0
         await asyncio.sleep(0.1) # Add a small delay
-    websocket.close() # Explicitly close the websocket
\ No newline at end of file
+    websocket.close() # Explicitly close the websocket
+
+def test_create_order_off_tick_price():
+    """Test an order priced off the instrument tick is rejected"""
+    response = client.post("/api/v1/orders", json={
+        "symbol": "BTC-USDT",
+        "side": "buy",
+        "order_type": "limit",
+        "quantity": 1.0,
+        "price": 50000.001
+    })
+
+    assert response.status_code == 400
+
+def test_create_orders_batch():
+    """Test submitting new orders and cancels in one request"""
+    response = client.post("/api/v1/orders/batch", json={
+        "symbol": "ETH-USDT",
+        "actions": [
+            {"side": "sell", "order_type": "limit", "quantity": 1.0, "price": 3000.0},
+            {"side": "sell", "order_type": "limit", "quantity": 1.0, "price": 3001.0},
+            {"side": "buy", "order_type": "market", "quantity": 1.5},
+            {"action": "cancel", "order_id": "unknown"}
+        ]
+    })
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert len(results) == 4
+    assert [trade["price"] for trade in results[2]["trades"]] == [3000.0, 3001.0]
+    assert results[2]["order"]["status"] == "filled"
+    assert results[3] == {"order_id": "unknown", "cancelled": False}
+
+def test_create_orders_batch_validation():
+    """Test an invalid action rejects the whole batch"""
+    response = client.post("/api/v1/orders/batch", json={
+        "symbol": "ETH-USDT",
+        "actions": [
+            {"side": "sell", "order_type": "limit", "quantity": 1.0, "price": 3000.0},
+            {"side": "buy", "order_type": "limit", "quantity": 1.0}
+        ]
+    })
+
+    assert response.status_code == 400
+
+def test_orderbook_websocket_deltas():
+    """Test the feed sends a snapshot followed by sequenced level deltas"""
+    with client.websocket_connect("/ws/orderbook/ETH-USDT") as websocket:
+        snapshot = websocket.receive_json()
+        assert snapshot["type"] == "snapshot"
+
+        response = client.post("/api/v1/orders", json={
+            "symbol": "ETH-USDT",
+            "side": "buy",
+            "order_type": "limit",
+            "quantity": 2.0,
+            "price": 2500.0
+        })
+        assert response.status_code == 200
+
+        update = websocket.receive_json()
+        assert update["type"] == "l2update"
+        assert update["sequence"] > snapshot["sequence"]
+        assert [2500.0, 2.0] in update["bids"]
+        assert update["asks"] == []
+
+def test_orderbook_websocket_binary_protocol():
+    """Test offering the binary subprotocol switches the feed to binary frames"""
+    with client.websocket_connect("/ws/orderbook/ETH-USDT", subprotocols=[wire.BINARY_SUBPROTOCOL]) as websocket:
+        assert websocket.accepted_subprotocol == wire.BINARY_SUBPROTOCOL
+        snapshot = wire.decode(websocket.receive_bytes())
+        assert snapshot["type"] == "snapshot"
+
+        client.post("/api/v1/orders", json={
+            "symbol": "ETH-USDT", "side": "buy", "order_type": "limit", "quantity": 1.0, "price": 2400.0
+        })
+        update = wire.decode(websocket.receive_bytes())
+        assert update["type"] == "l2update"
+        assert [2400.0, 1.0] in update["bids"]
+
+def test_get_order_status():
+    """Test completed orders can still be looked up by id"""
+    response = client.post("/api/v1/orders", json={
+        "symbol": "ETH-USDT",
+        "side": "sell",
+        "order_type": "limit",
+        "quantity": 0.5,
+        "price": 2600.0
+    })
+    order_id = response.json()["order"]["order_id"]
+    client.post("/api/v1/orders", json={
+        "symbol": "ETH-USDT",
+        "side": "buy",
+        "order_type": "market",
+        "quantity": 0.5
+    })
+
+    response = client.get(f"/api/v1/orders/ETH-USDT/{order_id}")
+    assert response.status_code == 200
+    assert response.json()["status"] == "filled"
+    assert response.json()["resting"] is False
+    assert client.get("/api/v1/orders/ETH-USDT/unknown").status_code == 404
+
+    stats = client.get("/api/v1/memory").json()
+    assert {book["symbol"] for book in stats["books"]} == {"BTC-USDT", "ETH-USDT"}
+
+def test_quote_sweep():
+    """Test the quote endpoint estimates a sweep without trading"""
+    client.post("/api/v1/orders", json={
+        "symbol": "BTC-USDT",
+        "side": "sell",
+        "order_type": "limit",
+        "quantity": 0.5,
+        "price": 90000.0
+    })
+
+    response = client.get("/api/v1/quote/BTC-USDT", params={"side": "buy", "quantity": 100.0})
+    assert response.status_code == 200
+    quote = response.json()
+    assert 0.5 <= quote["fillable_quantity"] < 100.0
+    assert quote["fully_fillable"] is False
+    assert client.get("/api/v1/quote/BTC-USDT", params={"side": "buy", "quantity": -1}).status_code == 400
+
+def test_get_trades():
+    """Test recent trades are served from the trade tape"""
+    response = client.get("/api/v1/trades/ETH-USDT")
+    assert response.status_code == 200
+    trades = response.json()["trades"]
+    assert trades and all(isinstance(trade["trade_id"], int) for trade in trades)
+    assert [trade["trade_id"] for trade in trades] == sorted(trade["trade_id"] for trade in trades)
+
+    newest = trades[-1]["trade_id"]
+    assert client.get("/api/v1/trades/ETH-USDT", params={"since": newest}).json()["trades"] == []
+    assert client.get("/api/v1/trades/ETH-USDT", params={"limit": 0}).status_code == 400
+
+def test_get_metrics():
+    """Metrics are off by default but queue depths and publisher counters are reported"""
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["enabled"] is False
+    assert "BTC-USDT" in data["books"]
+    publisher = data["publishers"]["BTC-USDT"]
+    assert publisher["fanout_latency"] is None
+    assert publisher["max_queue_depth"] >= 0
+
+def test_get_l3_orders_and_levels():
+    """Test the L3 endpoint pages resting orders and the level view aggregates them"""
+    for price in (9000.0, 9000.0):
+        client.post("/api/v1/orders", json={
+            "symbol": "ETH-USDT", "side": "sell", "order_type": "limit", "quantity": 1.0, "price": price
+        })
+
+    response = client.get("/api/v1/l3/ETH-USDT", params={"side": "sell", "limit": 1, "min_price": 9000.0})
+    assert response.status_code == 200
+    page = response.json()
+    assert len(page["orders"]) == 1
+    assert page["next_cursor"] is not None
+
+    response = client.get("/api/v1/l3/ETH-USDT", params={"side": "sell", "cursor": page["next_cursor"]})
+    assert response.json()["orders"][0]["order_id"] != page["orders"][0]["order_id"]
+    assert client.get("/api/v1/l3/ETH-USDT", params={"side": "sell", "cursor": "bad"}).status_code == 400
+    assert client.get("/api/v1/l3/ETH-USDT", params={"side": "sell", "limit": 0}).status_code == 400
+
+    levels = client.get("/order_book/ETH-USDT").json()
+    assert {"price": 9000.0, "quantity": 2.0} in levels["asks"]
+    assert client.get("/order_book/NOPE").status_code == 404
+
+def test_amend_order():
+    """Test PATCH amends a resting order and reports whether priority was kept"""
+    response = client.post("/api/v1/orders", json={
+        "symbol": "ETH-USDT", "side": "buy", "order_type": "limit", "quantity": 2.0, "price": 50.0
+    })
+    order_id = response.json()["order"]["order_id"]
+
+    response = client.patch(f"/api/v1/orders/ETH-USDT/{order_id}", json={"quantity": 1.5})
+    assert response.status_code == 200
+    assert response.json()["priority_kept"] is True
+    assert response.json()["order"]["remaining_quantity"] == 1.5
+
+    response = client.patch(f"/api/v1/orders/ETH-USDT/{order_id}", json={"price": 50.5})
+    assert response.json()["priority_kept"] is False
+    assert client.patch(f"/api/v1/orders/ETH-USDT/{order_id}", json={}).status_code == 400
+    assert client.patch("/api/v1/orders/ETH-USDT/missing", json={"quantity": 1.0}).status_code == 404
+
+    response = client.post("/api/v1/orders/batch", json={
+        "symbol": "ETH-USDT", "actions": [{"action": "amend", "order_id": order_id, "quantity": 1.0}]
+    })
+    assert response.json()["results"][0]["amended"] is True
+
+def test_mass_cancel():
+    """Test DELETE cancels an owner's orders within a side and price range"""
+    for price in (40.0, 41.0, 45.0):
+        client.post("/api/v1/orders", json={
+            "symbol": "ETH-USDT", "side": "buy", "order_type": "limit", "quantity": 1.0,
+            "price": price, "owner": "desk-1"
+        })
+    response = client.delete("/api/v1/orders/ETH-USDT", params={"owner": "desk-1", "side": "buy", "max_price": 41.0})
+    assert response.status_code == 200
+    assert response.json()["cancelled"] == 2
+
+    response = client.delete("/api/v1/orders/ETH-USDT", params={"owner": "desk-1"})
+    [order_id] = response.json()["order_ids"]
+    assert client.get(f"/api/v1/orders/ETH-USDT/{order_id}").json()["price"] == 45.0
+    assert client.delete("/api/v1/orders/DOGE-USDT").status_code == 404
+
+    # A bare DELETE must not clear the book by accident, and off-tick bounds are client errors
+    assert client.delete("/api/v1/orders/ETH-USDT").status_code == 400
+    assert client.delete("/api/v1/orders/ETH-USDT", params={"min_price": 1.001}).status_code == 400
+    response = client.delete("/api/v1/orders/ETH-USDT", params={"owner": "nobody", "all": True})
+    assert (response.status_code, response.json()["cancelled"]) == (200, 0)
+
+def test_create_stop_order():
+    """Test stop orders need a stop price and wait off the book until triggered"""
+    order = {"symbol": "ETH-USDT", "side": "sell", "order_type": "stop", "quantity": 1.0}
+    assert client.post("/api/v1/orders", json=order).status_code == 400
+    order["stop_price"] = 10.0
+    response = client.post("/api/v1/orders", json=order)
+    assert response.status_code == 200
+    created = client.get(f"/api/v1/orders/ETH-USDT/{response.json()['order']['order_id']}").json()
+    assert (created["stop_price"], created["resting"], created["status"]) == (10.0, False, "new")
+    assert client.delete("/api/v1/orders/ETH-USDT", params={"max_price": 10.0, "side": "sell"}).json()["cancelled"] >= 1
+
+def test_create_iceberg_order():
+    """Test iceberg orders report their full size but rest with only the display quantity"""
+    order = {"symbol": "ETH-USDT", "side": "buy", "order_type": "limit", "quantity": 1.0, "price": 11.0,
+             "display_quantity": 2.0, "owner": "iceberg-test"}
+    assert client.post("/api/v1/orders", json=order).status_code == 400
+    order["display_quantity"] = 0.25
+    response = client.post("/api/v1/orders", json=order)
+    assert response.status_code == 200
+    order_id = response.json()["order"]["order_id"]
+    created = client.get(f"/api/v1/orders/ETH-USDT/{order_id}").json()
+    assert (created["remaining_quantity"], created["display_quantity"]) == (1.0, 0.25)
+    assert {"price": 11.0, "quantity": 0.25} in client.get("/order_book/ETH-USDT").json()["bids"]
+    assert client.delete("/api/v1/orders/ETH-USDT", params={"owner": "iceberg-test"}).json()["order_ids"] == [order_id]
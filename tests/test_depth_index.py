@@ -0,0 +1,55 @@
+import random
+import pytest
+from src.engine.depth_index import DepthIndex
+
+def brute_sweep(levels, descending, quantity, limit):
+    filled = notional = 0
+    last = None
+    for tick in sorted(levels, reverse=descending):
+        if filled >= quantity or (limit is not None and (tick < limit if descending else tick > limit)):
+            break
+        take = min(levels[tick], quantity - filled)
+        filled += take
+        notional += take * tick
+        last = tick
+    return filled, notional, last
+
+@pytest.mark.parametrize("max_capacity", [1 << 16, 16])
+@pytest.mark.parametrize("descending", [False, True])
+def test_depth_index_matches_level_walk(descending, max_capacity):
+    """Test prefix and sweep queries against a brute-force walk, across recenters and sparse levels"""
+    rng = random.Random(7)
+    index = DepthIndex(descending=descending, capacity=8, max_capacity=max_capacity)
+    levels = {}
+    mid = 10_000
+    for _ in range(2000):
+        mid += rng.choice([-3, 0, 3])
+        if levels and rng.random() < 0.4:
+            tick = rng.choice(list(levels))
+            removed = rng.randint(1, levels[tick])
+            levels[tick] -= removed
+            if not levels[tick]:
+                del levels[tick]
+            index.add(tick, -removed)
+        else:
+            tick = mid + rng.randint(-40, 40)
+            quantity = rng.randint(1, 20)
+            levels[tick] = levels.get(tick, 0) + quantity
+            index.add(tick, quantity)
+
+        limit = mid + rng.randint(-40, 40)
+        assert index.total == sum(levels.values())
+        assert index.quantity_within(limit) == brute_sweep(levels, descending, float("inf"), limit)[0]
+        quantity = rng.randint(1, 200)
+        assert index.sweep(quantity, limit) == brute_sweep(levels, descending, quantity, limit)
+        assert index.sweep(quantity) == brute_sweep(levels, descending, quantity, None)
+
+def test_depth_index_empty():
+    """Test queries on an empty index"""
+    index = DepthIndex()
+    assert index.quantity_within(100) == 0
+    assert index.sweep(5) == (0, 0, None)
+    with pytest.raises(ValueError):
+        DepthIndex(capacity=0)
+    with pytest.raises(ValueError):
+        DepthIndex(capacity=64, max_capacity=32)
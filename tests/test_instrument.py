@@ -0,0 +1,77 @@
+import pytest
+from decimal import Decimal
+from .conftest import make_order
+from src.engine.instrument import Instrument
+from src.engine.order import OrderSide, OrderStatus
+from src.engine.orderbook import OrderBook
+
+@pytest.fixture
+def btc_instrument():
+    """Fixture providing a BTC-USDT instrument spec"""
+    return Instrument(symbol="BTC-USDT", tick_size=Decimal("0.01"), lot_size=Decimal("0.001"))
+
+def test_instrument_conversions(btc_instrument):
+    """Test price/quantity conversion to ticks and lots"""
+    assert btc_instrument.price_to_ticks(50000.01) == 5000001
+    assert btc_instrument.ticks_to_price(5000001) == 50000.01
+    assert btc_instrument.quantity_to_lots(0.3) == 300
+    assert btc_instrument.lots_to_quantity(300) == 0.3
+    assert btc_instrument.price_scale == 2
+    assert btc_instrument.quantity_scale == 3
+
+def test_instrument_rejects_off_tick_values(btc_instrument):
+    """Test values that are not multiples of the increments are rejected"""
+    with pytest.raises(ValueError):
+        btc_instrument.price_to_ticks(50000.005)
+    with pytest.raises(ValueError):
+        btc_instrument.quantity_to_lots(0.0005)
+    for value in (float("inf"), float("-inf"), float("nan")):
+        with pytest.raises(ValueError):
+            btc_instrument.price_to_ticks(value)
+        with pytest.raises(ValueError):
+            btc_instrument.quantity_to_lots(value)
+    with pytest.raises(ValueError):
+        Instrument(symbol="BTC-USDT", tick_size=Decimal("0"), lot_size=Decimal("0.001"))
+
+def test_fixed_point_book_fills_exactly(btc_instrument):
+    """Test quantities that drift in floats are filled exactly in lots"""
+    book = OrderBook("BTC-USDT", btc_instrument)
+    for i in range(3):
+        book.add_order(make_order(f"s{i}", OrderSide.SELL, 50000.01, 0.1))
+
+    assert list(book.asks.keys()) == [5000001]
+    assert book.asks[5000001] == 300
+
+    buy = make_order("b1", OrderSide.BUY, 50000.01, 0.3)
+    trades = book.add_order(buy)
+
+    assert [trade["quantity"] for trade in trades] == [0.1, 0.1, 0.1]
+    assert trades[0]["price"] == 50000.01
+    assert buy.status == OrderStatus.FILLED
+    assert buy.remaining_quantity == 0.0
+    assert len(book.asks) == 0
+
+def test_fixed_point_book_boundary_values(btc_instrument):
+    """Test public accessors report prices rather than ticks"""
+    book = OrderBook("BTC-USDT", btc_instrument)
+    book.add_order(make_order("b1", OrderSide.BUY, 49999.99, 1.5))
+
+    assert book.best_bid == 49999.99
+    assert book.get_order_book_snapshot()["bids"] == [[49999.99, 1.5]]
+    with pytest.raises(ValueError):
+        book.add_order(make_order("b2", OrderSide.BUY, 49999.999, 1.0))
+    assert "b2" not in book.orders
+
+def test_fixed_point_quote_sweep(btc_instrument):
+    """Test the depth index quote converts ticks and lots back to prices"""
+    book = OrderBook("BTC-USDT", btc_instrument)
+    book.add_order(make_order("b1", OrderSide.BUY, 49999.99, 0.1))
+    book.add_order(make_order("b2", OrderSide.BUY, 49999.98, 0.2))
+
+    quote = book.quote_sweep(OrderSide.SELL, 0.25)
+    assert quote["fillable_quantity"] == 0.25
+    assert quote["worst_price"] == 49999.98
+    assert quote["notional"] == pytest.approx(0.1 * 49999.99 + 0.15 * 49999.98)
+    assert book.quote_sweep(OrderSide.SELL, 1.0, limit_price=49999.99)["fillable_quantity"] == 0.1
+    with pytest.raises(ValueError):
+        book.quote_sweep(OrderSide.SELL, 0.0001)
@@ -0,0 +1,176 @@
+import os
+import pytest
+from .conftest import book_state, make_order
+from src.engine.journal import Journal, open_book_journal, read_journal, replay_journal
+from src.engine.order import OrderAmend, OrderCancel, OrderMassCancel, OrderType, OrderSide, OrderStatus
+from src.engine.orderbook import OrderBook
+from src.engine.sequencer import BookSequencer
+
+def test_journal_roundtrip(tmp_path):
+    """Test new orders and cancels read back in order with their fields"""
+    path = str(tmp_path / "BTC-USDT.wal")
+    order = make_order("o1", OrderSide.BUY, 50000.5, quantity=0.25)
+    journal = Journal(path)
+    journal.append_new("BTC-USDT", order)
+    journal.append_new("BTC-USDT", make_order("m1", OrderSide.SELL, None, order_type=OrderType.MARKET))
+    journal.append_cancel("BTC-USDT", "o1")
+    journal.close()
+
+    entries = list(read_journal(path))
+    assert [entry[0] for entry in entries] == [1, 2, 3]
+    sequence, symbol, restored = entries[0]
+    assert symbol == "BTC-USDT"
+    assert (restored.order_id, restored.side, restored.order_type) == ("o1", OrderSide.BUY, OrderType.LIMIT)
+    assert (restored.price, restored.quantity) == (50000.5, 0.25)
+    assert restored.timestamp == order.timestamp
+    assert entries[1][2].price is None
+    assert isinstance(entries[2][2], OrderCancel) and entries[2][2].order_id == "o1"
+
+def test_torn_tail_is_discarded(tmp_path):
+    """Test a partially written last frame is dropped and the sequence continues"""
+    path = str(tmp_path / "BTC-USDT.wal")
+    journal = Journal(path)
+    journal.append_new("BTC-USDT", make_order("o1", OrderSide.BUY, 50000.0))
+    journal.append_new("BTC-USDT", make_order("o2", OrderSide.BUY, 49999.0))
+    journal.close()
+    with open(path, "r+b") as handle:
+        handle.truncate(os.path.getsize(path) - 3)
+
+    assert [entry[0] for entry in read_journal(path)] == [1]
+    journal = Journal(path)
+    assert journal.sequence == 1
+    journal.append_cancel("BTC-USDT", "o1")
+    journal.close()
+    assert [entry[0] for entry in read_journal(path)] == [1, 2]
+
+def test_replay_rebuilds_the_book(tmp_path):
+    """Test replaying a sequencer's journal reproduces the book it wrote"""
+    path = str(tmp_path / "BTC-USDT.wal")
+    book = OrderBook("BTC-USDT")
+    sequencer = BookSequencer(book, journal=Journal(path)).start()
+    sequencer.submit("add_order", make_order("s1", OrderSide.SELL, 50000.0, quantity=2.0))
+    sequencer.submit("add_order", make_order("s2", OrderSide.SELL, 50001.0))
+    sequencer.submit("add_order", make_order("b1", OrderSide.BUY, 50000.0, quantity=0.5))
+    sequencer.submit("cancel_order", "s2")
+    sequencer.submit("cancel_order", "missing")
+    sequencer.submit("add_orders", [make_order("b2", OrderSide.BUY, 49990.0), OrderCancel(order_id="b2")])
+    sequencer.stop(timeout=5)
+
+    assert len(list(read_journal(path))) == 6
+    rebuilt = OrderBook("BTC-USDT")
+    assert replay_journal(path, {"BTC-USDT": rebuilt}) == 6
+    assert book_state(rebuilt) == book_state(book)
+    assert rebuilt.orders["s1"].remaining_quantity == 1.5
+
+    recovered = OrderBook("BTC-USDT")
+    journal = open_book_journal(str(tmp_path), recovered)
+    assert journal.sequence == 6
+    assert book_state(recovered) == book_state(book)
+    journal.close()
+
+def test_amends_are_journaled_and_replayed(tmp_path):
+    """Test only amends that applied are journaled, and replay reproduces them"""
+    path = str(tmp_path / "BTC-USDT.wal")
+    book = OrderBook("BTC-USDT")
+    sequencer = BookSequencer(book, journal=Journal(path)).start()
+    sequencer.submit("add_order", make_order("b1", OrderSide.BUY, 49990.0, quantity=2.0))
+    sequencer.submit("add_order", make_order("b2", OrderSide.BUY, 49990.0))
+    sequencer.submit("amend_order", "b1", 1.5)
+    sequencer.submit("amend_order", "b2", None, 49995.0)
+    sequencer.submit("amend_order", "missing", 1.0)
+    sequencer.submit("add_orders", [OrderAmend(order_id="b1", quantity=1.0)])
+    sequencer.stop(timeout=5)
+
+    entries = list(read_journal(path))
+    assert len(entries) == 5
+    assert entries[3][2] == OrderAmend(order_id="b2", quantity=None, price=49995.0)
+    rebuilt = OrderBook("BTC-USDT")
+    replay_journal(path, {"BTC-USDT": rebuilt})
+    assert book_state(rebuilt) == book_state(book)
+    assert rebuilt.orders["b1"].remaining_quantity == 1.0
+
+def test_batch_durability_commits_once_per_batch(tmp_path):
+    """Test group commit issues one fsync for many commands"""
+    journal = Journal(str(tmp_path / "batch.wal"), durability="batch")
+    for i in range(10):
+        journal.append_new("BTC-USDT", make_order(f"o{i}", OrderSide.BUY, 50000.0))
+    journal.commit()
+    journal.commit()
+    assert journal.fsyncs == 1
+    journal.close()
+
+    journal = Journal(str(tmp_path / "sync.wal"), durability="sync")
+    for i in range(3):
+        journal.append_new("BTC-USDT", make_order(f"o{i}", OrderSide.BUY, 50000.0))
+    assert journal.fsyncs == 3
+    journal.close()
+
+    with pytest.raises(ValueError):
+        Journal(str(tmp_path / "bad.wal"), durability="sometimes")
+
+def test_mass_cancels_are_journaled_with_owners(tmp_path):
+    """Test owners survive the journal and a mass cancel replays to the same book"""
+    path = str(tmp_path / "BTC-USDT.wal")
+    book = OrderBook("BTC-USDT")
+    sequencer = BookSequencer(book, journal=Journal(path)).start()
+    for i, price in enumerate([49990.0, 49980.0, 49970.0]):
+        sequencer.submit("add_order", make_order(f"b{i}", OrderSide.BUY, price, owner="alice" if i < 2 else None))
+    sequencer.submit("mass_cancel", "alice", OrderSide.BUY, 49985.0)
+    sequencer.submit("mass_cancel", "bob")
+    sequencer.stop(timeout=5)
+
+    entries = list(read_journal(path))
+    assert len(entries) == 4
+    assert [entry[2].owner for entry in entries[:3]] == ["alice", "alice", None]
+    assert entries[3][2] == OrderMassCancel(owner="alice", side=OrderSide.BUY, min_price=49985.0)
+    rebuilt = OrderBook("BTC-USDT")
+    replay_journal(path, {"BTC-USDT": rebuilt})
+    assert book_state(rebuilt) == book_state(book)
+    assert list(rebuilt.owner_orders["alice"]) == ["b1"]
+
+def test_stop_orders_are_journaled_and_replayed(tmp_path):
+    """Test stop prices survive the journal and replayed trades fire the same stops"""
+    path = str(tmp_path / "BTC-USDT.wal")
+    book = OrderBook("BTC-USDT")
+    sequencer = BookSequencer(book, journal=Journal(path)).start()
+    sequencer.submit("add_order", make_order("b1", OrderSide.BUY, 49990.0))
+    sequencer.submit("add_order", make_order("b2", OrderSide.BUY, 49980.0))
+    stop = make_order("stop", OrderSide.SELL, order_type=OrderType.STOP, stop_price=49990.0)
+    sequencer.submit("add_order", stop)
+    sequencer.submit("add_order", make_order("m1", OrderSide.SELL, None, order_type=OrderType.MARKET))
+    sequencer.stop(timeout=5)
+
+    assert [entry[2].stop_price for entry in read_journal(path)] == [None, None, 49990.0, None]
+    rebuilt = OrderBook("BTC-USDT")
+    replay_journal(path, {"BTC-USDT": rebuilt})
+    assert book_state(rebuilt) == book_state(book)
+    assert rebuilt.get_order("stop")["status"] == OrderStatus.FILLED
+
+def test_iceberg_orders_are_journaled_and_replayed(tmp_path):
+    """Test display quantities survive the journal, alone and alongside a stop price"""
+    path = str(tmp_path / "BTC-USDT.wal")
+    book = OrderBook("BTC-USDT")
+    sequencer = BookSequencer(book, journal=Journal(path)).start()
+    sequencer.submit("add_order", make_order("ice", OrderSide.SELL, 50000.0, quantity=3.0, display_quantity=1.0))
+    sequencer.submit("add_order", make_order("b1", OrderSide.BUY, 50000.0, quantity=1.5))
+    sequencer.stop(timeout=5)
+
+    entries = [entry[2] for entry in read_journal(path)]
+    assert [(order.display_quantity, order.stop_price) for order in entries] == [(1.0, None), (None, None)]
+    rebuilt = OrderBook("BTC-USDT")
+    replay_journal(path, {"BTC-USDT": rebuilt})
+    assert book_state(rebuilt) == book_state(book)
+    assert rebuilt.get_order("ice")["remaining_quantity"] == 1.5
+
+def test_journal_rejects_other_formats(tmp_path):
+    """Test a journal with a different magic is refused rather than misread"""
+    path = str(tmp_path / "BTC-USDT.wal")
+    journal = Journal(path)
+    journal.append_new("BTC-USDT", make_order("o1", OrderSide.BUY, 50000.0))
+    journal.close()
+    with open(path, "r+b") as handle:
+        handle.write(b"MEJ1")
+    with pytest.raises(ValueError, match="not a matching engine journal"):
+        list(read_journal(path))
+    with pytest.raises(ValueError, match="not a matching engine journal"):
+        Journal(path)
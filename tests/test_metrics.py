@@ -0,0 +1,58 @@
+import random
+import pytest
+from .conftest import make_order
+from src.engine.metrics import LatencyHistogram
+from src.engine.order import OrderSide, OrderType
+from src.engine.orderbook import OrderBook
+
+
+def test_histogram_percentiles_within_precision():
+    rng = random.Random(7)
+    samples = sorted(rng.randint(1, 5_000_000) for _ in range(10_000))
+    histogram = LatencyHistogram()
+    for sample in samples:
+        histogram.record(sample)
+
+    assert histogram.count == len(samples)
+    assert histogram.max == samples[-1]
+    for pct in (50, 90, 99, 99.9):
+        exact = samples[int(-(-len(samples) * pct // 100)) - 1]
+        # Reported value is the bucket's upper bound: never below, at most ~3% above
+        assert exact <= histogram.percentile(pct) <= exact * 1.035
+
+
+def test_histogram_small_values_exact_and_empty():
+    histogram = LatencyHistogram()
+    assert histogram.percentile(99) == 0
+    assert histogram.summary()["count"] == 0
+    for value in (3, 5, 7):
+        histogram.record(value)
+    assert histogram.percentile(50) == 5
+    assert histogram.percentile(100) == 7
+    with pytest.raises(ValueError):
+        LatencyHistogram(precision_bits=1)
+
+
+def test_book_metrics_disabled_by_default():
+    book = OrderBook("BTC-USDT")
+    assert book.metrics is None
+    assert book.get_metrics() is None
+
+
+def test_book_metrics_count_operations():
+    book = OrderBook("BTC-USDT")
+    book.enable_metrics()
+    book.add_order(make_order("sell1", OrderSide.SELL, 50000.0, 1.0))
+    book.add_order(make_order("sell2", OrderSide.SELL, 50001.0, 1.0))
+    book.add_order(make_order("market1", OrderSide.BUY, quantity=1.5, order_type=OrderType.MARKET))
+    book.add_order(make_order("buy1", OrderSide.BUY, 49000.0, 1.0))
+    book.cancel_order("buy1")
+
+    metrics = book.get_metrics()
+    assert metrics["orders"] == {"market": 1, "limit": 3, "ioc": 0, "fok": 0, "stop": 0, "stop_limit": 0}
+    assert metrics["trades"] == 2
+    assert metrics["levels_matched"] == 2
+    assert metrics["cancels"] == 1
+    assert metrics["latency"]["add_order"]["count"] == 4
+    assert metrics["latency"]["cancel_order"]["count"] == 1
+    assert metrics["ask_levels"] == 1
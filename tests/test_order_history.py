@@ -0,0 +1,40 @@
+import pytest
+from src.engine.order import OrderSide, OrderStatus, OrderType
+from src.engine.order_history import OrderHistory
+from src.engine.order_record import OrderRecord
+
+def make_record(order_id):
+    return OrderRecord(0, order_id, OrderSide.BUY, OrderType.LIMIT, 100.0, 1.0, status=OrderStatus.FILLED)
+
+def test_history_evicts_oldest():
+    """Test the history keeps at most max_size entries, oldest evicted first"""
+    history = OrderHistory(max_size=2)
+    for order_id in ["a", "b", "c"]:
+        history.add(make_record(order_id))
+
+    assert len(history) == 2
+    assert "a" not in history
+    assert history.get("c").order_id == "c"
+    assert history.evictions == 1
+
+def test_history_ttl(monkeypatch):
+    """Test entries expire after the TTL"""
+    now = [1000.0]
+    monkeypatch.setattr("src.engine.order_history.time.monotonic", lambda: now[0])
+    history = OrderHistory(ttl=10)
+    history.add(make_record("a"))
+    now[0] += 5
+    history.add(make_record("b"))
+
+    now[0] += 6
+    assert history.get("a") is None
+    assert history.get("b") is not None
+    assert len(history) == 1
+
+def test_history_disabled():
+    """Test a zero-size history stores nothing and rejects negative sizes"""
+    history = OrderHistory(max_size=0)
+    history.add(make_record("a"))
+    assert len(history) == 0
+    with pytest.raises(ValueError):
+        OrderHistory(max_size=-1)
@@ -0,0 +1,41 @@
+import gc
+import weakref
+from src.engine.order import Order, OrderSide, OrderStatus
+from src.engine.order_record import OrderRecord
+
+def test_record_from_order(limit_buy_order):
+    """Test building an internal record from an API order"""
+    record = OrderRecord.from_order(limit_buy_order, 7)
+
+    assert record.oid == 7
+    assert record.order_id == limit_buy_order.order_id
+    assert record.side == OrderSide.BUY
+    assert record.price == limit_buy_order.price
+    assert record.remaining_quantity == limit_buy_order.quantity
+    assert record.status == OrderStatus.NEW
+    assert isinstance(record.timestamp_ns, int)
+    assert not hasattr(record, "__dict__")
+
+def test_record_sync_updates_live_order(limit_buy_order):
+    """Test fill state is mirrored onto the originating order"""
+    record = OrderRecord.from_order(limit_buy_order, 1)
+    record.filled_quantity = 0.25
+    record.remaining_quantity = 0.75
+    record.status = OrderStatus.PARTIAL
+    record.sync()
+
+    assert limit_buy_order.filled_quantity == 0.25
+    assert limit_buy_order.remaining_quantity == 0.75
+    assert limit_buy_order.status == OrderStatus.PARTIAL
+
+def test_record_does_not_keep_order_alive(sample_order_params):
+    """Test the record only holds a weak reference to the API order"""
+    order = Order(**sample_order_params)
+    ref = weakref.ref(order)
+    record = OrderRecord.from_order(order, 1)
+    del order
+    gc.collect()
+
+    assert ref() is None
+    record.status = OrderStatus.FILLED
+    record.sync()  # Must be a no-op once the order is gone
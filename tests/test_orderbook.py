@@ -1,5 +1,6 @@
 import pytest
-from src.engine.order import Order, OrderType, OrderSide, OrderStatus
+from .conftest import BTC_USDT, make_order
+from src.engine.order import Order, OrderAmend, OrderCancel, OrderType, OrderSide, OrderStatus
 from src.engine.orderbook import OrderBook
 
 def test_order_book_initialization(empty_order_book):
@@ -140,4 +141,618 @@ def test_order_book_snapshot(populated_order_book):
     assert "bids" in snapshot
     assert "asks" in snapshot
     assert len(snapshot["bids"]) > 0
-    assert len(snapshot["asks"]) > 0
\ No newline at end of file
+    assert len(snapshot["asks"]) > 0
+
+def test_all_levels_returns_both_sides(populated_order_book):
+    """Test both sides of the full book come back from a single call"""
+    levels = populated_order_book.get_all_levels()
+    assert levels == {"bids": populated_order_book.get_all_bids(), "asks": populated_order_book.get_all_asks()}
+    assert levels["bids"] and levels["asks"]
+
+def test_level_quantity_tracks_fills_and_cancels(empty_order_book):
+    """Test aggregated level quantity stays in sync with the queue"""
+    for order_id in ["s1", "s2", "s3"]:
+        empty_order_book.add_order(Order(
+            order_id=order_id,
+            symbol="BTC-USDT",
+            order_type=OrderType.LIMIT,
+            side=OrderSide.SELL,
+            quantity=1.0,
+            price=50000.0,
+            remaining_quantity=1.0
+        ))
+
+    # Cancel from the middle of the queue
+    assert empty_order_book.cancel_order("s2") == True
+    assert empty_order_book.asks[50000.0] == 2.0
+
+    # Partially fill the head of the queue
+    trades = empty_order_book.add_order(Order(
+        order_id="b1",
+        symbol="BTC-USDT",
+        order_type=OrderType.LIMIT,
+        side=OrderSide.BUY,
+        quantity=1.5,
+        price=50000.0,
+        remaining_quantity=1.5
+    ))
+
+    assert [trade["maker_order_id"] for trade in trades] == ["s1", "s3"]
+    assert empty_order_book.asks[50000.0] == 0.5
+    assert [order.order_id for order in empty_order_book.ask_queues[50000.0]] == ["s3"]
+
+def test_resting_order_reflects_partial_fill(empty_order_book, limit_sell_order):
+    """Test a caller-held resting order catches up with its fills when read back"""
+    empty_order_book.add_order(limit_sell_order)
+    empty_order_book.add_order(Order(
+        order_id="b1",
+        symbol="BTC-USDT",
+        order_type=OrderType.LIMIT,
+        side=OrderSide.BUY,
+        quantity=0.4,
+        price=limit_sell_order.price,
+        remaining_quantity=0.4
+    ))
+
+    assert limit_sell_order.status == OrderStatus.NEW  # Not synced per maker fill
+    assert empty_order_book.get_order(limit_sell_order.order_id)["status"] == OrderStatus.PARTIAL
+    assert limit_sell_order.status == OrderStatus.PARTIAL
+    assert limit_sell_order.remaining_quantity == pytest.approx(0.6)
+    assert empty_order_book.orders[limit_sell_order.order_id].filled_quantity == pytest.approx(0.4)
+
+def test_add_orders_batch(empty_order_book, limit_buy_order, limit_sell_order):
+    """Test a batch of new orders and cancels is processed in sequence"""
+    taker = Order(
+        order_id="taker1",
+        symbol="BTC-USDT",
+        order_type=OrderType.MARKET,
+        side=OrderSide.SELL,
+        quantity=1.0,
+        remaining_quantity=1.0
+    )
+    results = empty_order_book.add_orders([
+        limit_buy_order,
+        limit_sell_order,
+        OrderCancel(order_id=limit_sell_order.order_id),
+        taker,
+        OrderCancel(order_id="missing"),
+    ])
+
+    assert [result.get("cancelled") for result in results] == [None, None, True, None, False]
+    assert results[3]["order"] is taker
+    assert results[3]["trades"][0]["maker_order_id"] == limit_buy_order.order_id
+    assert len(empty_order_book.bids) == 0
+    assert len(empty_order_book.asks) == 0
+
+def test_add_orders_rejects_invalid_batch_atomically(limit_buy_order):
+    """Test a batch with an invalid order leaves the book untouched"""
+    from decimal import Decimal
+    from src.engine.instrument import Instrument
+
+    book = OrderBook("BTC-USDT", Instrument(symbol="BTC-USDT", tick_size=Decimal("1"), lot_size=Decimal("0.5")))
+    off_lot = Order(
+        order_id="bad",
+        symbol="BTC-USDT",
+        order_type=OrderType.LIMIT,
+        side=OrderSide.SELL,
+        quantity=0.3,
+        price=50100.0,
+        remaining_quantity=0.3
+    )
+
+    with pytest.raises(ValueError):
+        book.add_orders([limit_buy_order, off_lot])
+    assert len(book.orders) == 0
+    assert len(book.bids) == 0
+
+def test_level_changes_are_coalesced_and_sequenced(empty_order_book, limit_buy_order, limit_sell_order):
+    """Test the L2 delta feed reports the latest aggregate per changed level"""
+    empty_order_book.add_order(limit_buy_order)
+    empty_order_book.add_order(limit_sell_order)
+    snapshot = empty_order_book.get_order_book_snapshot()
+    update = empty_order_book.drain_level_changes()
+
+    assert update["start_sequence"] == 1
+    assert update["sequence"] == snapshot["sequence"] == 2
+    assert update["bids"] == [[50000.0, 1.0]]
+    assert update["asks"] == [[50100.0, 1.0]]
+    assert empty_order_book.drain_level_changes() is None
+
+    empty_order_book.cancel_order(limit_buy_order.order_id)
+    empty_order_book.add_order(Order(
+        order_id="taker",
+        symbol="BTC-USDT",
+        order_type=OrderType.MARKET,
+        side=OrderSide.BUY,
+        quantity=0.25,
+        remaining_quantity=0.25
+    ))
+    update = empty_order_book.drain_level_changes()
+
+    assert update["start_sequence"] == 3
+    assert update["bids"] == [[50000.0, 0.0]]  # Level removed
+    assert update["asks"] == [[50100.0, 0.75]]
+
+def test_terminal_orders_leave_active_index(limit_buy_order, limit_sell_order):
+    """Test only resting orders stay in orders; completed ones move to a bounded history"""
+    book = OrderBook("BTC-USDT", history_size=2)
+    book.add_order(limit_sell_order)
+    book.add_order(Order(
+        order_id="taker",
+        symbol="BTC-USDT",
+        order_type=OrderType.MARKET,
+        side=OrderSide.BUY,
+        quantity=1.0,
+        remaining_quantity=1.0
+    ))
+    book.add_order(limit_buy_order)
+
+    assert list(book.orders) == [limit_buy_order.order_id]
+    assert book.get_order("taker")["status"] == OrderStatus.FILLED
+    maker = book.get_order(limit_sell_order.order_id)
+    assert maker["status"] == OrderStatus.FILLED and not maker["resting"]
+    assert book.get_order(limit_buy_order.order_id)["resting"]
+    assert book.cancel_order(limit_sell_order.order_id) is False
+
+    book.cancel_order(limit_buy_order.order_id)
+    assert len(book.orders) == 0
+    assert book.get_order(limit_buy_order.order_id)["status"] == OrderStatus.CANCELLED
+    assert book.get_order(limit_sell_order.order_id) is None  # Evicted
+    stats = book.memory_stats()
+    assert (stats["resting_orders"], stats["history_orders"], stats["history_evictions"]) == (0, 2, 1)
+
+def test_immediate_orders_respect_limit_price(empty_order_book):
+    """Test IOC and FOK orders never trade through their limit price"""
+    for i, price in enumerate([50000.0, 50001.0, 50002.0]):
+        empty_order_book.add_order(Order(
+            order_id=f"s{i}",
+            symbol="BTC-USDT",
+            order_type=OrderType.LIMIT,
+            side=OrderSide.SELL,
+            quantity=1.0,
+            price=price,
+            remaining_quantity=1.0
+        ))
+
+    ioc_order = Order(
+        order_id="ioc1",
+        symbol="BTC-USDT",
+        order_type=OrderType.IOC,
+        side=OrderSide.BUY,
+        quantity=3.0,
+        price=50001.0,
+        remaining_quantity=3.0
+    )
+    trades = empty_order_book.add_order(ioc_order)
+    assert [trade["price"] for trade in trades] == [50000.0, 50001.0]
+    assert ioc_order.status == OrderStatus.PARTIAL
+    assert empty_order_book.best_ask == 50002.0
+
+    fok_order = Order(
+        order_id="fok1",
+        symbol="BTC-USDT",
+        order_type=OrderType.FOK,
+        side=OrderSide.BUY,
+        quantity=1.0,
+        price=50002.0,
+        remaining_quantity=1.0
+    )
+    trades = empty_order_book.add_order(fok_order)
+    assert [trade["maker_order_id"] for trade in trades] == ["s2"]
+    assert fok_order.status == OrderStatus.FILLED
+
+def test_quote_sweep(populated_order_book):
+    """Test pre-trade sweep estimates leave the book untouched"""
+    for i, price in enumerate([50100.0, 50200.0]):
+        populated_order_book.add_order(Order(
+            order_id=f"extra{i}",
+            symbol="BTC-USDT",
+            order_type=OrderType.LIMIT,
+            side=OrderSide.SELL,
+            quantity=1.0,
+            price=price,
+            remaining_quantity=1.0
+        ))
+    sequence = populated_order_book.sequence
+
+    quote = populated_order_book.quote_sweep(OrderSide.BUY, 2.5)
+    assert quote["fillable_quantity"] == 2.5
+    assert quote["fully_fillable"]
+    assert quote["worst_price"] == 50200.0
+    assert quote["notional"] == pytest.approx(2 * 50100.0 + 0.5 * 50200.0)
+
+    quote = populated_order_book.quote_sweep(OrderSide.BUY, 5.0, limit_price=50100.0)
+    assert quote["fillable_quantity"] == 2.0
+    assert not quote["fully_fillable"]
+    assert quote["average_price"] == pytest.approx(50100.0)
+    assert populated_order_book.quote_sweep(OrderSide.SELL, 1.0, limit_price=60000.0)["worst_price"] is None
+    assert populated_order_book.sequence == sequence
+
+def test_trades_have_sequential_ids_and_are_taped(empty_order_book):
+    """Test fills get unique ordered ids and land on the trade tape"""
+    for i in range(3):
+        empty_order_book.add_order(Order(
+            order_id=f"s{i}",
+            symbol="BTC-USDT",
+            order_type=OrderType.LIMIT,
+            side=OrderSide.SELL,
+            quantity=1.0,
+            price=50000.0 + i,
+            remaining_quantity=1.0
+        ))
+    trades = empty_order_book.add_order(Order(
+        order_id="sweep",
+        symbol="BTC-USDT",
+        order_type=OrderType.MARKET,
+        side=OrderSide.BUY,
+        quantity=3.0,
+        remaining_quantity=3.0
+    ))
+
+    assert [trade.trade_id for trade in trades] == [1, 2, 3]
+    assert trades[0].taker_oid == empty_order_book.history.get("sweep").oid
+    assert [trade["maker_order_id"] for trade in empty_order_book.get_trades(after_trade_id=1)] == ["s1", "s2"]
+    assert empty_order_book.trade_tape.last_trade_id == 3
+
+def test_snapshot_orders_levels_best_first(empty_order_book):
+    """Test snapshot bids are highest first, asks lowest first, cut at depth"""
+    for i, price in enumerate((49900.0, 50000.0, 49800.0)):
+        empty_order_book.add_order(Order(
+            order_id=f"buy{i}", symbol="BTC-USDT", order_type=OrderType.LIMIT,
+            side=OrderSide.BUY, quantity=1.0, price=price, remaining_quantity=1.0
+        ))
+    for i, price in enumerate((50200.0, 50100.0)):
+        empty_order_book.add_order(Order(
+            order_id=f"sell{i}", symbol="BTC-USDT", order_type=OrderType.LIMIT,
+            side=OrderSide.SELL, quantity=1.0, price=price, remaining_quantity=1.0
+        ))
+
+    snapshot = empty_order_book.get_order_book_snapshot(2)
+    assert snapshot["bids"] == [[50000.0, 1.0], [49900.0, 1.0]]
+    assert snapshot["asks"] == [[50100.0, 1.0], [50200.0, 1.0]]
+    assert len(empty_order_book.get_order_book_snapshot(None)["bids"]) == 3
+
+def test_snapshot_cache_rebuilds_only_changed_side(empty_order_book, limit_buy_order, limit_sell_order):
+    """Test cached snapshot levels are reused until their side changes"""
+    empty_order_book.add_order(limit_buy_order)
+    empty_order_book.add_order(limit_sell_order)
+    first = empty_order_book.get_order_book_snapshot()
+    cached = empty_order_book._depth_cache[10]
+    bids, asks = cached[1], cached[3]
+
+    empty_order_book.get_order_book_snapshot()
+    assert cached[1] is bids and cached[3] is asks
+
+    empty_order_book.cancel_order(limit_buy_order.order_id)
+    second = empty_order_book.get_order_book_snapshot()
+    assert cached[1] is not bids and cached[3] is asks
+    assert second["bids"] == []
+    assert second["asks"] == first["asks"]
+
+def test_snapshot_edits_do_not_reach_the_cache(empty_order_book, limit_sell_order):
+    """Test mutating a returned snapshot leaves later snapshots intact"""
+    empty_order_book.add_order(limit_sell_order)
+    expected = empty_order_book.get_order_book_snapshot()["asks"]
+    snapshot = empty_order_book.get_order_book_snapshot()
+    snapshot["asks"][0][1] = 0.0
+    snapshot["asks"].append([1.0, 1.0])
+    assert empty_order_book.get_order_book_snapshot()["asks"] == expected == [[limit_sell_order.price, 1.0]]
+
+@pytest.mark.parametrize("instrument,backend", [
+    (None, "sorted"),
+    (BTC_USDT, "sorted"),
+    (BTC_USDT, "ladder"),
+])
+def test_l3_orders_paginate_in_priority_order(instrument, backend):
+    """Test L3 pages walk bids best price first and FIFO within a level"""
+    book = OrderBook("BTC-USDT", instrument, backend)
+    for i, price in enumerate([49900.0, 50000.0, 50000.0, 49800.0, 49900.0]):
+        book.add_order(Order(
+            order_id=f"buy{i}", symbol="BTC-USDT", order_type=OrderType.LIMIT,
+            side=OrderSide.BUY, quantity=1.0, price=price, remaining_quantity=1.0
+        ))
+
+    pages = []
+    cursor = None
+    while True:
+        page = book.get_orders(OrderSide.BUY, cursor, limit=2)
+        pages.append([order["order_id"] for order in page["orders"]])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert pages == [["buy1", "buy2"], ["buy0", "buy4"], ["buy3"]]
+
+    # A cursor stays valid after the order it names has left the book
+    page = book.get_orders(OrderSide.BUY, limit=3)
+    book.cancel_order("buy0")
+    rest = book.get_orders(OrderSide.BUY, page["next_cursor"])
+    assert [order["order_id"] for order in rest["orders"]] == ["buy4", "buy3"]
+
+    filtered = book.get_orders(OrderSide.BUY, min_price=49850.0, max_price=49950.0)
+    assert [(order["order_id"], order["price"]) for order in filtered["orders"]] == [("buy4", 49900.0)]
+    assert book.get_orders(OrderSide.SELL)["orders"] == []
+    with pytest.raises(ValueError):
+        book.get_orders(OrderSide.BUY, "not-a-cursor")
+
+def test_l3_cursor_at_page_boundaries(empty_order_book):
+    """Test a page that ends a level resumes at the next one, and a page that ends the side has no cursor"""
+    book = empty_order_book
+    for order_id, price in [("a", 50000.0), ("b", 50000.0), ("c", 50001.0)]:
+        book.add_order(make_order(order_id, OrderSide.SELL, price))
+
+    page = book.get_orders(OrderSide.SELL, limit=2)
+    assert [order["order_id"] for order in page["orders"]] == ["a", "b"]
+    assert page["next_cursor"].endswith(":b")
+    rest = book.get_orders(OrderSide.SELL, page["next_cursor"], limit=1)
+    assert ([order["order_id"] for order in rest["orders"]], rest["next_cursor"]) == (["c"], None)
+    assert book.get_orders(OrderSide.SELL, limit=3)["next_cursor"] is None
+    with pytest.raises(ValueError):
+        book.get_orders(OrderSide.SELL, limit=0)
+
+def test_amend_decrease_keeps_priority(instrument):
+    """Test a size decrease is applied in place, ahead of later orders"""
+    book = OrderBook("BTC-USDT", instrument)
+    first = make_order("first", OrderSide.BUY, 50000.0, quantity=2.0)
+    book.add_order(first)
+    book.add_order(make_order("second", OrderSide.BUY, 50000.0))
+
+    result = book.amend_order("first", quantity=0.5)
+    assert result["amended"] and result["priority_kept"]
+    assert result["order"]["remaining_quantity"] == 0.5
+    assert (first.quantity, first.remaining_quantity) == (0.5, 0.5)
+    assert book.get_order_book_snapshot()["bids"] == [[50000.0, 1.5]]
+
+    trades = book.add_order(Order(
+        order_id="taker", symbol="BTC-USDT", order_type=OrderType.MARKET,
+        side=OrderSide.SELL, quantity=0.5, remaining_quantity=0.5
+    ))
+    assert [trade["maker_order_id"] for trade in trades] == ["first"]
+    if instrument is not None:
+        assert book.bid_depth.quantity_within(None) == sum(book.bids.values())
+
+def test_amend_increase_or_price_change_requeues():
+    """Test a size increase loses priority and a crossing price change trades"""
+    book = OrderBook("BTC-USDT")
+    book.add_order(make_order("first", OrderSide.BUY, 50000.0))
+    book.add_order(make_order("second", OrderSide.BUY, 50000.0))
+    book.add_order(make_order("ask", OrderSide.SELL, 50010.0))
+
+    result = book.amend_order("first", quantity=3.0)
+    assert result["amended"] and not result["priority_kept"]
+    assert [order.order_id for order in book.bid_queues[50000.0]] == ["second", "first"]
+    assert book.bids[50000.0] == 4.0
+
+    result = book.amend_order("second", price=50010.0)
+    assert [trade["maker_order_id"] for trade in result["trades"]] == ["ask"]
+    assert result["order"]["status"] == OrderStatus.FILLED
+    assert "second" not in book.orders
+    assert list(book.bids.items()) == [(50000.0, 3.0)]
+    assert not book.asks
+
+def test_amend_rejections():
+    """Test amends of missing or over-filled orders change nothing"""
+    book = OrderBook("BTC-USDT")
+    book.add_order(make_order("bid", OrderSide.BUY, 50000.0, quantity=2.0))
+    book.add_order(make_order("ask", OrderSide.SELL, 50000.0))
+
+    assert book.amend_order("missing", quantity=1.0) == {
+        "order_id": "missing", "amended": False, "reason": "Order is not resting"
+    }
+    assert book.amend_order("bid", quantity=1.0)["amended"] is False  # 1.0 already filled
+    assert book.bids[50000.0] == 1.0
+    with pytest.raises(ValueError):
+        book.amend_order("bid")
+    with pytest.raises(ValueError):
+        book.amend_order("bid", quantity=0)
+    for price in (0, -1.0):
+        with pytest.raises(ValueError):
+            book.amend_order("bid", price=price)
+    assert book.get_order("bid")["price"] == 50000.0
+
+def test_batch_amends_are_validated_up_front():
+    """Test an invalid amend in a batch leaves the book untouched"""
+    instrument = BTC_USDT
+    book = OrderBook("BTC-USDT", instrument)
+    book.add_order(make_order("bid", OrderSide.BUY, 50000.0))
+
+    with pytest.raises(ValueError):
+        book.add_orders([OrderCancel(order_id="bid"), OrderAmend(order_id="bid", price=50000.001)])
+    assert "bid" in book.orders
+
+    [result] = book.add_orders([OrderAmend(order_id="bid", quantity=0.4)])
+    assert result["priority_kept"] and book.bids[book.bids.peekitem(0)[0]] == 400
+
+def test_mass_cancel_by_owner(instrument):
+    """Test an owner's orders are pulled in one coalesced update, leaving others queued"""
+    book = OrderBook("BTC-USDT", instrument)
+    book.add_order(make_order("a1", OrderSide.BUY, 50000.0, owner="alice"))
+    book.add_order(make_order("b1", OrderSide.BUY, 50000.0, quantity=2.0, owner="bob"))
+    book.add_order(make_order("a2", OrderSide.BUY, 49990.0, owner="alice"))
+    book.add_order(make_order("a3", OrderSide.SELL, 50010.0, owner="alice"))
+    book.drain_level_changes()
+
+    assert sorted(book.mass_cancel("alice")) == ["a1", "a2", "a3"]
+    assert list(book.orders) == ["b1"]
+    assert "alice" not in book.owner_orders
+    assert book.get_order_book_snapshot()["bids"] == [[50000.0, 2.0]]
+    assert not book.asks
+    assert [record.order_id for record in book.bid_queues[book.bids.peekitem(0)[0]]] == ["b1"]
+    assert book.get_order("a2")["status"] == OrderStatus.CANCELLED
+    if instrument is not None:
+        assert book.bid_depth.quantity_within(None) == sum(book.bids.values())
+
+    update = book.drain_level_changes()
+    assert update["bids"] == [[50000.0, 2.0], [49990.0, 0.0]]
+    assert update["asks"] == [[50010.0, 0.0]]
+    assert book.mass_cancel("alice") == []
+
+def test_mass_cancel_by_side_and_price():
+    """Test whole levels within a price range are dropped on one side only"""
+    book = OrderBook("BTC-USDT")
+    for i, price in enumerate([50000.0, 49990.0, 49990.0, 49980.0]):
+        book.add_order(make_order(f"b{i}", OrderSide.BUY, price))
+    book.add_order(make_order("s0", OrderSide.SELL, 50010.0, owner="alice"))
+
+    assert book.mass_cancel(side=OrderSide.BUY, min_price=49985.0, max_price=49995.0) == ["b1", "b2"]
+    assert list(book.bids.items()) == [(50000.0, 1.0), (49980.0, 1.0)]
+    assert 49990.0 not in book.bid_queues
+
+    # A filled owned order leaves the owner index too
+    book.add_order(make_order("taker", OrderSide.BUY, 50010.0))
+    assert book.owner_orders == {}
+    assert sorted(book.mass_cancel()) == ["b0", "b3"]
+    assert not book.bids and not book.orders
+
+def test_stop_orders_wait_for_the_last_trade_price(instrument):
+    """Test stops stay off the book until a trade reaches their stop price"""
+    book = OrderBook("BTC-USDT", instrument)
+    for price in (50000.0, 50010.0, 50020.0):
+        book.add_order(make_order(f"ask{price:g}", OrderSide.SELL, price))
+    stop = make_order("stop", OrderSide.BUY, order_type=OrderType.STOP, stop_price=50010.0)
+    stop_limit = make_order("stop_limit", OrderSide.BUY, 50005.0, order_type=OrderType.STOP_LIMIT, stop_price=50010.0)
+    assert book.add_order(stop) == [] and book.add_order(stop_limit) == []
+    assert book.get_order("stop")["stop_price"] == 50010.0
+    assert not book.get_order("stop")["resting"]
+    assert book.get_order_book_snapshot()["bids"] == []
+
+    # 50000 is below both stops; the stop market fires at 50010 and the stop limit then rests
+    assert len(book.add_order(make_order("t1", OrderSide.BUY, order_type=OrderType.MARKET))) == 1
+    assert "stop" in book.stop_orders
+    trades = book.add_order(make_order("t2", OrderSide.BUY, order_type=OrderType.MARKET))
+    assert [trade["taker_order_id"] for trade in trades] == ["t2", "stop"]
+    assert stop.status == OrderStatus.FILLED
+    assert book.get_order_book_snapshot()["bids"] == [[50005.0, 1.0]]
+    assert book.get_order("stop_limit")["resting"] and not book.stop_orders
+
+    # Arriving already triggered, a stop executes at once (a sell stop at or above the last trade)
+    assert not book.asks  # The stop market took 50020, the last trade price
+    assert len(book.add_order(make_order("late", OrderSide.SELL, quantity=0.5, order_type=OrderType.STOP, stop_price=50020.0))) == 1
+    assert book.bids[book.bids.peekitem(0)[0]] == (0.5 if instrument is None else 500)
+
+def test_stop_cascade_runs_iteratively():
+    """Test a flash move fires a long chain of stops without recursing"""
+    book = OrderBook("BTC-USDT")
+    levels = 3000
+    for i in range(levels):
+        book.add_order(make_order(f"bid{i}", OrderSide.BUY, 50000.0 - i))
+        book.add_order(make_order(f"stop{i}", OrderSide.SELL, order_type=OrderType.STOP, stop_price=50000.0 - i))
+    book.enable_metrics()
+
+    trades = book.add_order(make_order("flash", OrderSide.SELL, order_type=OrderType.MARKET))
+    assert len(trades) == levels
+    assert trades[-1]["taker_order_id"] == f"stop{levels - 2}"
+    assert book.last_trade_price == 50000.0 - levels + 1
+    # The last stop fired too, into an empty bid side
+    assert not book.bids and not book.stop_orders
+    assert book.get_order(f"stop{levels - 1}")["status"] == OrderStatus.CANCELLED
+    metrics = book.get_metrics()
+    assert metrics["stops_triggered"] == levels
+    assert metrics["orders"]["market"] == 1 and metrics["trades"] == levels
+
+def test_stop_cancels_and_validation():
+    """Test pending stops can be cancelled singly or in bulk and need a stop price"""
+    book = OrderBook("BTC-USDT")
+    book.add_order(make_order("s1", OrderSide.SELL, order_type=OrderType.STOP, stop_price=49000.0))
+    book.add_order(make_order("s2", OrderSide.BUY, 51010.0, order_type=OrderType.STOP_LIMIT, owner="alice", stop_price=51000.0))
+
+    assert book.cancel_order("s1") and not book.cancel_order("s1")
+    assert book.get_order("s1")["status"] == OrderStatus.CANCELLED
+    assert book.mass_cancel("alice") == ["s2"]
+    assert not book.stop_orders and not book.buy_stops and not book.sell_stops
+
+    with pytest.raises(ValueError):
+        book.add_order(Order(
+            order_id="bad", symbol="BTC-USDT", order_type=OrderType.STOP, side=OrderSide.BUY,
+            quantity=1.0, remaining_quantity=1.0
+        ))
+    with pytest.raises(ValueError):
+        book.add_order(make_order("bad", OrderSide.BUY, order_type=OrderType.STOP_LIMIT, stop_price=51000.0))
+
+def test_iceberg_shows_only_its_display_quantity(instrument):
+    """Test an iceberg exposes one slice at a time and each new slice joins the back of its level"""
+    book = OrderBook("BTC-USDT", instrument)
+    iceberg = make_order("ice", OrderSide.SELL, 50000.0, 2.5, display_quantity=1.0)
+    book.add_order(iceberg)
+    book.add_order(make_order("behind", OrderSide.SELL, 50000.0, 0.5))
+    assert book.get_order_book_snapshot()["asks"] == [[50000.0, 1.5]]
+    assert book.get_order("ice")["remaining_quantity"] == 2.5
+    assert book.get_order("ice")["display_quantity"] == 1.0
+
+    # Filling the first slice reloads the next one behind the later order
+    trades = book.add_order(make_order("t1", OrderSide.BUY, 50000.0, 1.2))
+    iceberg_oid = trades[0].maker_oid
+    assert [(trade["maker_order_id"], trade["quantity"]) for trade in trades] == [("ice", 1.0), ("behind", pytest.approx(0.2))]
+    assert book.get_order_book_snapshot()["asks"] == [[50000.0, pytest.approx(1.3)]]
+    assert [order["order_id"] for order in book.get_orders(OrderSide.SELL)["orders"]] == ["behind", "ice"]
+    assert book.get_order("ice")["status"] == OrderStatus.PARTIAL
+    assert (iceberg.filled_quantity, iceberg.remaining_quantity) == (1.0, 1.5)
+
+    # A sweep takes the slices one after another, the last one partial in size
+    trades = book.add_order(make_order("t2", OrderSide.BUY, quantity=2.0, order_type=OrderType.MARKET))
+    assert [trade["maker_order_id"] for trade in trades] == ["behind", "ice", "ice"]
+    assert iceberg.status == OrderStatus.FILLED and not book.asks and "ice" not in book.orders
+    # Every slice trades under the iceberg's one internal id
+    assert [trade.maker_oid for trade in trades[1:]] == [iceberg_oid, iceberg_oid]
+
+def test_fok_counts_iceberg_reserve(instrument):
+    """Test a FOK fills against an iceberg's hidden reserve, but not beyond it or its limit price"""
+    book = OrderBook("BTC-USDT", instrument)
+    book.add_order(make_order("ice", OrderSide.SELL, 50000.0, 3.0, display_quantity=1.0))
+
+    # The quote agrees with the FOK check on what the reserve makes fillable
+    assert book.quote_sweep(OrderSide.BUY, 3.0, 50000.0)["fully_fillable"]
+    assert book.quote_sweep(OrderSide.BUY, 4.0)["fillable_quantity"] == 3.0
+    assert not book.quote_sweep(OrderSide.BUY, 2.0, 49999.0)["fully_fillable"]
+    assert book.get_order_book_snapshot()["asks"] == [[50000.0, 1.0]]  # The reserve stays hidden
+
+    fok = make_order("f1", OrderSide.BUY, 50000.0, 4.0, order_type=OrderType.FOK)
+    assert book.add_order(fok) == [] and fok.status == OrderStatus.CANCELLED
+    fok = make_order("f2", OrderSide.BUY, 49999.0, 2.0, order_type=OrderType.FOK)
+    assert book.add_order(fok) == [] and fok.status == OrderStatus.CANCELLED
+
+    fok = make_order("f3", OrderSide.BUY, 50000.0, 2.0, order_type=OrderType.FOK)
+    trades = book.add_order(fok)
+    assert fok.status == OrderStatus.FILLED and [trade["quantity"] for trade in trades] == [1.0, 1.0]
+    assert book.get_order("ice")["remaining_quantity"] == 1.0
+
+    book.add_order(make_order("ice2", OrderSide.SELL, 50001.0, 3.0, display_quantity=1.0))
+    book.mass_cancel(side=OrderSide.SELL)
+    assert book.ask_reserve == {} and book.quote_sweep(OrderSide.BUY, 1.0)["fillable_quantity"] == 0
+
+def test_l3_cursor_follows_iceberg_priority():
+    """Test the L3 cursor resumes behind a replenished iceberg by its queue priority"""
+    book = OrderBook("BTC-USDT")
+    book.add_order(make_order("ice", OrderSide.SELL, 50000.0, 3.0, display_quantity=1.0))
+    book.add_order(make_order("a", OrderSide.SELL, 50000.0))
+    book.add_order(make_order("b", OrderSide.SELL, 50000.0))
+    book.add_order(make_order("t1", OrderSide.BUY, 50000.0, 1.0))  # The iceberg's next slice goes behind b
+
+    page = book.get_orders(OrderSide.SELL, limit=2)
+    assert [order["order_id"] for order in page["orders"]] == ["a", "b"]
+    book.cancel_order("b")  # The cursor names b, which has now left the queue
+    rest = book.get_orders(OrderSide.SELL, cursor=page["next_cursor"])
+    assert [order["order_id"] for order in rest["orders"]] == ["ice"]
+
+def test_iceberg_amend_and_validation():
+    """Test amends shed hidden quantity first and display quantity is only valid on limit orders"""
+    book = OrderBook("BTC-USDT")
+    book.add_order(make_order("ice", OrderSide.BUY, 50000.0, 5.0, display_quantity=1.0))
+    book.add_order(make_order("behind", OrderSide.BUY, 50000.0))
+
+    assert book.amend_order("ice", quantity=1.5)["priority_kept"]
+    assert book.get_order("ice")["remaining_quantity"] == 1.5
+    assert book.get_order_book_snapshot()["bids"] == [[50000.0, 2.0]]
+    assert book.amend_order("ice", quantity=0.5)["priority_kept"]
+    assert book.get_order_book_snapshot()["bids"] == [[50000.0, 1.5]]
+
+    # Growing it requeues it and splits it again
+    assert not book.amend_order("ice", quantity=3.0)["priority_kept"]
+    assert book.get_order_book_snapshot()["bids"] == [[50000.0, 2.0]]
+    assert book.cancel_order("ice")
+    assert book.get_order_book_snapshot()["bids"] == [[50000.0, 1.0]]
+    assert book.bid_reserve == {} and book.quote_sweep(OrderSide.SELL, 5.0)["fillable_quantity"] == 1.0
+
+    with pytest.raises(ValueError):
+        book.add_order(make_order("bad", OrderSide.BUY, 50000.0, 1.0, display_quantity=2.0))
+    with pytest.raises(ValueError):
+        book.add_order(make_order("bad", OrderSide.BUY, order_type=OrderType.MARKET, display_quantity=0.5))
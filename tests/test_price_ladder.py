@@ -0,0 +1,159 @@
+import random
+import pytest
+from decimal import Decimal
+from sortedcontainers import SortedDict
+from .conftest import BTC_USDT
+from src.engine.instrument import Instrument
+from src.engine.order import Order, OrderType, OrderSide
+from src.engine.orderbook import OrderBook
+from src.engine.price_ladder import PriceLadder
+
+def test_ladder_tracks_best_level():
+    """Test best level follows inserts and deletes on both sides"""
+    asks = PriceLadder(capacity=16)
+    bids = PriceLadder(descending=True, capacity=16)
+    for tick in [105, 103, 108]:
+        asks[tick] = 1
+        bids[tick] = 1
+
+    assert asks.peekitem(0) == (103, 1)
+    assert bids.peekitem(0) == (108, 1)
+    assert list(asks.keys()) == [103, 105, 108]
+    assert list(bids.keys()) == [108, 105, 103]
+
+    del asks[103]
+    del bids[108]
+    assert asks.peekitem(0)[0] == 105
+    assert bids.peekitem(0)[0] == 105
+    assert asks.peekitem(-1)[0] == 108
+    assert asks.pop(999) is None
+    assert 103 not in asks
+
+def test_ladder_irange_starts_in_priority_order():
+    """Test irange matches SortedDict.irange under each side's key order"""
+    asks = PriceLadder(capacity=16)
+    bids = PriceLadder(descending=True, capacity=16)
+    for tick in [100, 103, 105, 110]:
+        asks[tick] = 1
+        bids[tick] = 1
+
+    assert list(asks.irange(104)) == [105, 110]
+    assert list(asks.irange(0)) == [100, 103, 105, 110]
+    assert list(asks.irange(200)) == []
+    assert list(bids.irange(104)) == [103, 100]
+    assert list(bids.irange(200)) == [110, 105, 103, 100]
+    assert list(bids.irange(0)) == []
+
+def test_ladder_recenters_when_band_shifts():
+    """Test ticks outside the window trigger a recenter that keeps levels"""
+    ladder = PriceLadder(capacity=8)
+    ladder[1000] = 2
+    ladder[1003] = 3
+    ladder[5000] = 4  # Far outside the initial window
+    ladder[990] = 1
+
+    assert len(ladder) == 4
+    assert list(ladder.items()) == [(990, 1), (1000, 2), (1003, 3), (5000, 4)]
+    assert ladder[5000] == 4
+    with pytest.raises(KeyError):
+        ladder[1001]
+
+@pytest.mark.parametrize("descending", [False, True])
+def test_ladder_keeps_far_levels_sparse(descending):
+    """Test levels beyond max_capacity of the best price live outside the window and still order correctly"""
+    rng = random.Random(11)
+    ladder = PriceLadder(descending=descending, capacity=8, max_capacity=16)
+    reference = SortedDict()
+    mid = 1000
+    for _ in range(3000):
+        mid += rng.choice([-4, 0, 4])
+        tick = mid + rng.randint(-60, 60)
+        if reference and rng.random() < 0.4:
+            tick = rng.choice(list(reference))
+            del ladder[tick]
+            del reference[tick]
+        else:
+            ladder[tick] = reference[tick] = rng.randint(1, 9)
+
+        assert ladder._capacity <= 16
+        expected = list(reversed(reference.items())) if descending else list(reference.items())
+        assert list(ladder.items()) == expected
+        assert len(ladder) == len(reference)
+        if reference:
+            assert ladder.peekitem(0) == expected[0] and ladder.peekitem(-1) == expected[-1]
+            start = mid + rng.randint(-60, 60)
+            assert list(ladder.irange(start)) == [t for t, _ in expected if (t <= start if descending else t >= start)]
+        assert (tick in ladder) == (tick in reference) and ladder.get(tick) == reference.get(tick)
+
+@pytest.mark.parametrize("backend", ["sorted", "ladder"])
+def test_far_off_price_does_not_grow_the_window(backend):
+    """Test a bid thousands of ticks from the market lands off-window and still matches and cancels"""
+    instrument = BTC_USDT
+    book = OrderBook("BTC-USDT", instrument, backend)
+    for order_id, price in (("near", 50000.0), ("far", 0.01)):
+        book.add_order(Order(
+            order_id=order_id, symbol="BTC-USDT", order_type=OrderType.LIMIT,
+            side=OrderSide.BUY, quantity=1.0, price=price, remaining_quantity=1.0
+        ))
+    book.add_order(Order(
+        order_id="far2", symbol="BTC-USDT", order_type=OrderType.LIMIT,
+        side=OrderSide.BUY, quantity=1.0, price=0.02, remaining_quantity=1.0
+    ))
+    assert book.bid_depth._capacity <= book.bid_depth.max_capacity
+    if backend == "ladder":
+        assert list(book.bids._far) == [1, 2]
+        assert book.bids._capacity <= book.bids.max_capacity and book.bids._bitmap.bit_length() <= book.bids._capacity
+    assert [level["price"] for level in book.get_all_bids()] == [50000.0, 0.02, 0.01]
+    quote = book.quote_sweep(OrderSide.SELL, 2.5)
+    assert (quote["fillable_quantity"], quote["worst_price"]) == (2.5, 0.01)
+
+    trades = book.add_order(Order(
+        order_id="sweep", symbol="BTC-USDT", order_type=OrderType.MARKET,
+        side=OrderSide.SELL, quantity=2.0, remaining_quantity=2.0
+    ))
+    assert [trade["price"] for trade in trades] == [50000.0, 0.02]
+    assert book.cancel_order("far") and not book.bids
+
+def test_ladder_book_matches_sorted_book():
+    """Test both backends produce identical trades and depth for the same flow"""
+    instrument = Instrument(symbol="BTC-USDT", tick_size=Decimal("0.5"), lot_size=Decimal("1"))
+    books = [OrderBook("BTC-USDT", instrument, backend) for backend in ("sorted", "ladder")]
+    rng = random.Random(7)
+    results = [[], []]
+
+    for i in range(2000):
+        side = rng.choice([OrderSide.BUY, OrderSide.SELL])
+        order_type = rng.choice([OrderType.LIMIT] * 6 + [OrderType.MARKET, OrderType.IOC, OrderType.FOK])
+        price = None if order_type == OrderType.MARKET else 100.0 + rng.randint(-40, 40) * 0.5
+        quantity = float(rng.randint(1, 10))
+        cancel_id = f"o{i - rng.randint(1, 20)}" if i % 5 == 4 else None
+        for book, result in zip(books, results):
+            if cancel_id is not None:
+                result.append(book.cancel_order(cancel_id))
+            trades = book.add_order(Order(
+                order_id=f"o{i}",
+                symbol="BTC-USDT",
+                order_type=order_type,
+                side=side,
+                quantity=quantity,
+                price=price,
+                remaining_quantity=quantity
+            ))
+            result.append([(t["price"], t["quantity"], t["maker_order_id"]) for t in trades])
+
+    assert results[0] == results[1]
+    assert list(books[0].bids.items()) == list(books[1].bids.items())
+    assert list(books[0].asks.items()) == list(books[1].asks.items())
+    for book in books:
+        # The cumulative depth index tracks the levels exactly
+        assert book.bid_depth.quantity_within(None) == sum(book.bids.values())
+        assert book.ask_depth.quantity_within(None) == sum(book.asks.values())
+        for tick in book.asks.keys():
+            assert book.ask_depth.quantity_within(tick) == sum(q for t, q in book.asks.items() if t <= tick)
+
+def test_ladder_requires_instrument():
+    """Test the ladder backend is only available in fixed-point mode"""
+    with pytest.raises(ValueError):
+        OrderBook("BTC-USDT", backend="ladder")
+    with pytest.raises(ValueError):
+        OrderBook("BTC-USDT", backend="unknown")
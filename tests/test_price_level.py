@@ -0,0 +1,62 @@
+from src.engine.order import OrderType, OrderSide
+from src.engine.order_record import OrderRecord
+from src.engine.price_level import PriceLevel
+
+
+def make_record(order_id: str, quantity: float = 1.0) -> OrderRecord:
+    return OrderRecord(
+        oid=ord(order_id[0]),
+        order_id=order_id,
+        side=OrderSide.BUY,
+        order_type=OrderType.LIMIT,
+        price=50000.0,
+        quantity=quantity
+    )
+
+def test_append_preserves_time_priority():
+    """Test orders are iterated in arrival order"""
+    level = PriceLevel(50000.0)
+    for order_id in ["a", "b", "c"]:
+        level.append(make_record(order_id))
+
+    assert len(level) == 3
+    assert [order.order_id for order in level] == ["a", "b", "c"]
+    assert level.head.order_id == "a"
+
+def test_remove_from_middle_and_ends():
+    """Test unlinking orders at any position keeps the queue consistent"""
+    level = PriceLevel(50000.0)
+    for order_id in ["a", "b", "c", "d"]:
+        level.append(make_record(order_id))
+
+    assert level.remove("b").order_id == "b"
+    assert level.remove("d").order_id == "d"
+    assert level.remove("missing") is None
+    assert "b" not in level
+    assert [order.order_id for order in level] == ["a", "c"]
+
+    level.append(make_record("e"))
+    assert [order.order_id for order in level] == ["a", "c", "e"]
+
+def test_pop_head_until_empty():
+    """Test popping the head drains the queue in FIFO order"""
+    level = PriceLevel(50000.0)
+    level.append(make_record("a"))
+    level.append(make_record("b"))
+
+    assert level.pop_head().order_id == "a"
+    assert level.pop_head().order_id == "b"
+    assert level.pop_head() is None
+    assert not level
+    assert level.head is None
+
+def test_after_resumes_behind_removed_order():
+    """Test resuming iteration behind an order, even once it has left the queue"""
+    level = PriceLevel(50000.0)
+    for order_id in ["a", "b", "c", "d"]:
+        level.append(make_record(order_id))
+
+    assert [order.order_id for order in level.after("b", ord("b"))] == ["c", "d"]
+    level.remove("b")
+    assert [order.order_id for order in level.after("b", ord("b"))] == ["c", "d"]
+    assert list(level.after("d", ord("d"))) == []
@@ -0,0 +1,157 @@
+import asyncio
+import json
+import pytest
+from src.api import wire
+from src.api.publisher import SymbolPublisher
+
+
+class FakeWebSocket:
+    """Collects sent text; optionally blocks to simulate a slow client"""
+
+    def __init__(self, blocked: bool = False):
+        self.sent = []
+        self.closed_with = None
+        self._unblocked = asyncio.Event()
+        if not blocked:
+            self._unblocked.set()
+
+    async def send_text(self, text: str):
+        await self._unblocked.wait()
+        self.sent.append(text)
+
+    send_bytes = send_text
+
+    async def close(self, code: int = 1000, reason: str = ""):
+        self.closed_with = code
+
+
+def make_publisher(**kwargs):
+    state = {"sequence": 0}
+
+    async def snapshot():
+        return {"type": "snapshot", "symbol": "BTC-USDT", "sequence": state["sequence"], "bids": [], "asks": []}
+
+    return SymbolPublisher("BTC-USDT", snapshot, **kwargs), state
+
+
+def update(start, end, bids=(), asks=()):
+    return {"start_sequence": start, "sequence": end, "bids": list(bids), "asks": list(asks)}
+
+
+def test_updates_are_conflated_and_encoded_once():
+    """Test pending deltas merge per level and one text is shared by subscribers"""
+    async def scenario():
+        publisher, _ = make_publisher()
+        sockets = [FakeWebSocket(), FakeWebSocket()]
+        for websocket in sockets:
+            await publisher.subscribe(websocket)
+
+        publisher.publish_book(update(1, 1, bids=[[100.0, 1.0]]))
+        publisher.publish_book(update(2, 3, bids=[[100.0, 3.0], [99.0, 2.0]]))
+        await asyncio.sleep(0.01)
+        return publisher, sockets
+
+    publisher, sockets = asyncio.run(scenario())
+
+    assert publisher.messages_published == 1
+    first, second = sockets
+    assert len(first.sent) == 2  # Snapshot + one conflated delta
+    assert first.sent[1] is second.sent[1]
+    message = json.loads(first.sent[1])
+    assert (message["start_sequence"], message["sequence"]) == (1, 3)
+    assert message["bids"] == [[100.0, 3.0], [99.0, 2.0]]
+
+def test_binary_and_json_subscribers_share_encodings():
+    """Test each protocol is encoded once and every subscriber gets its own"""
+    async def scenario():
+        publisher, _ = make_publisher()
+        sockets = [FakeWebSocket(), FakeWebSocket(), FakeWebSocket()]
+        await publisher.subscribe(sockets[0])
+        await publisher.subscribe(sockets[1], binary=True)
+        await publisher.subscribe(sockets[2], binary=True)
+        publisher.publish_book(update(1, 1, asks=[[101.0, 2.0]]))
+        await asyncio.sleep(0.01)
+        return sockets
+
+    text, first, second = asyncio.run(scenario())
+
+    assert json.loads(text.sent[1])["asks"] == [[101.0, 2.0]]
+    assert first.sent[1] is second.sent[1]
+    assert wire.decode(first.sent[0])["type"] == "snapshot"
+    message = wire.decode(first.sent[1])
+    assert (message["type"], message["sequence"], message["asks"]) == ("l2update", 1, [[101.0, 2.0]])
+
+def test_lagging_subscriber_is_resynced():
+    """Test a full queue is replaced by a fresh snapshot under the resync policy"""
+    async def scenario():
+        publisher, state = make_publisher(max_queue=2)
+        slow = FakeWebSocket(blocked=True)
+        subscriber = await publisher.subscribe(slow)
+        for sequence in range(1, 6):
+            state["sequence"] = sequence
+            publisher.publish_book(update(sequence, sequence, asks=[[101.0, float(sequence)]]))
+            await asyncio.sleep(0)
+        slow._unblocked.set()
+        await asyncio.sleep(0.01)
+        return publisher, slow, subscriber
+
+    publisher, slow, subscriber = asyncio.run(scenario())
+
+    assert publisher.resyncs >= 1
+    assert subscriber in publisher.subscribers
+    assert json.loads(slow.sent[-1])["sequence"] == 5
+
+def test_lagging_subscriber_is_disconnected():
+    """Test a full queue closes the socket under the disconnect policy"""
+    async def scenario():
+        publisher, _ = make_publisher(max_queue=2, overflow_policy="disconnect")
+        slow = FakeWebSocket(blocked=True)
+        fast = FakeWebSocket()
+        await publisher.subscribe(slow)
+        await publisher.subscribe(fast)
+        await asyncio.sleep(0)
+        for sequence in range(1, 5):
+            publisher.publish_trades([{"price": 1.0, "quantity": float(sequence)}])
+            await asyncio.sleep(0.001)
+        return publisher, slow, fast
+
+    publisher, slow, fast = asyncio.run(scenario())
+
+    assert slow.closed_with == 1013
+    assert publisher.disconnects == 1
+    assert len(publisher.subscribers) == 1
+    assert len(fast.sent) == 5
+
+def test_updates_during_the_first_snapshot_are_kept():
+    """Test deltas and trades published while a subscriber's snapshot is taken follow that snapshot"""
+    async def scenario():
+        released = asyncio.Event()
+        publisher = None
+
+        async def snapshot():
+            # The book moves on while the snapshot request is in flight
+            publisher.publish_book(update(1, 1, bids=[[100.0, 1.0]]))
+            publisher.publish_book(update(2, 2, bids=[[99.0, 2.0]]))
+            publisher.publish_trades([{"price": 100.0, "quantity": 1.0}])
+            await released.wait()
+            return {"type": "snapshot", "symbol": "BTC-USDT", "sequence": 1, "bids": [[100.0, 1.0]], "asks": []}
+
+        publisher = SymbolPublisher("BTC-USDT", snapshot)
+        websocket = FakeWebSocket()
+        subscribing = asyncio.create_task(publisher.subscribe(websocket))
+        await asyncio.sleep(0.01)
+        released.set()
+        await subscribing
+        await asyncio.sleep(0.01)
+        return websocket
+
+    websocket = asyncio.run(scenario())
+
+    messages = [json.loads(text) for text in websocket.sent]
+    assert [message["type"] for message in messages] == ["snapshot", "l2update", "trades"]
+    assert (messages[1]["start_sequence"], messages[1]["sequence"]) == (1, 2)
+
+def test_unknown_overflow_policy():
+    """Test the overflow policy is validated"""
+    with pytest.raises(ValueError):
+        make_publisher(overflow_policy="ignore")
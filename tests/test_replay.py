@@ -0,0 +1,75 @@
+import csv
+import json
+from .conftest import BTC_USDT
+from src.engine.order import Order, OrderType, OrderSide
+from src.engine.orderbook import OrderBook
+from src.engine.replay import CsvSink, ReplayEngine, TRADE_COLUMNS, read_events
+
+EVENTS = [
+    {"symbol": "BTC-USDT", "order_id": "s1", "side": "sell", "quantity": 1.0, "price": 50000.0},
+    {"symbol": "BTC-USDT", "order_id": "s2", "side": "sell", "quantity": 1.0, "price": 50001.0},
+    {"symbol": "ETH-USDT", "order_id": "e1", "side": "buy", "quantity": 2.0, "price": 3000.0},
+    {"symbol": "BTC-USDT", "order_id": "b1", "side": "buy", "order_type": "market", "quantity": 1.5},
+    {"symbol": "BTC-USDT", "order_id": "bad", "side": "buy", "quantity": 1.0, "price": 50000.001},
+    {"symbol": "ETH-USDT", "order_id": "e1", "action": "cancel"},
+]
+
+def test_read_events_in_chunks(tmp_path):
+    """Test NDJSON and CSV inputs stream the same events in fixed-size chunks"""
+    ndjson = tmp_path / "events.ndjson"
+    ndjson.write_text("\n".join(json.dumps(event) for event in EVENTS) + "\n")
+    columns = ["action", "symbol", "order_id", "side", "order_type", "quantity", "price"]
+    with open(tmp_path / "events.csv", "w", newline="") as handle:
+        writer = csv.DictWriter(handle, columns)
+        writer.writeheader()
+        writer.writerows(EVENTS)
+
+    assert [len(chunk) for chunk in read_events(str(ndjson), chunk_size=4)] == [4, 2]
+    csv_chunks = list(read_events(str(tmp_path / "events.csv"), chunk_size=4))
+    assert [event["order_id"] for chunk in csv_chunks for event in chunk] == [e["order_id"] for e in EVENTS]
+
+def test_replay_matches_direct_book_usage(tmp_path):
+    """Test replay drives several books and writes trades and top-of-book columns"""
+    instrument = BTC_USDT
+    top_rows = []
+    trades = CsvSink(str(tmp_path / "trades.csv"), TRADE_COLUMNS)
+    engine = ReplayEngine(
+        lambda symbol: OrderBook(symbol, instrument if symbol == "BTC-USDT" else None),
+        trade_sink=trades,
+        top_of_book_sink=top_rows.extend,
+    )
+    stats = engine.run([EVENTS[:3], EVENTS[3:]])
+    trades.close()
+
+    assert (stats.events, stats.orders, stats.cancels, stats.rejected, stats.trades) == (6, 5, 1, 1, 2)
+    assert stats.events_per_sec > 0
+    assert set(engine.books) == {"BTC-USDT", "ETH-USDT"}
+    assert len(engine.books["ETH-USDT"].orders) == 0
+
+    with open(tmp_path / "trades.csv", newline="") as handle:
+        rows = list(csv.DictReader(handle))
+    assert [(row["maker_order_id"], float(row["quantity"])) for row in rows] == [("s1", 1.0), ("s2", 0.5)]
+
+    assert top_rows[0] == (0, "BTC-USDT", None, 50000.0)
+    assert top_rows[-1] == (5, "ETH-USDT", None, None)
+
+    # Same flow through a book directly ends in the same state
+    book = OrderBook("BTC-USDT", instrument)
+    for event in EVENTS[:2]:
+        book.add_order(Order(order_type=OrderType.LIMIT, remaining_quantity=event["quantity"], **event))
+    book.add_order(Order(order_id="b1", symbol="BTC-USDT", order_type=OrderType.MARKET, side=OrderSide.BUY,
+                         quantity=1.5, remaining_quantity=1.5))
+    assert list(book.asks.items()) == list(engine.books["BTC-USDT"].asks.items())
+
+def test_malformed_events_are_rejected():
+    """Test events that fail validation are counted as rejected instead of aborting the replay"""
+    engine = ReplayEngine()
+    stats = engine.run([[
+        {"symbol": "BTC-USDT", "order_id": "noprice", "side": "buy", "quantity": 1.0},
+        {"symbol": "BTC-USDT", "order_id": "badside", "side": "hold", "quantity": 1.0, "price": 50000.0},
+        {"symbol": "BTC-USDT", "order_id": "badqty", "side": "buy", "quantity": "lots", "price": 50000.0},
+        {"symbol": "BTC-USDT", "order_id": "nostop", "side": "buy", "order_type": "stop", "quantity": 1.0},
+        {"symbol": "BTC-USDT", "order_id": "ok", "side": "buy", "quantity": "1.0", "price": "50000.0"},
+    ]])
+    assert (stats.orders, stats.rejected) == (5, 4)
+    assert list(engine.books["BTC-USDT"].orders) == ["ok"]
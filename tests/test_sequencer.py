@@ -0,0 +1,48 @@
+import asyncio
+import threading
+import pytest
+from .conftest import make_order
+from src.engine.order import OrderSide, OrderStatus
+from src.engine.sequencer import BookSequencer
+
+def test_commands_run_in_order_on_worker_thread(empty_order_book):
+    """Test submitted operations execute sequentially off the caller's thread"""
+    threads = []
+    sequencer = BookSequencer(empty_order_book, on_batch=lambda book: threads.append(threading.current_thread().name))
+    sequencer.start()
+    futures = [sequencer.submit("add_order", make_order(f"s{i}", OrderSide.SELL, 50000.0 + i)) for i in range(5)]
+    sweep = sequencer.submit("add_order", make_order("b1", OrderSide.BUY, 50010.0, quantity=5.0))
+    sequencer.stop(timeout=5)
+
+    assert all(future.result() == [] for future in futures)
+    assert [trade["maker_order_id"] for trade in sweep.result()] == ["s0", "s1", "s2", "s3", "s4"]
+    assert sequencer.commands_processed == 6
+    assert threads and set(threads) == {"sequencer-BTC-USDT"}
+
+def test_exceptions_are_delivered_to_the_caller(empty_order_book):
+    """Test a failing operation resolves its future with the exception"""
+    sequencer = BookSequencer(empty_order_book).start()
+    with pytest.raises(AttributeError):
+        sequencer.submit("no_such_operation")
+    future = sequencer.submit("get_order_book_snapshot", "not-a-depth")
+    sequencer.stop(timeout=5)
+
+    with pytest.raises(TypeError):
+        future.result()
+
+def test_futures_can_be_awaited(empty_order_book):
+    """Test results are awaitable from asyncio code"""
+    sequencer = BookSequencer(empty_order_book).start()
+
+    async def submit():
+        order = make_order("b1", OrderSide.BUY, 50000.0)
+        trades = await asyncio.wrap_future(sequencer.submit("add_order", order))
+        snapshot = await asyncio.wrap_future(sequencer.submit("get_order_book_snapshot"))
+        return order, trades, snapshot
+
+    order, trades, snapshot = asyncio.run(submit())
+    sequencer.stop(timeout=5)
+
+    assert trades == []
+    assert order.status == OrderStatus.NEW
+    assert snapshot["bids"] == [[50000.0, 1.0]]
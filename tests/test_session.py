@@ -0,0 +1,169 @@
+import asyncio
+import json
+import pickle
+from concurrent.futures import Future
+from fastapi.testclient import TestClient
+from .conftest import make_order
+from src.api import wire
+from src.api.main import app
+from src.api.session import OrderEntrySession
+from src.engine.order import OrderSide, OrderStatus, OrderType
+from src.engine.orderbook import OrderBook
+
+client = TestClient(app)
+
+
+def new_order(client_order_id, side, price, quantity=1.0, order_type="limit", symbol="ETH-USDT"):
+    return {
+        "type": "new", "client_order_id": client_order_id, "symbol": symbol, "side": side,
+        "order_type": order_type, "quantity": quantity, "price": price
+    }
+
+def test_pipelined_orders_are_acked_in_order():
+    """Test many requests sent before any reply are acknowledged in request order"""
+    with client.websocket_connect("/ws/orders") as websocket:
+        for i in range(5):
+            websocket.send_json(new_order(f"p{i}", "sell", 8000.0 + i))
+        acks = [websocket.receive_json() for _ in range(5)]
+
+        assert [ack["client_order_id"] for ack in acks] == [f"p{i}" for i in range(5)]
+        assert all(ack["type"] == "ack" and ack["order"]["status"] == "new" for ack in acks)
+
+        # Cancel and a crossing order, also pipelined
+        websocket.send_json({"type": "cancel", "client_order_id": "p4"})
+        websocket.send_json(new_order("t1", "buy", None, quantity=1.0, order_type="market"))
+        cancel, taker = websocket.receive_json(), websocket.receive_json()
+        assert cancel["order"]["status"] == "cancelled"
+        assert taker["order"]["status"] == "filled"
+        assert taker["trades"][0]["price"] <= 8000.0
+
+def test_replace_and_rejects():
+    """Test replace swaps client order ids and invalid requests are rejected in place"""
+    with client.websocket_connect("/ws/orders") as websocket:
+        websocket.send_json(new_order("r1", "buy", 100.0))
+        websocket.send_json(new_order("r1", "buy", 100.0))
+        websocket.send_json({"type": "replace", "client_order_id": "r1", "new_client_order_id": "r2",
+                             "quantity": 2.0, "price": 101.0})
+        websocket.send_json({"type": "cancel", "client_order_id": "r1"})
+        websocket.send_json(new_order("r3", "buy", None))
+        websocket.send_json(new_order("r4", "buy", 100.001))
+        websocket.send_text("not json")
+
+        ack, duplicate, replaced, unknown, no_price, off_tick, garbage = (websocket.receive_json() for _ in range(7))
+        assert ack["type"] == "ack"
+        assert duplicate == {"type": "reject", "client_order_id": "r1", "reason": "Duplicate client order id r1"}
+        assert replaced["type"] == "ack" and replaced["replaces"] == "r1"
+        assert (replaced["client_order_id"], replaced["order"]["price"]) == ("r2", 101.0)
+        assert unknown == {"type": "reject", "client_order_id": "r1", "reason": "Unknown client order id r1"}
+        assert no_price["reason"] == "Price is required for limit orders"
+        assert off_tick["type"] == "reject" and off_tick["client_order_id"] == "r4"
+        assert garbage["type"] == "reject"
+
+        websocket.send_json({"type": "cancel", "client_order_id": "r2"})
+        assert websocket.receive_json()["order"]["status"] == "cancelled"
+
+def test_refused_replace_keeps_original_id():
+    """Test a replace the book refuses leaves the order addressable by its original client order id"""
+    with client.websocket_connect("/ws/orders") as websocket:
+        websocket.send_json(new_order("k1", "buy", 100.0))
+        websocket.send_json({"type": "replace", "client_order_id": "k1", "new_client_order_id": "k2", "price": 100.001})
+        ack, refused = websocket.receive_json(), websocket.receive_json()
+        assert ack["type"] == "ack"
+        assert refused["type"] == "reject" and refused["client_order_id"] == "k2"
+
+        websocket.send_json({"type": "cancel", "client_order_id": "k1"})
+        cancelled = websocket.receive_json()
+        assert cancelled["type"] == "ack" and cancelled["order"]["status"] == "cancelled"
+
+def test_binary_session():
+    """Test the binary subprotocol carries new, replace and cancel with struct replies"""
+    with client.websocket_connect("/ws/orders", subprotocols=[wire.BINARY_SUBPROTOCOL]) as websocket:
+        websocket.send_bytes(wire.encode_new_order("ETH-USDT", "b1", OrderSide.BUY, OrderType.LIMIT, 1.0, 90.0))
+        websocket.send_bytes(wire.encode_replace("ETH-USDT", "b1", "b2", 0.5, 90.0))
+        websocket.send_bytes(wire.encode_cancel("ETH-USDT", "b2"))
+        websocket.send_bytes(wire.encode_cancel("ETH-USDT", "b2"))
+        websocket.send_bytes(b"\x7f")
+
+        replies = [wire.decode(websocket.receive_bytes()) for _ in range(5)]
+        assert [(reply["type"], reply["client_order_id"]) for reply in replies[:4]] == [
+            ("ack", "b1"), ("ack", "b2"), ("ack", "b2"), ("reject", "b2")
+        ]
+        assert replies[1]["remaining_quantity"] == 0.5
+        assert replies[2]["status"] == OrderStatus.CANCELLED
+        assert replies[4]["type"] == "reject"
+
+def test_binary_stop_orders():
+    """Test the binary subprotocol places stop orders, and the book still checks their stop terms"""
+    with client.websocket_connect("/ws/orders", subprotocols=[wire.BINARY_SUBPROTOCOL]) as websocket:
+        websocket.send_bytes(wire.encode_new_order(
+            "ETH-USDT", "st1", OrderSide.BUY, OrderType.STOP, 1.0, stop_price=100000.0
+        ))
+        websocket.send_bytes(wire.encode_new_order("ETH-USDT", "st2", OrderSide.BUY, OrderType.STOP, 1.0))
+        accepted, refused = (wire.decode(websocket.receive_bytes()) for _ in range(2))
+        assert (accepted["type"], accepted["status"]) == ("ack", OrderStatus.NEW)
+        assert (refused["type"], refused["reason"]) == ("reject", "Stop price is required for stop orders")
+
+        websocket.send_bytes(wire.encode_cancel("ETH-USDT", "st1"))
+        assert wire.decode(websocket.receive_bytes())["status"] == OrderStatus.CANCELLED
+
+def test_binary_iceberg_orders():
+    """Test the binary subprotocol places iceberg orders that show only their display quantity"""
+    with client.websocket_connect("/ws/orders", subprotocols=[wire.BINARY_SUBPROTOCOL]) as websocket:
+        websocket.send_bytes(wire.encode_new_order(
+            "ETH-USDT", "ice1", OrderSide.SELL, OrderType.LIMIT, 3.0, 97531.0, display_quantity=1.0
+        ))
+        assert wire.decode(websocket.receive_bytes())["remaining_quantity"] == 3.0
+        levels = client.get("/order_book/ETH-USDT").json()["asks"]
+        assert {"price": 97531.0, "quantity": 1.0} in levels
+
+        websocket.send_bytes(wire.encode_cancel("ETH-USDT", "ice1"))
+        assert wire.decode(websocket.receive_bytes())["status"] == OrderStatus.CANCELLED
+
+def test_orders_are_cancelled_on_disconnect():
+    """Test a dropped session's resting orders are mass cancelled, and only those"""
+    other = client.post("/api/v1/orders", json={
+        "symbol": "ETH-USDT", "side": "buy", "order_type": "limit", "quantity": 1.0, "price": 70.0
+    }).json()["order"]
+    with client.websocket_connect("/ws/orders") as websocket:
+        websocket.send_json(new_order("d1", "buy", 70.0))
+        websocket.send_json(new_order("d2", "buy", 69.0))
+        acks = [websocket.receive_json() for _ in range(2)]
+        owner = acks[0]["order"]["owner"]
+        assert owner.startswith("session-") and acks[1]["order"]["owner"] == owner
+
+    for ack in acks:
+        order = client.get(f"/api/v1/orders/ETH-USDT/{ack['order']['order_id']}").json()
+        assert (order["status"], order["resting"]) == (OrderStatus.CANCELLED, False)
+    assert client.get(f"/api/v1/orders/ETH-USDT/{other['order_id']}").json()["resting"] is True
+
+
+def test_passive_fills_leave_the_session_cache():
+    """Test orders filled by someone else free their client order id and are pruned, even from copied results"""
+    book = OrderBook("ETH-USDT")
+
+    def submit(symbol, method, *args):
+        # Arguments and results are copies, as they are across shard processes
+        future = Future()
+        future.set_result(pickle.loads(pickle.dumps(getattr(book, method)(*pickle.loads(pickle.dumps(args))))))
+        return future
+
+    async def scenario():
+        session = OrderEntrySession(None, submit, lambda symbol, trades: None, {"ETH-USDT"})
+
+        async def send(request):
+            client_order_id, future, complete = await session._read({"text": json.dumps(request)})
+            return complete if future is None else complete(future.result())
+
+        for client_order_id in ("x1", "x2", "x3"):
+            await send(new_order(client_order_id, "sell", 100.0))
+        book.add_order(make_order("taker", OrderSide.BUY, 100.0, quantity=2.0, symbol="ETH-USDT"))
+        assert session.orders["x1"].status == OrderStatus.NEW  # The cached copy is stale
+
+        reused = json.loads(await send(new_order("x1", "sell", 101.0)))
+        assert reused["type"] == "ack" and reused["order"]["price"] == 101.0
+        assert await send(new_order("x3", "sell", 101.0)) == "Duplicate client order id x3"
+
+        await session._prune()
+        return sorted(session.orders)
+
+    assert asyncio.run(scenario()) == ["x1", "x3"]
@@ -0,0 +1,54 @@
+import threading
+import pytest
+from .conftest import BTC_USDT, make_order
+from src.engine.order import OrderSide, OrderStatus
+from src.engine.sharding import ShardRouter, assign_shards
+
+def test_assign_shards_is_stable():
+    """Test symbols map to the same shard every time, honouring overrides"""
+    symbols = ["BTC-USDT", "ETH-USDT", "SOL-USDT"]
+    assignment = assign_shards(symbols, 2, overrides={"BTC-USDT": 1})
+
+    assert assignment == assign_shards(symbols, 2, overrides={"BTC-USDT": 1})
+    assert assignment["BTC-USDT"] == 1
+    assert set(assignment.values()) <= {0, 1}
+    with pytest.raises(ValueError):
+        assign_shards(symbols, 0)
+
+def test_router_matches_in_worker_processes():
+    """Test orders routed to shard processes match and stream deltas back"""
+    updates = []
+    received = threading.Event()
+
+    def on_book_update(symbol, update):
+        updates.append((symbol, update))
+        received.set()
+
+    instrument = BTC_USDT
+    router = ShardRouter(
+        [("BTC-USDT", instrument, "ladder"), ("ETH-USDT", None, "sorted")],
+        2,
+        on_book_update=on_book_update,
+        overrides={"BTC-USDT": 0, "ETH-USDT": 1},
+    )
+    try:
+        router.submit("BTC-USDT", "add_orders", [make_order("s1", OrderSide.SELL, 50000.0)]).result(timeout=30)
+        result = router.submit(
+            "BTC-USDT", "add_orders", [make_order("b1", OrderSide.BUY, 50000.0, 0.5)]
+        ).result(timeout=30)[0]
+        eth = router.submit("ETH-USDT", "get_order_book_snapshot").result(timeout=30)
+
+        assert result["order"].status == OrderStatus.FILLED
+        assert result["trades"][0]["maker_order_id"] == "s1"
+        assert eth["symbol"] == "ETH-USDT"
+        with pytest.raises(ValueError):
+            router.submit("BTC-USDT", "add_order", make_order("bad", OrderSide.BUY, 1.001)).result(timeout=30)
+        with pytest.raises(KeyError):
+            router.submit("XRP-USDT", "get_order_book_snapshot")
+
+        assert received.wait(timeout=30)
+    finally:
+        router.close(timeout=30)
+
+    assert updates[0][0] == "BTC-USDT"
+    assert updates[0][1]["asks"] == [[50000.0, 1.0]]
@@ -0,0 +1,164 @@
+import os
+from decimal import Decimal
+import pytest
+from .conftest import BTC_USDT, book_state, make_order
+from src.engine.instrument import Instrument
+from src.engine.journal import checkpoint_book, open_book_journal, read_journal
+from src.engine.order import OrderType, OrderSide, OrderStatus
+from src.engine.orderbook import OrderBook
+from src.engine.sequencer import BookSequencer
+from src.engine.snapshot import load_snapshot, write_snapshot
+
+def fill_book(book):
+    for i, price in enumerate([50000.0, 50000.0, 50001.0]):
+        book.add_order(make_order(f"s{i}", OrderSide.SELL, price))
+    for i, price in enumerate([49999.0, 49998.0, 49999.0]):
+        book.add_order(make_order(f"b{i}", OrderSide.BUY, price, quantity=0.5))
+    book.add_order(make_order("taker", OrderSide.BUY, 50000.0, quantity=0.25))
+
+def test_snapshot_roundtrip(tmp_path):
+    """Test a restored book has the same levels, queue order and records"""
+    path = str(tmp_path / "BTC-USDT.snap")
+    book = OrderBook("BTC-USDT")
+    fill_book(book)
+    assert write_snapshot(book, path, journal_sequence=42) == os.path.getsize(path)
+
+    restored = OrderBook("BTC-USDT")
+    assert load_snapshot(path, restored) == 42
+    assert book_state(restored) == book_state(book)
+    assert [record.order_id for record in restored.ask_queues[50000.0]] == ["s0", "s1"]
+    assert [record.order_id for record in restored.bid_queues[49999.0]] == ["b0", "b2"]
+    assert restored.orders["s0"].status == OrderStatus.PARTIAL
+    assert restored.orders["s0"].remaining_quantity == 0.75
+    assert "taker" not in restored.orders
+
+    # Matching continues in time priority with fresh internal ids
+    trades = restored.add_order(make_order("t2", OrderSide.BUY, 50000.0, quantity=1.0))
+    assert [trade["maker_order_id"] for trade in trades] == ["s0", "s1"]
+    assert trades[0].trade_id == book._next_trade_id
+    assert restored.get_order("t2")["status"] == OrderStatus.FILLED
+    assert restored.history.get("t2").oid == book._next_oid
+
+def test_snapshot_fixed_point_ladder(tmp_path):
+    """Test tick/lot books restore into the ladder backend and reject other instruments"""
+    path = str(tmp_path / "BTC-USDT.snap")
+    instrument = BTC_USDT
+    book = OrderBook("BTC-USDT", instrument, "ladder")
+    fill_book(book)
+    write_snapshot(book, path)
+
+    restored = OrderBook("BTC-USDT", instrument, "ladder")
+    load_snapshot(path, restored)
+    assert book_state(restored) == book_state(book)
+    assert restored.asks.peekitem(0) == book.asks.peekitem(0)
+
+    with pytest.raises(ValueError):
+        load_snapshot(path, OrderBook("BTC-USDT"))
+    coarser = Instrument(symbol="BTC-USDT", tick_size=Decimal("0.1"), lot_size=Decimal("0.001"))
+    with pytest.raises(ValueError):
+        load_snapshot(path, OrderBook("BTC-USDT", coarser))
+    with pytest.raises(ValueError):
+        load_snapshot(path, restored)
+
+def test_checkpoint_truncates_journal(tmp_path):
+    """Test recovery loads the snapshot and replays only commands after it"""
+    book = OrderBook("BTC-USDT")
+    journal = open_book_journal(str(tmp_path), book)
+    for i in range(3):
+        order = make_order(f"s{i}", OrderSide.SELL, 50000.0 + i)
+        book.add_order(order)
+        journal.append_new(book.symbol, order)
+    checkpoint_book(book, journal)
+    assert list(read_journal(journal.path)) == []
+
+    order = make_order("b0", OrderSide.BUY, 50001.0, quantity=1.5)
+    book.add_order(order)
+    journal.append_new(book.symbol, order)
+    journal.close()
+    assert [entry[0] for entry in read_journal(journal.path)] == [4]
+
+    recovered = OrderBook("BTC-USDT")
+    journal = open_book_journal(str(tmp_path), recovered)
+    assert (journal.sequence, journal.checkpoint_sequence) == (4, 3)
+    assert book_state(recovered) == book_state(book)
+    journal.close()
+
+def test_sequencer_snapshots_periodically(tmp_path):
+    """Test the sequencer checkpoints every interval and on stop"""
+    book = OrderBook("BTC-USDT")
+    sequencer = BookSequencer(book, journal=open_book_journal(str(tmp_path), book), snapshot_interval=4).start()
+    for i in range(10):
+        sequencer.submit("add_order", make_order(f"b{i}", OrderSide.BUY, 49000.0 + i)).result(timeout=5)
+    assert os.path.exists(tmp_path / "BTC-USDT.snap")
+    sequencer.stop(timeout=5)
+    assert list(read_journal(str(tmp_path / "BTC-USDT.wal"))) == []
+
+    recovered = OrderBook("BTC-USDT")
+    open_book_journal(str(tmp_path), recovered).close()
+    assert book_state(recovered) == book_state(book)
+
+    with pytest.raises(ValueError):
+        BookSequencer(book, snapshot_interval=4)
+
+def test_snapshot_keeps_owners(tmp_path):
+    """Test owner tags and the per-owner index are restored"""
+    path = str(tmp_path / "BTC-USDT.snap")
+    book = OrderBook("BTC-USDT")
+    for i, owner in enumerate(["alice", None, "alice"]):
+        book.add_order(make_order(f"b{i}", OrderSide.BUY, 49999.0 - i, owner=owner))
+    write_snapshot(book, path)
+
+    restored = OrderBook("BTC-USDT")
+    load_snapshot(path, restored)
+    assert sorted(restored.owner_orders["alice"]) == ["b0", "b2"]
+    assert restored.orders["b1"].owner is None
+    assert sorted(restored.mass_cancel("alice")) == ["b0", "b2"]
+
+def test_snapshot_keeps_pending_stops(tmp_path):
+    """Test stops and the last trade price are restored, so triggering carries on"""
+    path = str(tmp_path / "BTC-USDT.snap")
+    instrument = BTC_USDT
+    book = OrderBook("BTC-USDT", instrument)
+    fill_book(book)
+    for order_id, stop_price, price in (("st1", 49999.0, None), ("st2", 49999.0, 49990.0), ("st3", 49000.0, None)):
+        order_type = OrderType.STOP if price is None else OrderType.STOP_LIMIT
+        book.add_order(make_order(order_id, OrderSide.SELL, price, order_type=order_type, stop_price=stop_price))
+    write_snapshot(book, path)
+
+    restored = OrderBook("BTC-USDT", instrument)
+    load_snapshot(path, restored)
+    assert restored.last_trade_price == book.last_trade_price
+    assert [record.order_id for record in restored.sell_stops[4999900]] == ["st1", "st2"]
+    assert restored.stop_orders["st2"].price == 4999000
+    assert restored.get_order("st3")["stop_price"] == 49000.0
+
+    restored.add_order(make_order("hit", OrderSide.SELL, 49999.0, quantity=0.5))
+    assert list(restored.stop_orders) == ["st3"]
+    assert restored.get_order("st2")["resting"]
+
+def test_snapshot_keeps_iceberg_reserve(tmp_path):
+    """Test an iceberg's hidden quantity is restored and keeps replenishing its slices"""
+    path = str(tmp_path / "BTC-USDT.snap")
+    instrument = BTC_USDT
+    book = OrderBook("BTC-USDT", instrument)
+    book.add_order(make_order("ice", OrderSide.SELL, 50000.0, quantity=2.5, display_quantity=1.0))
+    book.add_order(make_order("taker", OrderSide.BUY, 50000.0, quantity=1.2))
+    write_snapshot(book, path)
+
+    restored = OrderBook("BTC-USDT", instrument)
+    load_snapshot(path, restored)
+    assert book_state(restored) == book_state(book) and book_state(restored)["asks"] == [[50000.0, 0.8]]
+    assert restored.get_order("ice")["remaining_quantity"] == 1.3
+    assert restored.orders["ice"].priority == book.orders["ice"].priority != book.orders["ice"].oid
+    # More than the shown slice, so this FOK only fills if the restored reserve is counted
+    restored.add_order(make_order("t2", OrderSide.BUY, 50000.0, quantity=1.0, order_type=OrderType.FOK))
+    assert book_state(restored)["asks"] == [[50000.0, 0.3]]
+
+def test_snapshot_rejects_other_formats(tmp_path):
+    """Test a file with a different magic is refused rather than misread"""
+    path = str(tmp_path / "BTC-USDT.snap")
+    write_snapshot(OrderBook("BTC-USDT"), path)
+    with open(path, "r+b") as handle:
+        handle.write(b"MES1")
+    with pytest.raises(ValueError, match="not an order book snapshot"):
+        load_snapshot(path, OrderBook("BTC-USDT"))
@@ -0,0 +1,44 @@
+import pytest
+from src.engine import trade_tape
+from src.engine.order import OrderSide
+from src.engine.trade import Trade
+from src.engine.trade_tape import TradeTape
+
+def make_trade(trade_id):
+    return Trade(trade_id, 1_700_000_000_000_000_000 + trade_id, "BTC-USDT", 100.0 + trade_id, 0.5,
+                 OrderSide.BUY, f"m{trade_id}", f"t{trade_id}", trade_id * 2, trade_id * 2 + 1)
+
+def test_trade_record_reads_like_a_dict():
+    """Test trades keep the dict-style interface used by callers"""
+    trade = make_trade(1)
+    assert trade["price"] == 101.0
+    assert trade["maker_order_id"] == "m1"
+    assert dict(trade)["trade_id"] == 1
+    assert trade.timestamp.year == 2023
+    with pytest.raises(KeyError):
+        trade["maker_oid"]
+
+def test_tape_wraps_and_streams_in_order():
+    """Test the ring keeps the newest trades and resumes after a given id"""
+    tape = TradeTape("BTC-USDT", capacity=4)
+    for trade_id in range(1, 7):
+        tape.append(make_trade(trade_id))
+
+    assert len(tape) == 4
+    assert tape.last_trade_id == 6
+    assert [trade.trade_id for trade in tape.since()] == [3, 4, 5, 6]
+    assert [trade["taker_order_id"] for trade in tape.since(4)] == ["t5", "t6"]
+    assert list(tape.since(6)) == []
+
+def test_tape_column_export(monkeypatch):
+    """Test bulk export across the ring boundary, with and without NumPy"""
+    monkeypatch.setattr(trade_tape, "numpy", None)
+    tape = TradeTape("BTC-USDT", capacity=4)
+    for trade_id in range(1, 7):
+        tape.append(make_trade(trade_id))
+
+    columns = tape.columns(after_trade_id=3)
+    assert list(columns["trade_id"]) == [4, 5, 6]
+    assert list(columns["price"]) == [104.0, 105.0, 106.0]
+    assert columns["maker_order_id"] == ["m4", "m5", "m6"]
+    assert list(tape.columns(after_trade_id=10)["trade_id"]) == []
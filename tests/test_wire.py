@@ -0,0 +1,86 @@
+import pytest
+from datetime import datetime
+from src.api import wire
+from src.engine.order import Order, OrderSide, OrderStatus, OrderType
+from src.engine.orderbook import OrderBook
+
+
+def test_book_messages_round_trip():
+    update = {
+        "type": "l2update", "symbol": "BTC-USDT", "start_sequence": 4, "sequence": 7,
+        "bids": [[50000.0, 1.5], [49999.0, 0.0]], "asks": [[50001.0, 2.0]]
+    }
+    encoded = wire.encode_book(update)
+    assert len(encoded) == wire.BOOK_HEADER.size + 3 * wire.LEVEL.size
+    assert wire.decode(encoded) == update
+
+    snapshot = {"type": "snapshot", "symbol": "BTC-USDT", "sequence": 9, "bids": [], "asks": [[1.0, 2.0]]}
+    decoded = wire.decode(wire.encode_book(snapshot))
+    assert decoded == snapshot
+
+def test_trades_round_trip_from_book():
+    book = OrderBook("BTC-USDT")
+    for order_id, side, order_type, price in [
+        ("s1", OrderSide.SELL, OrderType.LIMIT, 50000.0),
+        ("b1", OrderSide.BUY, OrderType.MARKET, None),
+    ]:
+        trades = book.add_order(Order(
+            order_id=order_id, symbol="BTC-USDT", order_type=order_type, side=side,
+            quantity=1.0, price=price, remaining_quantity=1.0
+        ))
+
+    decoded = wire.decode(wire.encode_trades("BTC-USDT", trades))
+    assert decoded["type"] == "trades"
+    [trade] = decoded["trades"]
+    assert (trade["trade_id"], trade["price"], trade["quantity"]) == (1, 50000.0, 1.0)
+    assert trade["aggressor_side"] == OrderSide.BUY
+    assert (trade["maker_oid"], trade["taker_oid"]) == (trades[0].maker_oid, trades[0].taker_oid)
+
+def test_new_order_decodes_into_order():
+    now = datetime.utcnow()
+    data = wire.encode_new_order("ETH-USDT", "c-1", OrderSide.SELL, OrderType.MARKET, 2.5)
+    assert len(data) == wire.NEW_ORDER.size
+    assert wire.message_type(data) == wire.MSG_NEW_ORDER
+
+    client_order_id, order = wire.decode_new_order(data, "o-1", now)
+    assert client_order_id == "c-1"
+    assert (order.order_id, order.symbol, order.side, order.order_type) == ("o-1", "ETH-USDT", OrderSide.SELL, OrderType.MARKET)
+    assert order.price is None
+    assert order.remaining_quantity == 2.5 and order.status == OrderStatus.NEW
+
+    with pytest.raises(ValueError):
+        wire.decode_new_order(wire.encode_new_order("ETH-USDT", "c-2", OrderSide.BUY, OrderType.LIMIT, 0.0, 1.0), "o-2", now)
+    with pytest.raises(ValueError):
+        wire.decode_new_order(data[:-1], "o-3", now)
+    inf = float("inf")
+    for terms in ((inf, 1.0), (1.0, inf), (1.0, 1.0, -inf), (1.0, 1.0, None, inf)):
+        with pytest.raises(ValueError):
+            wire.decode_new_order(wire.encode_new_order("ETH-USDT", "c-3", OrderSide.BUY, OrderType.LIMIT, *terms), "o-3", now)
+    with pytest.raises(ValueError):
+        wire.encode_cancel("ETH-USDT", "x" * 17)
+
+    stop = wire.encode_new_order("ETH-USDT", "c-4", OrderSide.BUY, OrderType.STOP_LIMIT, 1.0, 101.0, stop_price=100.0)
+    _, order = wire.decode_new_order(stop, "o-4", now)
+    assert (order.order_type, order.price, order.stop_price) == (OrderType.STOP_LIMIT, 101.0, 100.0)
+    assert order.display_quantity is None
+
+    iceberg = wire.encode_new_order("ETH-USDT", "c-5", OrderSide.SELL, OrderType.LIMIT, 3.0, 101.0, display_quantity=1.0)
+    _, order = wire.decode_new_order(iceberg, "o-5", now)
+    assert (order.stop_price, order.display_quantity) == (None, 1.0)
+
+def test_ack_and_reject():
+    order = Order(
+        order_id="o-1", symbol="BTC-USDT", order_type=OrderType.LIMIT, side=OrderSide.BUY,
+        quantity=1.0, price=50000.0, remaining_quantity=1.0
+    )
+    ack = wire.decode(wire.encode_ack("c-1", order, []))
+    assert ack == {
+        "type": "ack", "client_order_id": "c-1", "status": OrderStatus.NEW,
+        "filled_quantity": 0.0, "remaining_quantity": 1.0, "trades": []
+    }
+    assert wire.decode_cancel(wire.encode_cancel("BTC-USDT", "c-1")) == ("BTC-USDT", "c-1")
+    assert wire.decode(wire.encode_reject("c-1", "Unknown order")) == {
+        "type": "reject", "client_order_id": "c-1", "reason": "Unknown order"
+    }
+    with pytest.raises(ValueError):
+        wire.decode(b"\xff")